@@ -0,0 +1,110 @@
+# Micro-benchmarks of the NumPy-only core on synthetic keyframe arrays, runnable without Blender.
+# Usage: python benchmarks/benchmark_core.py [--curves N] [--frames F] [--output results.json]
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vrm_spacing_core import (
+    build_keyframe_arrays, offset_keyframe_values, selected_keyframe_frames,
+    loopify_frame_range, loopify_keyframe_arrays,
+    euler_to_quaternion, pose_deltas, apply_rotation_delta,
+    fit_reduced_keys,
+)
+
+# Values a freshly inserted key gets with Blender's default preferences (Bezier, Auto Clamped handles)
+default_keyframe_settings = {
+    "interpolation": 2,
+    "handle_left_type": 4,
+    "handle_right_type": 4,
+    "easing": 0,
+    "type": 0,
+    "back": 1.70158,
+    "amplitude": 0.8,
+    "period": 4.1,
+    "select_control_point": True,
+}
+
+
+def parse_core_benchmark_arguments(argv):
+    parser = argparse.ArgumentParser(description="Times the core curve algorithms on synthetic keyframe arrays.")
+    parser.add_argument("--curves", type=int, nargs="+", default=[100, 1000], help="Numbers of curves")
+    parser.add_argument("--frames", type=int, nargs="+", default=[120, 2400], help="Keys per curve")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs per size (the minimum and median are reported)")
+    parser.add_argument("--output", help="Path of the JSON results")
+    return parser.parse_args(argv)
+
+def build_curves(curve_count, frame_count):
+    frames = np.arange(1, frame_count + 1, dtype=np.float32)
+    return [build_keyframe_arrays(frames, 0.1 * np.sin(frames * 0.1 + number), default_keyframe_settings)
+            for number in range(curve_count)]
+
+def run_offset(curves, frame_count):
+    for arrays in curves:
+        offset_keyframe_values(arrays, 0.01)
+
+def run_selection(curves, frame_count):
+    selected_keyframe_frames(curves)
+
+def run_loopify(curves, frame_count):
+    frame_range = loopify_frame_range(1, frame_count, 'LAST_FRAME', 4)
+    for arrays in curves:
+        loopify_keyframe_arrays(arrays, *frame_range, default_keyframe_settings)
+
+def run_tracking(curves, frame_count):
+    # One pose per curve, compared against the rest pose and composed back onto every frame
+    bone_count = len(curves)
+    euler = np.stack([arrays["co"][:3, 1] for arrays in curves]).astype(np.float64)
+    rotation = euler_to_quaternion(euler)
+    identity = np.tile([1.0, 0.0, 0.0, 0.0], (bone_count, 1))
+    zeros = np.zeros((bone_count, 3))
+    _location, delta_rotation, _scale, _changed = pose_deltas(zeros, rotation, zeros, zeros, identity, zeros)
+    keys = np.stack([arrays["co"][:, 1] for arrays in curves[:3]], axis=-1).astype(np.float64)
+    for row in range(bone_count):
+        apply_rotation_delta(delta_rotation[row], keys, 'XYZ')
+
+def run_reduction(curves, frame_count):
+    times = np.concatenate([arrays["co"][:, 0] for arrays in curves]).astype(np.float64)
+    values = np.concatenate([arrays["co"][:, 1] for arrays in curves]).astype(np.float64)
+    curve_starts = np.arange(len(curves)) * frame_count
+    fit_reduced_keys(times, values, curve_starts, np.full(len(times), 0.001))
+
+core_stages = {
+    "offset": run_offset,
+    "selection": run_selection,
+    "loopify": run_loopify,
+    "tracking": run_tracking,
+    "reduction": run_reduction,
+}
+
+def core_benchmark_main(argv):
+    args = parse_core_benchmark_arguments(argv)
+    results = []
+    for curve_count in args.curves:
+        for frame_count in args.frames:
+            for stage, run in core_stages.items():
+                times = []
+                for _ in range(args.repeat):
+                    curves = build_curves(curve_count, frame_count)
+                    start = time.perf_counter()
+                    run(curves, frame_count)
+                    times.append(time.perf_counter() - start)
+                results.append({"stage": stage, "curves": curve_count, "frames": frame_count,
+                                "min_seconds": min(times), "median_seconds": statistics.median(times)})
+                print(f"{stage:<10} curves={curve_count:<6} frames={frame_count:<6} {min(times):.4f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"numpy": np.__version__, "repeat": args.repeat, "results": results}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(core_benchmark_main(sys.argv[1:]))
@@ -0,0 +1,280 @@
+# Benchmarks the add-on's operators on procedurally built VRM-style armatures and actions.
+# Usage: blender -b --factory-startup --python benchmarks/benchmark_operators.py -- [options]
+
+import bpy
+import argparse
+import csv
+import importlib.util
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+default_addon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vrm_spacing_animation_baking.py")
+
+# Operators timed on every armature/action size, in the order they run
+benchmark_stages = ("spacing", "apply_tracked_changes", "delete_highlighted_bones", "bake", "loopify")
+
+# Humanoid hierarchy the J_Bip_* bones of bone_pairs hang from: (name, parent, head, tail)
+humanoid_bones = [
+    ("J_Bip_C_Hips", None, (0.0, 0.0, 1.0), (0.0, 0.0, 1.1)),
+    ("J_Bip_C_Spine", "J_Bip_C_Hips", (0.0, 0.0, 1.1), (0.0, 0.0, 1.2)),
+    ("J_Bip_C_Chest", "J_Bip_C_Spine", (0.0, 0.0, 1.2), (0.0, 0.0, 1.3)),
+    ("J_Bip_C_UpperChest", "J_Bip_C_Chest", (0.0, 0.0, 1.3), (0.0, 0.0, 1.4)),
+    ("J_Bip_C_Neck", "J_Bip_C_UpperChest", (0.0, 0.0, 1.4), (0.0, 0.0, 1.5)),
+    ("J_Bip_C_Head", "J_Bip_C_Neck", (0.0, 0.0, 1.5), (0.0, 0.0, 1.7)),
+]
+for side, sign in (("L", 1.0), ("R", -1.0)):
+    humanoid_bones += [
+        (f"J_Bip_{side}_Shoulder", "J_Bip_C_UpperChest", (0.02 * sign, 0.0, 1.4), (0.1 * sign, 0.0, 1.4)),
+        (f"J_Bip_{side}_UpperArm", f"J_Bip_{side}_Shoulder", (0.1 * sign, 0.0, 1.4), (0.35 * sign, 0.0, 1.4)),
+        (f"J_Bip_{side}_LowerArm", f"J_Bip_{side}_UpperArm", (0.35 * sign, 0.0, 1.4), (0.6 * sign, 0.0, 1.4)),
+        (f"J_Bip_{side}_Hand", f"J_Bip_{side}_LowerArm", (0.6 * sign, 0.0, 1.4), (0.7 * sign, 0.0, 1.4)),
+        (f"J_Bip_{side}_UpperLeg", "J_Bip_C_Hips", (0.1 * sign, 0.0, 1.0), (0.1 * sign, 0.0, 0.55)),
+        (f"J_Bip_{side}_LowerLeg", f"J_Bip_{side}_UpperLeg", (0.1 * sign, 0.0, 0.55), (0.1 * sign, 0.0, 0.1)),
+        (f"J_Bip_{side}_Foot", f"J_Bip_{side}_LowerLeg", (0.1 * sign, 0.0, 0.1), (0.1 * sign, -0.1, 0.02)),
+        (f"J_Bip_{side}_ToeBase", f"J_Bip_{side}_Foot", (0.1 * sign, -0.1, 0.02), (0.1 * sign, -0.15, 0.02)),
+    ]
+
+# Spring bone chains: (name prefix, parent, root position)
+spring_chain_kinds = [
+    ("J_Sec_Hair", "J_Bip_C_Head", (0.0, 0.05, 1.7)),
+    ("J_Sec_Bust", "J_Bip_C_Chest", (0.0, -0.1, 1.3)),
+    ("J_Sec_Skirt", "J_Bip_C_Hips", (0.0, 0.0, 1.0)),
+]
+spring_chain_length = 4
+
+
+def parse_benchmark_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender -b --factory-startup --python benchmarks/benchmark_operators.py --",
+        description="Times the add-on's operators across a grid of spring bone counts and action lengths."
+    )
+    parser.add_argument("--bones", type=int, nargs="+", default=[32, 128, 512], help="Numbers of Hair/Bust/Skirt spring bones to add to the humanoid bones")
+    parser.add_argument("--frames", type=int, nargs="+", default=[120, 600, 2400], help="Action lengths in frames")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per size (the minimum and median are reported)")
+    parser.add_argument("--stages", nargs="+", choices=benchmark_stages, default=list(benchmark_stages), help="Operators to time")
+    parser.add_argument("--spacing-mode", choices=['KEYFRAMES', 'FRAME_STEP'], default='KEYFRAMES', help="Spacing mode Adjust Spacing runs in")
+    parser.add_argument("--bake-mode", choices=['PHYSICS_ONLY', 'FULL'], default='PHYSICS_ONLY', help="Bake mode Adjust Playback & Bake runs in")
+    parser.add_argument("--addon", default=default_addon_path, help="Path of the add-on file to benchmark (default: the one in this repository)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Path of the JSON results")
+    parser.add_argument("--csv", help="Also write the results as CSV to this path")
+    return parser.parse_args(argv)
+
+def load_addon(path):
+    """Imports and registers the add-on file under test."""
+    spec = importlib.util.spec_from_file_location("vrm_spacing_animation_baking", path)
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+def spring_bone_layout(count):
+    """Spreads the spring bones over Hair/Bust/Skirt chains: returns (name, parent, head, tail) tuples."""
+    bones = []
+    for number in range(count):
+        prefix, parent, root = spring_chain_kinds[number % len(spring_chain_kinds)]
+        chain, link = divmod(number // len(spring_chain_kinds), spring_chain_length)
+        angle = 2.0 * math.pi * chain / max(1, count // (len(spring_chain_kinds) * spring_chain_length))
+        x = root[0] + 0.1 * math.cos(angle)
+        y = root[1] + 0.1 * math.sin(angle)
+        z = root[2] - 0.05 * link
+        bones.append((f"{prefix}{chain + 1}_{link + 1:02d}", parent if link == 0 else f"{prefix}{chain + 1}_{link:02d}", (x, y, z), (x, y, z - 0.05)))
+    return bones
+
+def build_armature(context, spring_bone_count):
+    """Creates an armature object with the humanoid bones and the given number of spring bones, and makes it active."""
+    data = bpy.data.armatures.new("BenchmarkArmature")
+    armature = bpy.data.objects.new("BenchmarkArmature", data)
+    context.scene.collection.objects.link(armature)
+    context.view_layer.objects.active = armature
+    armature.select_set(True)
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    for name, parent, head, tail in humanoid_bones + spring_bone_layout(spring_bone_count):
+        edit_bone = data.edit_bones.new(name)
+        edit_bone.head = head
+        edit_bone.tail = tail
+        if parent is not None:
+            edit_bone.parent = data.edit_bones[parent]
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Humanoid bones are spaced through their Euler curves, spring bones are baked as quaternions
+    for pose_bone in armature.pose.bones:
+        pose_bone.rotation_mode = 'XYZ' if pose_bone.name.startswith("J_Bip_") else 'QUATERNION'
+    return armature
+
+def new_benchmark_curve(action, armature, data_path, index, group_name):
+    if hasattr(action, "fcurve_ensure_for_datablock"):
+        try:
+            return action.fcurve_ensure_for_datablock(armature, data_path, index=index, group_name=group_name)
+        except TypeError:
+            # Blender 4.4/4.5 have no group_name argument
+            return action.fcurve_ensure_for_datablock(armature, data_path, index=index)
+    return action.fcurves.new(data_path, index=index, action_group=group_name)
+
+def build_action(context, addon, armature, frame_count):
+    """Keys every bone's location, rotation and scale on every frame with smooth synthetic motion."""
+    action = bpy.data.actions.new("BenchmarkAction")
+    armature.animation_data_create()
+    armature.animation_data.action = action
+
+    defaults = addon.new_keyframe_defaults(context)
+    frames = np.arange(1, frame_count + 1, dtype=np.float32)
+    for number, pose_bone in enumerate(armature.pose.bones):
+        phase = frames * 0.1 + number
+        wave = 0.1 * np.sin(phase)
+        if pose_bone.rotation_mode == 'QUATERNION':
+            half = 0.5 * wave
+            rotation = ("rotation_quaternion", [np.cos(half), np.sin(half), np.zeros_like(half), np.zeros_like(half)])
+        else:
+            rotation = ("rotation_euler", [wave, 0.5 * wave, 0.25 * wave])
+        channels = [("location", [0.01 * np.cos(phase), 0.01 * np.sin(phase), np.zeros_like(phase)]),
+                    rotation,
+                    ("scale", [np.ones_like(phase)] * 3)]
+
+        bone_path = f'pose.bones["{bpy.utils.escape_identifier(pose_bone.name)}"]'
+        for prop, components in channels:
+            for index, values in enumerate(components):
+                fcurve = new_benchmark_curve(action, armature, f"{bone_path}.{prop}", index, pose_bone.name)
+                addon.write_keyframe_arrays(fcurve, addon.build_keyframe_arrays(frames, values, defaults))
+
+    context.scene.frame_start = 1
+    context.scene.frame_end = frame_count
+    context.scene.frame_set(1)
+    return action
+
+def clear_benchmark_data(addon):
+    for armature in [obj for obj in bpy.data.objects if obj.type == 'ARMATURE']:
+        bpy.data.objects.remove(armature)
+    for data in list(bpy.data.armatures):
+        bpy.data.armatures.remove(data)
+    for action in list(bpy.data.actions):
+        bpy.data.actions.remove(action)
+    # Removed actions can be reallocated at the same address, so the cached indices must go
+    addon.clear_fcurve_index_cache()
+    if hasattr(addon, "clear_physics_bone_cache"):
+        addon.clear_physics_bone_cache()
+
+def select_bones(armature, bone_names):
+    bone_names = set(bone_names)
+    for bone in armature.data.bones:
+        bone.select = bone.name in bone_names
+
+def run_spacing(context, addon, armature):
+    scene = context.scene
+    scene.selected_bone_pair = 'UPPER_ARM'
+    scene.affect_left_prop = True
+    scene.affect_right_prop = True
+    return bpy.ops.object.adjust_spacing()
+
+def run_apply_tracked_changes(context, addon, armature):
+    bpy.ops.pose.start_listening()
+    tracked_bones = [name for _pair, left, right, _label, _mirrored in addon.bone_pairs for name in (left, right) if name]
+    select_bones(armature, tracked_bones)
+
+    # Record the original pose, move the bones, then record the deltas (as the depsgraph handler would)
+    addon.tracked_changes.update(armature)
+    for name in tracked_bones:
+        pose_bone = armature.pose.bones[name]
+        pose_bone.location.x += 0.01
+        pose_bone.rotation_euler.z += 0.05
+    addon.tracked_changes.update(armature)
+    return bpy.ops.pose.apply_tracked_changes()
+
+def run_delete_highlighted_bones(context, addon, armature):
+    if context.mode != 'POSE':
+        bpy.ops.object.mode_set(mode='POSE')
+    bpy.ops.object.select_physics_bones()
+    return bpy.ops.object.delete_highlighted_bones()
+
+def run_bake(context, addon, armature):
+    return bpy.ops.object.adjust_playback_and_bake()
+
+def run_loopify(context, addon, armature):
+    bpy.ops.object.select_physics_bones()
+    return bpy.ops.object.loopify_physics()
+
+stage_runners = {
+    "spacing": run_spacing,
+    "apply_tracked_changes": run_apply_tracked_changes,
+    "delete_highlighted_bones": run_delete_highlighted_bones,
+    "bake": run_bake,
+    "loopify": run_loopify,
+}
+
+def run_benchmark_case(context, addon, spring_bone_count, frame_count, args):
+    """Builds one armature/action and times every requested stage on it once. Returns {stage: seconds or error}."""
+    clear_benchmark_data(addon)
+    armature = build_armature(context, spring_bone_count)
+    build_action(context, addon, armature, frame_count)
+    context.scene.spacing_mode = args.spacing_mode
+    context.scene.bake_mode = args.bake_mode
+    context.scene.reduce_after_bake = False
+
+    timings = {}
+    for stage in args.stages:
+        start = time.perf_counter()
+        try:
+            result = stage_runners[stage](context, addon, armature)
+        except Exception as e:
+            timings[stage] = f"error: {e}"
+            continue
+        elapsed = time.perf_counter() - start
+        timings[stage] = elapsed if 'FINISHED' in result else f"error: {sorted(result)}"
+    return timings
+
+def benchmark_main(argv):
+    args = parse_benchmark_arguments(argv)
+    addon = load_addon(args.addon)
+    context = bpy.context
+
+    results = []
+    for spring_bone_count in args.bones:
+        for frame_count in args.frames:
+            runs = [run_benchmark_case(context, addon, spring_bone_count, frame_count, args) for _ in range(args.repeat)]
+            for stage in args.stages:
+                times = [run[stage] for run in runs if not isinstance(run[stage], str)]
+                errors = sorted({run[stage] for run in runs if isinstance(run[stage], str)})
+                results.append({
+                    "stage": stage,
+                    "bones": len(humanoid_bones) + spring_bone_count,
+                    "spring_bones": spring_bone_count,
+                    "frames": frame_count,
+                    "runs": len(times),
+                    "min_seconds": min(times) if times else None,
+                    "median_seconds": statistics.median(times) if times else None,
+                    "error": "; ".join(errors) or None,
+                })
+                row = results[-1]
+                timing = f"{row['min_seconds']:.4f}s" if times else row["error"]
+                print(f"{stage:<26} bones={row['bones']:<5} frames={frame_count:<6} {timing}")
+    clear_benchmark_data(addon)
+
+    report = {
+        "blender": bpy.app.version_string,
+        "addon": os.path.abspath(args.addon),
+        "addon_version": ".".join(str(number) for number in addon.bl_info["version"]),
+        "spacing_mode": args.spacing_mode,
+        "bake_mode": args.bake_mode,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else ["stage"])
+            writer.writeheader()
+            writer.writerows(results)
+    print(f"Results written to {args.output}")
+    return 0 if all(row["error"] is None for row in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []))
@@ -0,0 +1,30 @@
+# Tests of the NumPy-only core (vrm_spacing_core.py), runnable with plain pytest and no Blender install:
+#     python -m pytest
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def keyframe_defaults():
+    """Values a freshly inserted key gets with Blender's default preferences (Bezier, Auto Clamped handles)."""
+    return {
+        "interpolation": 2,
+        "handle_left_type": 4,
+        "handle_right_type": 4,
+        "easing": 0,
+        "type": 0,
+        "back": 1.70158,
+        "amplitude": 0.8,
+        "period": 4.1,
+        "select_control_point": True,
+    }
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
@@ -0,0 +1,102 @@
+# Writes loopify_regression.json: the keys the original Loopify Physics operator (baseline commit 93103ac) leaves on
+# a set of curves, for every frame selection, start frame and frame easing tested. Needs a Blender whose bones still
+# have a select flag and layered actions (4.4 or 4.5), run as a script or with the bpy module:
+#     git show 93103ac:vrm_spacing_animation_baking.py > baseline_addon.py
+#     python tests/fixtures/make_loopify_regression.py baseline_addon.py
+
+import importlib.util
+import json
+import math
+import os
+import sys
+
+import bpy
+
+frame_count = 30
+start_frames = (1, 10)
+frame_easings = (0, 4, 6, 45)
+fixture_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loopify_regression.json")
+
+
+def input_curves(start_frame):
+    """Returns (data path, array index, frames, values, interpolation) of the looped curves: dense keys, sparse keys
+    with and without a key on the copy frame, and mixed interpolation."""
+    frames = list(range(start_frame, start_frame + frame_count))
+    sparse = [start_frame + offset for offset in (0, 3, 4, 11, 20, frame_count - 1)]
+    inner = [start_frame + offset for offset in (2, 7, 15)]
+    return [
+        ('pose.bones["Bone"].location', 0, frames, [round(0.5 * math.sin(0.3 * frame), 4) for frame in frames], ['BEZIER'] * len(frames)),
+        ('pose.bones["Bone"].location', 1, sparse, [round(0.1 * frame, 4) for frame in sparse], ['BEZIER'] * len(sparse)),
+        ('pose.bones["Bone"].location', 2, inner, [0.25, -0.5, 0.75], ['BEZIER'] * len(inner)),
+        ('pose.bones["Bone"].rotation_euler', 2, frames, [round(0.2 * math.cos(0.5 * frame), 4) for frame in frames],
+         ['LINEAR' if number % 3 else 'CONSTANT' for number in range(len(frames))]),
+    ]
+
+def build_scene(curves):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    armature_data = bpy.data.armatures.new("Armature")
+    armature = bpy.data.objects.new("Armature", armature_data)
+    bpy.context.scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    bone = armature_data.edit_bones.new("Bone")
+    bone.tail = (0.0, 0.0, 1.0)
+    bpy.ops.object.mode_set(mode='POSE')
+    armature_data.bones["Bone"].select = True
+
+    action = bpy.data.actions.new("Action")
+    armature.animation_data_create()
+    armature.animation_data.action = action
+    for data_path, array_index, frames, values, interpolation in curves:
+        fcurve = action.fcurve_ensure_for_datablock(armature, data_path, index=array_index)
+        for frame, value, mode in zip(frames, values, interpolation):
+            keyframe = fcurve.keyframe_points.insert(frame, value, options={'FAST'})
+            keyframe.interpolation = mode
+        fcurve.update()
+    return armature, action
+
+def read_curves(armature, action):
+    anim_data = armature.animation_data
+    fcurves = action.layers[0].strips[0].channelbag(anim_data.action_slot).fcurves
+    curves = []
+    for fcurve in sorted(fcurves, key=lambda fcurve: (fcurve.data_path, fcurve.array_index)):
+        keys = fcurve.keyframe_points
+        curves.append({
+            "data_path": fcurve.data_path,
+            "array_index": fcurve.array_index,
+            "frames": [keyframe.co[0] for keyframe in keys],
+            "values": [keyframe.co[1] for keyframe in keys],
+            "interpolation": [keyframe.interpolation for keyframe in keys],
+        })
+    return curves
+
+def main(baseline_path):
+    spec = importlib.util.spec_from_file_location("vrm_spacing_animation_baking", baseline_path)
+    addon = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(addon)
+    addon.register()
+
+    cases = []
+    try:
+        for frame_selection in ('LAST_FRAME', 'FIRST_FRAME'):
+            for start_frame in start_frames:
+                for frame_easing in frame_easings:
+                    armature, action = build_scene(input_curves(start_frame))
+                    before = read_curves(armature, action)
+                    bpy.context.scene.frame_selection = frame_selection
+                    bpy.context.scene.loopify_frame_easing = frame_easing
+                    bpy.ops.object.loopify_physics()
+                    cases.append({"frame_selection": frame_selection, "start_frame": start_frame, "frame_easing": frame_easing,
+                                  "input": before, "expected": read_curves(armature, action)})
+    finally:
+        addon.unregister()
+
+    # One case per line
+    with open(fixture_path, "w") as file:
+        file.write(f'{{"frame_count": {frame_count}, "cases": [\n')
+        file.write(",\n".join(json.dumps(case) for case in cases))
+        file.write("\n]}\n")
+    print(f"Wrote {len(cases)} cases to {fixture_path}")
+
+if __name__ == "__main__":
+    main(sys.argv[-1])
@@ -0,0 +1,344 @@
+# Tests that run the add-on's operators inside Blender; skipped when the bpy module isn't installed.
+
+import json
+import os
+import struct
+import sys
+import types
+
+import numpy as np
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import benchmark_operators
+from vrm_spacing_core import subset_spring_parents
+
+
+@pytest.fixture(scope="module")
+def addon():
+    addon = benchmark_operators.load_addon(benchmark_operators.default_addon_path)
+    yield addon
+    # The bpy module doesn't exit while the add-on's classes are still registered
+    addon.unregister()
+
+@pytest.fixture
+def armature(addon):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    armature = benchmark_operators.build_armature(bpy.context, 4)
+    benchmark_operators.build_action(bpy.context, addon, armature, 20)
+    return armature
+
+def upper_arm_matrices(armature, frame):
+    bpy.context.scene.frame_set(frame)
+    return {name: np.array(armature.pose.bones[name].matrix) for name in ("J_Bip_L_UpperArm", "J_Bip_R_UpperArm")}
+
+
+def test_nla_add_spacing_writes_the_layer_action(addon, armature):
+    base_action = armature.animation_data.action
+    before = upper_arm_matrices(armature, 5)
+    bpy.context.scene.spacing_mode = 'NLA_ADD'
+    bpy.context.scene.selected_bone_pair = 'UPPER_ARM'
+
+    assert bpy.ops.object.adjust_spacing() == {'FINISHED'}
+    assert bpy.ops.object.adjust_spacing() == {'FINISHED'}
+
+    strip = addon.get_spacing_strip(armature)
+    assert strip is not None and strip.action is not base_action
+    assert armature.animation_data.action is base_action
+    offsets, quaternions = addon.read_spacing_layer_rotations(strip.action, armature)
+    assert not quaternions
+    assert offsets[("J_Bip_L_UpperArm", 2)] == pytest.approx(-offsets[("J_Bip_R_UpperArm", 2)])
+    assert offsets[("J_Bip_L_UpperArm", 2)] == pytest.approx(2.0 * np.radians(bpy.context.scene.space_value_prop), abs=1e-6)
+
+    after = upper_arm_matrices(armature, 5)
+    for name, matrix in before.items():
+        assert not np.allclose(after[name], matrix, atol=1e-4)
+
+def test_flatten_spacing_layer_bakes_the_layer_into_the_base_action(addon, armature):
+    bpy.context.scene.spacing_mode = 'NLA_ADD'
+    bpy.context.scene.selected_bone_pair = 'UPPER_ARM'
+    bpy.ops.object.adjust_spacing()
+    layered = upper_arm_matrices(armature, 7)
+
+    addon.flatten_spacing_layer(bpy.context, armature)
+    addon.remove_spacing_strip(armature)
+
+    assert addon.get_spacing_strip(armature) is None
+    flattened = upper_arm_matrices(armature, 7)
+    for name, matrix in layered.items():
+        np.testing.assert_allclose(flattened[name], matrix, atol=1e-5)
+
+def rotation_keys(addon, armature, bone_name):
+    index = addon.get_fcurve_index(armature.animation_data.action, armature)
+    return {fcurve.array_index: addon.read_keyframe_arrays(fcurve, ("co",))["co"] for fcurve in index.bone_curves(bone_name, "rotation_euler")}
+
+def set_upper_arm_spacing(axis, degrees):
+    scene = bpy.context.scene
+    scene.spacing_mode = 'KEYFRAMES'
+    scene.selected_bone_pair = 'UPPER_ARM'
+    scene.spacing_axis = axis
+    scene.space_value_prop = degrees
+
+def adjust_upper_arm_spacing(axis, degrees):
+    set_upper_arm_spacing(axis, degrees)
+    assert bpy.ops.object.adjust_spacing() == {'FINISHED'}
+
+def thin_out_upper_arm_keys(addon, armature):
+    """Leaves the left upper arm with sparse X and Z keys and no Y curve."""
+    index = addon.get_fcurve_index(armature.animation_data.action, armature)
+    index.curves_coll.remove(index.find("J_Bip_L_UpperArm", "rotation_euler", 1))
+    # Removing a curve shifts the indexed positions of the ones after it
+    index = addon.get_fcurve_index(armature.animation_data.action, armature)
+    for axis_index, kept in ((0, [0, 9, 19]), (2, [0, 4, 14])):
+        fcurve = index.find("J_Bip_L_UpperArm", "rotation_euler", axis_index)
+        arrays = addon.read_keyframe_arrays(fcurve)
+        addon.write_keyframe_arrays(fcurve, {prop: array[kept] for prop, array in arrays.items()})
+
+def curve_arrays(addon, armature, bone_name):
+    index = addon.get_fcurve_index(armature.animation_data.action, armature)
+    return {(fcurve.data_path, fcurve.array_index): addon.read_keyframe_arrays(fcurve, ("co", "handle_left", "handle_right"))
+            for fcurve in index.bone_curves(bone_name)}
+
+def test_reset_spacing_restores_the_keys_after_edits_about_different_axes(addon, armature):
+    before = rotation_keys(addon, armature, "J_Bip_L_UpperArm")
+    for axis, degrees in (('SIDEWAYS', 10.0), ('FORWARD_BACKWARD', 15.0), ('DEPTH', -8.0)):
+        adjust_upper_arm_spacing(axis, degrees)
+    assert not np.allclose(rotation_keys(addon, armature, "J_Bip_L_UpperArm")[2], before[2])
+
+    assert bpy.ops.object.reset_spacing_layer() == {'FINISHED'}
+
+    assert not addon.get_spacing_layer(armature.animation_data.action)
+    after = rotation_keys(addon, armature, "J_Bip_L_UpperArm")
+    assert after.keys() == before.keys()
+    for axis_index, keys in before.items():
+        np.testing.assert_allclose(after[axis_index], keys, atol=1e-5)
+
+def test_sideways_spacing_only_offsets_the_existing_z_keys(addon, armature):
+    thin_out_upper_arm_keys(addon, armature)
+    before = rotation_keys(addon, armature, "J_Bip_L_UpperArm")
+
+    adjust_upper_arm_spacing('SIDEWAYS', 10.0)
+
+    after = rotation_keys(addon, armature, "J_Bip_L_UpperArm")
+    assert sorted(after) == [0, 2]
+    np.testing.assert_allclose(after[0], before[0])
+    np.testing.assert_allclose(after[2][:, 0], before[2][:, 0])
+    np.testing.assert_allclose(after[2][:, 1], before[2][:, 1] + np.radians(10.0), atol=1e-6)
+
+@pytest.mark.parametrize("axis", ['SIDEWAYS', 'FORWARD_BACKWARD'])
+def test_modal_spacing_matches_adjust_spacing(addon, armature, axis):
+    thin_out_upper_arm_keys(addon, armature)
+    adjust_upper_arm_spacing(axis, 10.0)
+    expected = curve_arrays(addon, armature, "J_Bip_L_UpperArm")
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    armature = benchmark_operators.build_armature(bpy.context, 4)
+    benchmark_operators.build_action(bpy.context, addon, armature, 20)
+    thin_out_upper_arm_keys(addon, armature)
+    set_upper_arm_spacing(axis, 10.0)
+    bpy.context.scene.modal_chunk_frames = 3
+    assert bpy.ops.object.adjust_spacing_modal() == {'FINISHED'}
+
+    result = curve_arrays(addon, armature, "J_Bip_L_UpperArm")
+    assert result.keys() == expected.keys()
+    for key, arrays in expected.items():
+        for prop, values in arrays.items():
+            np.testing.assert_allclose(result[key][prop], values, atol=1e-6, err_msg=f"{key} {prop}")
+
+def test_cancelled_modal_spacing_restores_the_curves(addon, armature):
+    thin_out_upper_arm_keys(addon, armature)
+    before = curve_arrays(addon, armature, "J_Bip_L_UpperArm")
+    set_upper_arm_spacing('FORWARD_BACKWARD', 10.0)
+
+    # Runs the operator's steps on a stand-in instance, cancelling halfway like Esc does
+    operator = types.SimpleNamespace(report=lambda *args: None)
+    operator.total = addon.ModalSpacingOperator.start(operator, bpy.context)
+    addon.ModalSpacingOperator.run_chunk(operator, bpy.context, 0, operator.total // 2)
+    assert curve_arrays(addon, armature, "J_Bip_L_UpperArm").keys() != before.keys()
+    addon.ModalSpacingOperator.rollback(operator, bpy.context)
+
+    after = curve_arrays(addon, armature, "J_Bip_L_UpperArm")
+    assert after.keys() == before.keys()
+    for key, arrays in before.items():
+        for prop, values in arrays.items():
+            np.testing.assert_allclose(after[key][prop], values, err_msg=f"{key} {prop}")
+    assert not addon.get_spacing_layer(armature.animation_data.action)
+
+def test_loopify_matches_the_original_operator(addon):
+    # Same fixture as tests/test_loopify.py, through the operator's read, loop and write passes
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "loopify_regression.json")) as file:
+        regression = json.load(file)
+    for case in regression["cases"]:
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        armature = bpy.data.objects.new("Armature", bpy.data.armatures.new("Armature"))
+        bpy.context.scene.collection.objects.link(armature)
+        bpy.context.view_layer.objects.active = armature
+        bpy.ops.object.mode_set(mode='EDIT')
+        armature.data.edit_bones.new("Bone").tail = (0.0, 0.0, 1.0)
+        bpy.ops.object.mode_set(mode='POSE')
+        action = bpy.data.actions.new("Action")
+        armature.animation_data_create()
+        armature.animation_data.action = action
+        defaults = addon.new_keyframe_defaults(bpy.context)
+        for curve in case["input"]:
+            fcurve = addon.ensure_datablock_curve(action, armature, curve["data_path"], curve["array_index"], "Bone")
+            arrays = addon.build_keyframe_arrays(np.array(curve["frames"]), np.array(curve["values"]), defaults)
+            arrays["interpolation"] = np.array([addon.keyframe_enum_value("interpolation", mode) for mode in curve["interpolation"]])
+            addon.write_keyframe_arrays(fcurve, arrays)
+
+        scene = bpy.context.scene
+        scene.frame_selection = case["frame_selection"]
+        scene.loopify_frame_easing = case["frame_easing"]
+        start_frame = case["start_frame"]
+        index = addon.get_fcurve_index(action, armature)
+        addon.loopify_bones(bpy.context, index, start_frame, start_frame + regression["frame_count"] - 1, ["Bone"])
+
+        for expected in case["expected"]:
+            fcurve = index.curves_coll.find(expected["data_path"], index=expected["array_index"])
+            keys = fcurve.keyframe_points
+            assert [keyframe.co[0] for keyframe in keys] == expected["frames"]
+            np.testing.assert_allclose([keyframe.co[1] for keyframe in keys], expected["values"], atol=1e-6)
+            assert [keyframe.interpolation for keyframe in keys] == expected["interpolation"]
+
+def test_renamed_bones_rebuild_the_physics_bone_set(addon, armature):
+    before = set(addon.get_physics_bone_names(armature))
+    assert "J_Bip_C_Head" not in before
+    armature.data.bones["J_Bip_C_Head"].name = "Hair_Head"
+    armature.data.bones[sorted(before)[0]].name = "Earring_Static"
+    after = set(addon.get_physics_bone_names(armature))
+    assert "Hair_Head" in after and "Earring_Static" not in after
+    assert after == (before - {sorted(before)[0]}) | {"Hair_Head"}
+
+def test_modal_spacing_chunks_count_their_written_keys(addon, armature, monkeypatch):
+    set_upper_arm_spacing('SIDEWAYS', 10.0)
+    operator = types.SimpleNamespace(report=lambda *args: None)
+    operator.total = addon.ModalSpacingOperator.start(operator, bpy.context)
+
+    monkeypatch.setattr(addon, "profiling_enabled", True)
+    addon.clear_profile_results()
+    addon.run_profiled("chunk", addon.ModalSpacingOperator.run_chunk, (operator, bpy.context, 0, 5), {})
+    totals = addon.profile_totals["chunk"]
+    assert totals["keys_written"] > 0 and totals["curves_touched"] > 0
+    addon.ModalSpacingOperator.rollback(operator, bpy.context)
+
+def test_nla_add_spacing_misses_the_bake_cache(addon, armature, tmp_path):
+    scene = bpy.context.scene
+    scene.use_bake_cache = True
+    scene.bake_cache_directory = str(tmp_path)
+    action = armature.animation_data.action
+    bone_names = addon.get_physics_bone_names(armature, scene)
+    key, cached = addon.cached_physics_basis(scene, armature, action, bone_names, 1, 20)
+    assert cached is None
+    addon.store_physics_basis(scene, key, {name: np.tile(np.eye(4), (20, 1, 1)) for name in bone_names})
+    assert addon.cached_physics_basis(scene, armature, action, bone_names, 1, 20)[1] is not None
+
+    scene.spacing_mode = 'NLA_ADD'
+    scene.selected_bone_pair = 'UPPER_ARM'
+    assert bpy.ops.object.adjust_spacing() == {'FINISHED'}
+    assert armature.animation_data.action is action
+    spaced_key, cached = addon.cached_physics_basis(scene, armature, action, bone_names, 1, 20)
+    assert spaced_key != key and cached is None
+
+    armature.animation_data.action_blend_type = 'ADD'
+    assert addon.physics_bake_cache_key(scene, armature, action, bone_names, 1, 20) != spaced_key
+
+def two_chain_setup():
+    """Stand-in SpringBoneSetup: two falling two-joint chains hanging from a static driver."""
+    parents = np.array([-1, 0, -1, 2])
+    rest_local = np.tile(np.eye(4), (4, 1, 1))
+    rest_local[:, :3, 3] = [(0.0, 0.0, 1.0), (0.1, 0.0, 0.0), (0.0, 0.2, 1.0), (0.1, 0.0, 0.0)]
+
+    def solver_arguments(pose_matrices, world_matrices, delta_time, joints=None):
+        joints = np.arange(4) if joints is None else joints
+        count, frames = len(joints), len(pose_matrices)
+        return (np.tile(np.eye(4), (frames, 1, 1, 1)), np.zeros(count, dtype=np.int64),
+                subset_spring_parents(parents, joints), rest_local[joints], np.tile([0.1, 0.0, 0.0], (count, 1)),
+                np.full(count, 0.2), np.full(count, 0.4), np.tile([0.0, 0.0, -9.8], (count, 1)), np.full(count, 0.01),
+                np.zeros((frames, 0, 4, 4)), np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0), np.zeros(0, dtype=bool),
+                np.zeros((count, 0), dtype=bool), delta_time)
+
+    return types.SimpleNamespace(parents=parents, joint_names=["A1", "A2", "B1", "B2"], solver_arguments=solver_arguments)
+
+def test_spring_solver_workers_match_one_process(addon):
+    setup = two_chain_setup()
+    pose_matrices = np.tile(np.eye(4), (10, 1, 1, 1))
+    world_matrices = np.tile(np.eye(4), (10, 1, 1))
+    single = addon.simulate_spring_setup(setup, pose_matrices, world_matrices, 1.0 / 30.0)
+    reports = []
+    operator = types.SimpleNamespace(report=lambda level, message: reports.append((level, message)))
+    pooled = addon.simulate_spring_setup(setup, pose_matrices, world_matrices, 1.0 / 30.0, 2, operator)
+    assert not reports
+    np.testing.assert_allclose(pooled, single, atol=1e-12)
+
+def test_unavailable_spring_solver_pool_is_reported(addon, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError("no processes")
+    monkeypatch.setattr(addon, "ProcessPoolExecutor", unavailable)
+    setup = two_chain_setup()
+    reports = []
+    operator = types.SimpleNamespace(report=lambda level, message: reports.append((level, message)))
+    world = addon.simulate_spring_setup(setup, np.tile(np.eye(4), (5, 1, 1, 1)), np.tile(np.eye(4), (5, 1, 1)), 1.0 / 30.0, 2, operator)
+    assert world.shape == (5, 4, 4, 4)
+    assert reports == [({'WARNING'}, "Spring solver process pool unavailable, simulating in one process: no processes")]
+
+def read_glb(path):
+    """Parses a binary glTF file, checking its header and chunk padding. Returns the JSON and the binary chunk."""
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    assert (magic, version, length) == (0x46546C67, 2, len(data))
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    binary_length, binary_type = struct.unpack_from("<II", data, 20 + json_length)
+    assert (json_type, binary_type) == (0x4E4F534A, 0x004E4942)
+    assert json_length % 4 == 0 and binary_length % 4 == 0
+    assert 28 + json_length + binary_length == len(data)
+    gltf = json.loads(data[20:20 + json_length])
+    assert 0 <= binary_length - gltf["buffers"][0]["byteLength"] < 4
+    return gltf, data[28 + json_length:]
+
+def read_accessor(gltf, binary, accessor_index):
+    accessor = gltf["accessors"][accessor_index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    values = np.frombuffer(binary, dtype='<f4', count=view["byteLength"] // 4, offset=view["byteOffset"])
+    return accessor, values.reshape(accessor["count"], -1)
+
+def exported_rotation_times(gltf, binary, bone_name):
+    node = next(i for i, node in enumerate(gltf["nodes"]) if node["name"] == bone_name)
+    channel = next(c for c in gltf["animations"][0]["channels"] if c["target"] == {"node": node, "path": "rotation"})
+    sampler = gltf["animations"][0]["samplers"][channel["sampler"]]
+    assert sampler["interpolation"] == "LINEAR"
+    accessor, times = read_accessor(gltf, binary, sampler["input"])
+    assert (accessor["min"], accessor["max"]) == ([float(times[0, 0])], [float(times[-1, 0])])
+    output, rotations = read_accessor(gltf, binary, sampler["output"])
+    assert output["count"] == accessor["count"] and output["type"] == "VEC4"
+    np.testing.assert_allclose(np.linalg.norm(rotations, axis=1), 1.0, atol=1e-6)
+    return times[:, 0]
+
+def test_vrm_animation_export_samples_curved_segments(addon, armature, tmp_path):
+    thin_out_upper_arm_keys(addon, armature)
+    action = armature.animation_data.action
+    path = str(tmp_path / "clip.vrma")
+    channel_count, _key_count = addon.export_vrm_animation(bpy.context, armature, action, path)
+    gltf, binary = read_glb(path)
+    assert len(gltf["animations"][0]["channels"]) == channel_count
+
+    human_bones = gltf["extensions"]["VRMC_vrm_animation"]["humanoid"]["humanBones"]
+    humanoid = addon.get_humanoid_bone_names(armature)
+    assert {human: gltf["nodes"][bone["node"]]["name"] for human, bone in human_bones.items()} == {
+        human: name for name, human in humanoid.items()}
+    assert human_bones["leftUpperArm"] == {"node": [node["name"] for node in gltf["nodes"]].index("J_Bip_L_UpperArm")}
+
+    # The sparse Bezier keys (frames 1, 5, 10, 15 and 20) are resampled on every frame in between
+    fps = bpy.context.scene.render.fps / bpy.context.scene.render.fps_base
+    np.testing.assert_allclose(exported_rotation_times(gltf, binary, "J_Bip_L_UpperArm"), np.arange(20) / fps, rtol=1e-6)
+
+    index = addon.get_fcurve_index(action, armature)
+    for fcurve in index.bone_curves("J_Bip_L_UpperArm", "rotation_euler"):
+        for point in fcurve.keyframe_points:
+            point.interpolation = 'LINEAR'
+    addon.export_vrm_animation(bpy.context, armature, action, path)
+    gltf, binary = read_glb(path)
+    np.testing.assert_allclose(exported_rotation_times(gltf, binary, "J_Bip_L_UpperArm"), np.array([0, 4, 9, 14, 19]) / fps, rtol=1e-6)
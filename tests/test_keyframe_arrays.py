@@ -0,0 +1,101 @@
+import numpy as np
+
+from vrm_spacing_core import (
+    keyframe_array_props, build_keyframe_arrays, match_keyframes, set_keyframe_values, offset_keyframe_range,
+    merge_keyframe_range, selected_keyframe_frames, pack_keyframe_arrays, unpack_keyframe_arrays, diff_keyframe_arrays,
+)
+
+
+def test_build_keyframe_arrays_has_every_property(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.array([1.0, 5.0]), np.array([0.5, -0.5]), keyframe_defaults)
+    for prop, size, dtype in keyframe_array_props:
+        assert arrays[prop].dtype == dtype
+        assert arrays[prop].shape == ((2, size) if size > 1 else (2,))
+    np.testing.assert_allclose(arrays["handle_left"], [[0.0, 0.5], [4.0, -0.5]])
+    np.testing.assert_allclose(arrays["handle_right"], [[2.0, 0.5], [6.0, -0.5]])
+
+def test_match_keyframes_finds_keys_within_threshold():
+    key_frames = np.array([1.0, 2.0, 10.0], dtype=np.float32)
+    np.testing.assert_array_equal(match_keyframes(key_frames, [1.0, 2.005, 3.0, 10.0, 0.0, 11.0]), [0, 1, -1, 2, -1, -1])
+
+def test_match_keyframes_without_keys():
+    np.testing.assert_array_equal(match_keyframes(np.zeros(0, dtype=np.float32), [1.0, 2.0]), [-1, -1])
+
+def test_set_keyframe_values_moves_existing_keys_with_their_handles(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.array([1.0, 3.0]), np.array([0.0, 1.0]), keyframe_defaults)
+    result = set_keyframe_values(arrays, [3.0], [2.5], keyframe_defaults)
+    np.testing.assert_allclose(result["co"], [[1.0, 0.0], [3.0, 2.5]])
+    np.testing.assert_allclose(result["handle_left"][1], [2.0, 2.5])
+    np.testing.assert_allclose(result["handle_right"][1], [4.0, 2.5])
+
+def test_set_keyframe_values_inserts_missing_keys_in_frame_order(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.array([1.0, 5.0]), np.array([0.0, 1.0]), keyframe_defaults)
+    arrays["interpolation"][:] = 0
+    result = set_keyframe_values(arrays, [3.0, 7.0], [0.5, 2.0], keyframe_defaults)
+    np.testing.assert_allclose(result["co"], [[1.0, 0.0], [3.0, 0.5], [5.0, 1.0], [7.0, 2.0]])
+    # Like keyframe_insert, the new keys take the interpolation of the key before them
+    np.testing.assert_array_equal(result["interpolation"], [0, 0, 0, 0])
+    np.testing.assert_array_equal(result["handle_left_type"], [4, 4, 4, 4])
+
+def test_set_keyframe_values_interpolation_follows_keyframe_insert(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.array([5.0, 6.0]), np.zeros(2), keyframe_defaults)
+    arrays["interpolation"][:] = [1, 0]
+    result = set_keyframe_values(arrays, [1.0, 2.0, 9.0], np.ones(3), keyframe_defaults)
+    # Keys before the curve start take the first key's interpolation
+    np.testing.assert_array_equal(result["interpolation"], [1, 1, 1, 0, 0])
+
+    # On a curve of one key, the first two keys inserted get the defaults
+    arrays = build_keyframe_arrays(np.array([5.0]), np.zeros(1), keyframe_defaults)
+    arrays["interpolation"][:] = 1
+    np.testing.assert_array_equal(set_keyframe_values(arrays, [7.0, 9.0], np.ones(2), keyframe_defaults)["interpolation"], [1, 2, 2])
+    np.testing.assert_array_equal(set_keyframe_values(arrays, [1.0, 7.0, 9.0], np.ones(3), keyframe_defaults)["interpolation"], [2, 1, 1, 1])
+
+def test_offset_keyframe_range_only_moves_keys_in_range(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.arange(1.0, 6.0), np.zeros(5), keyframe_defaults)
+    offset_keyframe_range(arrays, 1.0, 2, 4)
+    np.testing.assert_allclose(arrays["co"][:, 1], [0.0, 1.0, 1.0, 0.0, 0.0])
+    np.testing.assert_allclose(arrays["handle_right"][:, 1], [0.0, 1.0, 1.0, 0.0, 0.0])
+
+def test_merge_keyframe_range_keeps_keys_outside_the_bake(keyframe_defaults):
+    existing = build_keyframe_arrays(np.array([0.0, 2.0, 8.0]), np.array([1.0, 1.0, 1.0]), keyframe_defaults)
+    baked = build_keyframe_arrays(np.array([1.0, 2.0, 3.0]), np.array([5.0, 5.0, 5.0]), keyframe_defaults)
+    merged = merge_keyframe_range(existing, baked)
+    np.testing.assert_allclose(merged["co"], [[0.0, 1.0], [1.0, 5.0], [2.0, 5.0], [3.0, 5.0], [8.0, 1.0]])
+
+def test_selected_keyframe_frames(keyframe_defaults):
+    first = build_keyframe_arrays(np.array([1.0, 2.0, 3.0]), np.zeros(3), keyframe_defaults)
+    second = build_keyframe_arrays(np.array([2.0, 6.0]), np.zeros(2), keyframe_defaults)
+    first["select_control_point"][:] = [True, False, True]
+    second["select_control_point"][:] = [False, True]
+    assert selected_keyframe_frames([first, second]) == [1, 3, 6]
+
+def test_pack_unpack_round_trip(keyframe_defaults, rng):
+    arrays = build_keyframe_arrays(np.arange(1.0, 101.0), rng.normal(size=100), keyframe_defaults)
+    arrays["select_control_point"][::3] = False
+    arrays["interpolation"][::5] = 1
+    payload = pack_keyframe_arrays(arrays)
+    unpacked = unpack_keyframe_arrays(payload, 100)
+    for prop, _size, dtype in keyframe_array_props:
+        assert unpacked[prop].dtype == dtype
+        np.testing.assert_array_equal(unpacked[prop], arrays[prop])
+    # Unpacked arrays can be edited in place, like the ones read with foreach_get
+    unpacked["co"][0, 1] = 1.0
+
+def test_pack_compresses_baked_curves(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.arange(1.0, 2401.0), np.zeros(2400), keyframe_defaults)
+    raw = sum(np.asarray(arrays[prop]).nbytes for prop, _size, _dtype in keyframe_array_props)
+    assert len(pack_keyframe_arrays(arrays)) < raw / 4
+
+def test_pack_unpack_empty_curve(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.zeros(0), np.zeros(0), keyframe_defaults)
+    unpacked = unpack_keyframe_arrays(pack_keyframe_arrays(arrays), 0)
+    assert unpacked["co"].shape == (0, 2)
+
+def test_diff_keyframe_arrays(keyframe_defaults):
+    before = build_keyframe_arrays(np.array([1.0, 2.0, 3.0]), np.array([0.0, 1.0, 2.0]), keyframe_defaults)
+    after = build_keyframe_arrays(np.array([1.0, 3.0, 4.0, 5.0]), np.array([0.0, 2.5, 0.0, 0.0]), keyframe_defaults)
+    max_delta, removed, added = diff_keyframe_arrays(before, after)
+    assert max_delta == 0.5
+    assert removed == 1
+    assert added == 2
+    assert diff_keyframe_arrays(before, before) == (0.0, 0, 0)
@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from vrm_spacing_core import (
+    build_keyframe_arrays, loopify_frame_range, loopify_keyframe_arrays, loop_blend_weights, crossfade_loop_values,
+    crossfade_loop_quaternions, find_best_loop_easing,
+)
+
+# Keys the original Loopify Physics operator left on a few curves (see fixtures/make_loopify_regression.py)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "loopify_regression.json")) as file:
+    loopify_regression = json.load(file)
+
+interpolation_values = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+
+def test_loopify_frame_range():
+    # Last frame: the first keys are deleted and the last frame's value is pasted before the start
+    assert loopify_frame_range(1, 60, 'LAST_FRAME', 4) == (60, 1, 4, 0)
+    # First frame: the last keys are deleted and the first frame's value is pasted after the end
+    assert loopify_frame_range(1, 60, 'FIRST_FRAME', 4) == (1, 57, 60, 61)
+
+def test_loopify_last_frame(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.arange(1.0, 11.0), np.arange(10.0), keyframe_defaults)
+    result = loopify_keyframe_arrays(arrays, *loopify_frame_range(1, 10, 'LAST_FRAME', 3), keyframe_defaults)
+    np.testing.assert_allclose(result["co"][:, 0], [0.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0])
+    np.testing.assert_allclose(result["co"][:, 1], [9.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0])
+
+def test_loopify_first_frame(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.arange(1.0, 11.0), np.arange(10.0), keyframe_defaults)
+    result = loopify_keyframe_arrays(arrays, *loopify_frame_range(1, 10, 'FIRST_FRAME', 3), keyframe_defaults)
+    np.testing.assert_allclose(result["co"][:, 0], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 11.0])
+    np.testing.assert_allclose(result["co"][:, 1], [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 0.0])
+
+def test_loopify_without_keys_to_copy_or_delete(keyframe_defaults):
+    arrays = build_keyframe_arrays(np.array([20.0, 30.0]), np.zeros(2), keyframe_defaults)
+    assert loopify_keyframe_arrays(arrays, *loopify_frame_range(1, 10, 'LAST_FRAME', 3), keyframe_defaults) is None
+
+def test_loopify_skips_a_paste_inside_the_deleted_range(keyframe_defaults):
+    # With no easing left after the copy frame, the pasted key would land in the deleted range
+    arrays = build_keyframe_arrays(np.arange(1.0, 4.0), np.arange(3.0), keyframe_defaults)
+    result = loopify_keyframe_arrays(arrays, 3, 0, 3, 2, keyframe_defaults)
+    assert len(result["co"]) == 0
+
+def regression_case_id(case):
+    return f"{case['frame_selection']}-start{case['start_frame']}-easing{case['frame_easing']}"
+
+@pytest.mark.parametrize("case", loopify_regression["cases"], ids=regression_case_id)
+def test_loopify_matches_the_original_operator(case, keyframe_defaults):
+    # Frames, values and interpolation match key for key. Handles aren't compared: the original operator left the
+    # handles of the keys next to the deleted ones stale, the bulk rewrite recalculates them
+    start_frame = case["start_frame"]
+    end_frame = start_frame + loopify_regression["frame_count"] - 1
+    loop_range = loopify_frame_range(start_frame, end_frame, case["frame_selection"], case["frame_easing"])
+    for curve, expected in zip(case["input"], case["expected"]):
+        keyframe_defaults["interpolation"] = np.array([interpolation_values[mode] for mode in curve["interpolation"]])
+        arrays = build_keyframe_arrays(np.array(curve["frames"]), np.array(curve["values"]), keyframe_defaults)
+        keyframe_defaults["interpolation"] = interpolation_values['BEZIER']
+        looped = loopify_keyframe_arrays(arrays, *loop_range, keyframe_defaults)
+        if looped is None:
+            looped = arrays
+        np.testing.assert_array_equal(looped["co"][:, 0], expected["frames"])
+        np.testing.assert_allclose(looped["co"][:, 1], expected["values"], atol=1e-6)
+        np.testing.assert_array_equal(looped["interpolation"], [interpolation_values[mode] for mode in expected["interpolation"]])
+
+def test_loop_blend_weights_ease_toward_the_seam():
+    weights = loop_blend_weights(np.arange(1, 5), 1, 4, 'LAST_FRAME')
+    # The frame next to the pasted loop key is blended the most
+    assert np.all(np.diff(weights) < 0.0)
+    assert 0.0 < weights[-1] < weights[0] < 1.0
+    np.testing.assert_allclose(loop_blend_weights(np.arange(7, 11), 7, 10, 'FIRST_FRAME'), weights[::-1])
+
+def test_crossfade_loop_values():
+    values = np.zeros((2, 3))
+    blended = crossfade_loop_values(values, np.array([0.0, 0.5, 1.0]), np.array([1.0, -2.0]))
+    np.testing.assert_allclose(blended, [[0.0, 0.5, 1.0], [0.0, -1.0, -2.0]])
+
+def test_crossfade_loop_quaternions_flips_the_target_onto_the_seam_hemisphere():
+    identity = np.tile([1.0, 0.0, 0.0, 0.0], (1, 3, 1))
+    target = np.array([[-1.0, 0.0, 0.0, 0.0]])
+    blended, flipped = crossfade_loop_quaternions(identity, np.array([1.0, 0.5, 0.0]), target, 'LAST_FRAME')
+    np.testing.assert_allclose(np.abs(blended[..., 0]), 1.0)
+    np.testing.assert_allclose(flipped, [[1.0, 0.0, 0.0, 0.0]])
+
+def test_find_best_loop_easing():
+    # The pose 3 frames after the start is the closest to the loop pose
+    values = np.array([[5.0, 4.0, 2.0, 0.1, 3.0, 4.0]])
+    assert find_best_loop_easing(values, np.array([0.0]), 'LAST_FRAME', 5) == 3
+    assert find_best_loop_easing(values[:, ::-1], np.array([0.0]), 'FIRST_FRAME', 5) == 3
@@ -0,0 +1,39 @@
+import re
+
+import numpy as np
+import pytest
+
+from vrm_spacing_core import split_physics_bone_patterns, physics_bone_regex, classify_physics_bones
+
+
+default_patterns = "Hair, Bust, Skirt, Sleeve, Ear(?![a-z]), Tail"
+names = ["J_Sec_Hair1_01", "J_Sec_L_Bust1", "J_Bip_C_Head", "Ear_L", "Earring_Static", "Hair_12", "Hair_1234"]
+
+def test_split_keeps_commas_inside_quantifiers_groups_and_classes():
+    assert split_physics_bone_patterns(r"Hair_\d{1,3}$, (Skirt|Tail), [,_]Bust, Ear\,L,,") == [
+        r"Hair_\d{1,3}$", "(Skirt|Tail)", "[,_]Bust", r"Ear\,L"]
+    assert split_physics_bone_patterns(default_patterns) == ["Hair", "Bust", "Skirt", "Sleeve", "Ear(?![a-z])", "Tail"]
+    assert physics_bone_regex(" , ") is None
+
+def test_spring_joints_take_precedence_over_patterns():
+    source, mask = classify_physics_bones(names, {"J_Bip_C_Head", "Missing"}, physics_bone_regex(default_patterns))
+    assert source == 'SPRING_BONES'
+    np.testing.assert_array_equal(mask, [name == "J_Bip_C_Head" for name in names])
+
+def test_patterns_are_the_fallback_without_spring_joints():
+    source, mask = classify_physics_bones(names, set(), physics_bone_regex(default_patterns))
+    assert source == 'PATTERNS'
+    assert [name for name, physics in zip(names, mask) if physics] == [
+        "J_Sec_Hair1_01", "J_Sec_L_Bust1", "Ear_L", "Hair_12", "Hair_1234"]
+
+def test_quantifier_pattern_matches_whole():
+    _, mask = classify_physics_bones(names, set(), physics_bone_regex(r"^Hair_\d{1,3}$"))
+    assert [name for name, physics in zip(names, mask) if physics] == ["Hair_12"]
+
+def test_no_patterns_match_nothing():
+    source, mask = classify_physics_bones(names, set(), None)
+    assert source == 'PATTERNS' and not mask.any()
+
+def test_invalid_pattern_raises():
+    with pytest.raises(re.error):
+        physics_bone_regex("Hair(")
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from vrm_spacing_core import (
+    euler_to_quaternion, quaternion_to_euler, quaternion_multiply, quaternion_to_matrix, matrix_to_quaternion,
+    matrix_to_euler, pose_deltas, apply_rotation_delta, axis_angle_to_quaternion, quaternion_to_axis_angle,
+)
+
+euler_orders = ['XYZ', 'XZY', 'YXZ', 'YZX', 'ZXY', 'ZYX']
+
+
+def random_quaternions(rng, count):
+    quaternions = rng.normal(size=(count, 4))
+    quaternions /= np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return quaternions * np.sign(quaternions[:, :1])
+
+def assert_same_rotation(a, b, atol=1e-9):
+    # q and -q are the same rotation
+    np.testing.assert_allclose(np.abs(np.sum(a * b, axis=-1)), 1.0, atol=atol)
+
+@pytest.mark.parametrize("order", euler_orders)
+def test_euler_quaternion_round_trip(order, rng):
+    euler = rng.uniform(-1.2, 1.2, size=(50, 3))
+    np.testing.assert_allclose(quaternion_to_euler(euler_to_quaternion(euler, order), order), euler, atol=1e-9)
+
+@pytest.mark.parametrize("order", euler_orders)
+def test_matrix_to_euler_matches_the_quaternion(order, rng):
+    quaternions = random_quaternions(rng, 50)
+    euler = matrix_to_euler(quaternion_to_matrix(quaternions), order)
+    assert_same_rotation(euler_to_quaternion(euler, order), quaternions)
+
+def test_matrix_quaternion_round_trip(rng):
+    quaternions = random_quaternions(rng, 100)
+    assert_same_rotation(matrix_to_quaternion(quaternion_to_matrix(quaternions)), quaternions)
+
+def test_axis_angle_round_trip(rng):
+    quaternions = random_quaternions(rng, 50)
+    assert_same_rotation(axis_angle_to_quaternion(quaternion_to_axis_angle(quaternions)), quaternions)
+
+def test_pose_deltas_flags_only_changed_bones(rng):
+    rotation = random_quaternions(rng, 4)
+    location = rng.normal(size=(4, 3))
+    scale = np.ones((4, 3))
+    moved_location = location.copy()
+    moved_location[1, 0] += 0.1
+    turned = rotation.copy()
+    turned[2] = quaternion_multiply(euler_to_quaternion(np.array([0.0, 0.0, 0.2])), rotation[2])
+    delta_location, delta_rotation, delta_scale, changed = pose_deltas(moved_location, turned, scale, location, rotation, scale)
+    np.testing.assert_array_equal(changed, [False, True, True, False])
+    np.testing.assert_allclose(delta_location[1], [0.1, 0.0, 0.0])
+    np.testing.assert_allclose(delta_scale, 0.0)
+    # Like mathutils' current.rotation_difference(original), which the tracked changes have always used
+    assert_same_rotation(quaternion_multiply(turned, delta_rotation), rotation)
+    assert_same_rotation(apply_rotation_delta(delta_rotation, rotation, 'QUATERNION'), quaternion_multiply(delta_rotation, rotation))
+
+def test_pose_deltas_ignores_changes_under_the_threshold(rng):
+    rotation = random_quaternions(rng, 2)
+    location = np.zeros((2, 3))
+    _location, _rotation, _scale, changed = pose_deltas(location + 1e-6, rotation, np.ones((2, 3)), location, rotation, np.ones((2, 3)))
+    assert not changed.any()
+
+@pytest.mark.parametrize("order", euler_orders)
+def test_apply_rotation_delta_to_euler(order, rng):
+    euler = rng.uniform(-1.0, 1.0, size=(20, 3))
+    delta = random_quaternions(rng, 1)[0]
+    result = apply_rotation_delta(delta, euler, order)
+    assert result.shape == euler.shape
+    assert_same_rotation(euler_to_quaternion(result, order), quaternion_multiply(delta, euler_to_quaternion(euler, order)))
+
+def test_apply_identity_delta_keeps_the_rotation(rng):
+    euler = rng.uniform(-1.0, 1.0, size=(10, 3))
+    np.testing.assert_allclose(apply_rotation_delta(np.array([1.0, 0.0, 0.0, 0.0]), euler, 'XYZ'), euler, atol=1e-9)
+    assert math.isclose(float(np.linalg.norm(euler_to_quaternion(euler)[0])), 1.0)
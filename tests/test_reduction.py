@@ -0,0 +1,53 @@
+import numpy as np
+
+from vrm_spacing_core import build_keyframe_arrays, fit_reduced_keys, reduced_keyframe_arrays
+
+
+def evaluate_hermite(times, values, slopes, at):
+    """Evaluates the Bezier (cubic Hermite) segments through the kept keys on the given times."""
+    segment = np.clip(np.searchsorted(times, at, side='right') - 1, 0, len(times) - 2)
+    length = times[segment + 1] - times[segment]
+    u = (at - times[segment]) / length
+    return ((2 * u ** 3 - 3 * u ** 2 + 1) * values[segment] + (u ** 3 - 2 * u ** 2 + u) * length * slopes[segment]
+            + (-2 * u ** 3 + 3 * u ** 2) * values[segment + 1] + (u ** 3 - u ** 2) * length * slopes[segment + 1])
+
+def reduce_curves(curves, tolerance):
+    times = np.concatenate([curve[0] for curve in curves])
+    values = np.concatenate([curve[1] for curve in curves])
+    starts = np.cumsum([0] + [len(curve[0]) for curve in curves[:-1]])
+    return times, values, starts, fit_reduced_keys(times, values, starts, np.full(len(times), tolerance))
+
+def test_reduced_keys_stay_within_tolerance(rng):
+    frames = np.arange(1.0, 241.0)
+    curves = [(frames, 0.3 * np.sin(frames * 0.05 + phase) + 0.01 * rng.normal(size=len(frames))) for phase in range(4)]
+    tolerance = 0.02
+    times, values, starts, (kept, slopes, error) = reduce_curves(curves, tolerance)
+    assert np.all(error <= tolerance)
+    assert kept.sum() < len(times) / 2
+    for start, end in zip(starts, list(starts[1:]) + [len(times)]):
+        rows = np.arange(start, end)
+        curve_kept = rows[kept[rows]]
+        predicted = evaluate_hermite(times[curve_kept], values[curve_kept], slopes[curve_kept], times[rows])
+        assert np.max(np.abs(predicted - values[rows])) <= tolerance + 1e-9
+
+def test_reduction_keeps_the_ends_of_every_curve():
+    frames = np.arange(1.0, 11.0)
+    _times, _values, starts, (kept, _slopes, _error) = reduce_curves([(frames, np.zeros(10)), (frames, np.ones(10))], 0.01)
+    assert kept.sum() == 4
+    assert kept[starts].all() and kept[[9, 19]].all()
+
+def test_zero_tolerance_keeps_every_bend(rng):
+    frames = np.arange(1.0, 21.0)
+    values = rng.normal(size=20)
+    _times, _values, _starts, (kept, _slopes, error) = reduce_curves([(frames, values)], 0.0)
+    assert np.all(error <= 1e-9)
+
+def test_reduced_keyframe_arrays_points_the_handles_along_the_slopes(keyframe_defaults):
+    frames = np.arange(1.0, 8.0)
+    arrays = build_keyframe_arrays(frames, 2.0 * frames, keyframe_defaults)
+    kept, slopes, _error = fit_reduced_keys(frames, 2.0 * frames, np.array([0]), np.full(7, 0.001))
+    reduced = reduced_keyframe_arrays(arrays, kept, slopes, 2, 3)
+    np.testing.assert_allclose(reduced["co"], [[1.0, 2.0], [7.0, 14.0]])
+    np.testing.assert_allclose(reduced["handle_right"][0], [3.0, 6.0])
+    np.testing.assert_allclose(reduced["handle_left"][1], [5.0, 10.0])
+    np.testing.assert_array_equal(reduced["handle_left_type"], [3, 3])
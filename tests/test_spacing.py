@@ -0,0 +1,106 @@
+import math
+
+import numpy as np
+import pytest
+
+from vrm_spacing_core import (
+    add_spacing_offset, spacing_offsets_to_rotations, rotate_rotation_keys, euler_to_quaternion, quaternion_multiply,
+    axis_angle_to_quaternion, axis_rotation_quaternion, accumulate_spacing_layer, spacing_layer_undo_rotations,
+    spacing_rotation_offset, rotate_spacing_keys,
+)
+
+
+def test_add_spacing_offset_mirrors_left_and_right():
+    offsets = add_spacing_offset({}, "L", "R", 10.0, True, True, 'SIDEWAYS')
+    assert offsets == {("L", 2): pytest.approx(math.radians(10.0)), ("R", 2): pytest.approx(-math.radians(10.0))}
+    add_spacing_offset(offsets, "L", "R", 5.0, True, False, 'SIDEWAYS')
+    assert offsets[("L", 2)] == pytest.approx(math.radians(15.0))
+
+def test_add_spacing_offset_skips_missing_bones():
+    assert add_spacing_offset({}, "L", "R", 10.0, True, True, 'DEPTH', bone_names=["R"]) == {("R", 0): pytest.approx(-math.radians(10.0))}
+
+def test_z_spacing_on_xyz_euler_adds_to_z(rng):
+    euler = rng.uniform(-1.0, 1.0, size=(30, 3))
+    rotation = spacing_offsets_to_rotations({("Bone", 2): 0.3})["Bone"]
+    expected = euler.copy()
+    expected[:, 2] += 0.3
+    np.testing.assert_allclose(rotate_rotation_keys(euler, 'XYZ', rotation), expected, atol=1e-9)
+
+@pytest.mark.parametrize("rotation_mode", ['XYZ', 'ZXY', 'QUATERNION', 'AXIS_ANGLE'])
+def test_spacing_rotation_is_applied_in_the_bone_rest_space(rotation_mode, rng):
+    rotation = spacing_offsets_to_rotations({("Bone", 0): 0.2, ("Bone", 2): -0.4})["Bone"]
+    euler = rng.uniform(-1.0, 1.0, size=(10, 3))
+    quaternions = euler_to_quaternion(euler, 'XYZ')
+    if rotation_mode == 'QUATERNION':
+        keys = quaternions
+        result = rotate_rotation_keys(keys, rotation_mode, rotation)
+    elif rotation_mode == 'AXIS_ANGLE':
+        angles = 2.0 * np.arccos(quaternions[:, 0])
+        axes = quaternions[:, 1:] / np.sin(angles / 2.0)[:, None]
+        keys = np.column_stack([angles, axes])
+        result = axis_angle_to_quaternion(rotate_rotation_keys(keys, rotation_mode, rotation))
+    else:
+        keys = euler
+        quaternions = euler_to_quaternion(euler, rotation_mode)
+        result = euler_to_quaternion(rotate_rotation_keys(keys, rotation_mode, rotation), rotation_mode)
+    expected = quaternion_multiply(rotation, quaternions)
+    np.testing.assert_allclose(np.abs(np.sum(result * expected, axis=-1)), 1.0, atol=1e-9)
+
+def test_spacing_euler_results_stay_next_to_the_original_values():
+    euler = np.array([[0.0, 0.0, math.pi - 0.05]])
+    rotation = spacing_offsets_to_rotations({("Bone", 2): 0.1})["Bone"]
+    np.testing.assert_allclose(rotate_rotation_keys(euler, 'XYZ', rotation), [[0.0, 0.0, math.pi + 0.05]], atol=1e-9)
+
+def spacing_edit(offsets):
+    return spacing_offsets_to_rotations({key: math.radians(degrees) for key, degrees in offsets.items()})
+
+def test_accumulate_spacing_layer_merges_and_drops_cancelled_entries():
+    layer = accumulate_spacing_layer([], spacing_edit({("L", 2): 10.0, ("R", 2): -10.0}))
+    layer = accumulate_spacing_layer(layer, spacing_edit({("L", 1): 5.0}))
+    assert [entry["bone"] for entry in layer] == ["L", "R"]
+    layer = accumulate_spacing_layer(layer, spacing_edit({("L", 2): 20.0}), (1, 10))
+    layer = accumulate_spacing_layer(layer, spacing_edit({("R", 2): 10.0}))
+    assert layer == [{"bone": "L", "frames": [], "rotation": pytest.approx(layer[0]["rotation"])},
+                     {"bone": "L", "frames": [1, 10], "rotation": pytest.approx(axis_rotation_quaternion(2, math.radians(20.0)).tolist())}]
+
+def test_spacing_layer_undoes_rotations_about_different_axes(rng):
+    # Upper arm spaced SIDEWAYS +10, FORWARD_BACKWARD +15 and DEPTH -8 degrees, then reset
+    euler = rng.uniform(-1.0, 1.0, size=(20, 3))
+    keys, layer = euler.copy(), []
+    for axis_index, degrees in ((2, 10.0), (1, 15.0), (0, -8.0)):
+        rotations = spacing_edit({("UpperArm", axis_index): degrees})
+        keys = rotate_spacing_keys(keys, 'XYZ', rotations["UpperArm"])
+        layer = accumulate_spacing_layer(layer, rotations)
+    assert len(layer) == 1
+    for bone_name, frame_range, quaternion in spacing_layer_undo_rotations(layer):
+        assert (bone_name, frame_range) == ("UpperArm", None)
+        keys = rotate_spacing_keys(keys, 'XYZ', quaternion)
+    np.testing.assert_allclose(keys, euler, atol=1e-9)
+
+def test_spacing_layer_undoes_overlapping_frame_ranges_in_reverse_order(rng):
+    quaternions = euler_to_quaternion(rng.uniform(-1.0, 1.0, size=(20, 3)))
+    in_range = np.arange(20) < 10
+    keys, layer = quaternions.copy(), []
+    for offsets, frame_range in (({("Bone", 0): 12.0}, None), ({("Bone", 1): -7.0}, (0, 9)), ({("Bone", 2): 9.0}, None)):
+        rotations = spacing_edit(offsets)
+        rows = in_range if frame_range is not None else slice(None)
+        keys[rows] = rotate_spacing_keys(keys[rows], 'QUATERNION', rotations["Bone"])
+        layer = accumulate_spacing_layer(layer, rotations, frame_range)
+    assert len(layer) == 3
+    for _bone_name, frame_range, quaternion in spacing_layer_undo_rotations(layer):
+        rows = in_range if frame_range is not None else slice(None)
+        keys[rows] = rotate_spacing_keys(keys[rows], 'QUATERNION', quaternion)
+    np.testing.assert_allclose(keys, quaternions, atol=1e-9)
+
+@pytest.mark.parametrize("rotation_mode, axis_index", [('XYZ', 2), ('ZXY', 1), ('YZX', 0)])
+def test_rotations_about_the_last_euler_axis_are_plain_offsets(rotation_mode, axis_index, rng):
+    rotation = spacing_edit({("Bone", axis_index): -12.0})["Bone"]
+    assert spacing_rotation_offset(rotation, rotation_mode) == (axis_index, pytest.approx(math.radians(-12.0)))
+    euler = rng.uniform(-1.0, 1.0, size=(10, 3))
+    rotated = rotate_rotation_keys(euler, rotation_mode, rotation)
+    np.testing.assert_allclose(rotate_spacing_keys(euler[:, [axis_index]], rotation_mode, rotation)[:, 0], rotated[:, axis_index], atol=1e-9)
+
+def test_other_rotations_are_not_plain_offsets():
+    assert spacing_rotation_offset(spacing_edit({("Bone", 1): 10.0})["Bone"], 'XYZ') is None
+    assert spacing_rotation_offset(spacing_edit({("Bone", 2): 10.0, ("Bone", 0): 1.0})["Bone"], 'XYZ') is None
+    assert spacing_rotation_offset(spacing_edit({("Bone", 2): 10.0})["Bone"], 'QUATERNION') is None
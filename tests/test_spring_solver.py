@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from vrm_spacing_core import (
+    spring_joint_levels, split_spring_joints, subset_spring_parents, rotation_between, simulate_spring_joints,
+)
+
+frame_count = 40
+link_length = 0.1
+
+
+def translation(x, y, z):
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+def chain_arguments(joint_count=3, gravity=(0.0, 0.0, 0.0), stiffness=1.0, drag=0.4, colliders=()):
+    """One horizontal chain along +X hanging from a static driver at the origin."""
+    parents = np.arange(-1, joint_count - 1)
+    rest_local = np.stack([translation(0.0, 0.0, 1.0)] + [translation(link_length, 0.0, 0.0)] * (joint_count - 1))
+    collider_count = len(colliders)
+    return dict(
+        driver_matrices=np.tile(np.eye(4), (frame_count, 1, 1, 1)),
+        driver_index=np.zeros(joint_count, dtype=np.int64),
+        parents=parents,
+        rest_local=rest_local,
+        tail_offsets=np.tile([link_length, 0.0, 0.0], (joint_count, 1)),
+        stiffness=np.full(joint_count, stiffness),
+        drag=np.full(joint_count, drag),
+        gravity=np.tile(gravity, (joint_count, 1)),
+        hit_radius=np.full(joint_count, 0.01),
+        collider_matrices=np.tile(np.eye(4), (frame_count, collider_count, 1, 1)),
+        collider_offsets=np.array([center for center, _radius in colliders]).reshape(collider_count, 3),
+        collider_tails=np.array([center for center, _radius in colliders]).reshape(collider_count, 3),
+        collider_radius=np.array([radius for _center, radius in colliders], dtype=np.float64),
+        collider_capsule=np.zeros(collider_count, dtype=bool),
+        collider_mask=np.ones((joint_count, collider_count), dtype=bool),
+        delta_time=1.0 / 30.0,
+    )
+
+def joint_tails(world):
+    return world[..., :3, 3] + np.einsum('...ij,j->...i', world[..., :3, :3], [link_length, 0.0, 0.0])
+
+def test_spring_joint_levels():
+    levels = spring_joint_levels([-1, 0, 1, -1, 3])
+    assert [level.tolist() for level in levels] == [[0, 3], [1, 4], [2]]
+
+def test_split_spring_joints_keeps_chains_whole():
+    parents = np.array([-1, 0, 1, -1, 3, -1])
+    groups = split_spring_joints(parents, 2)
+    assert sorted(np.concatenate(groups).tolist()) == list(range(6))
+    for group in groups:
+        assert all(parents[joint] < 0 or parents[joint] in group for joint in group)
+    assert sorted(len(group) for group in groups) == [3, 3]
+
+def test_subset_spring_parents():
+    np.testing.assert_array_equal(subset_spring_parents([-1, 0, 1, -1, 3], np.array([3, 4])), [-1, 0])
+
+@pytest.mark.parametrize("to", [[0.0, 1.0, 0.0], [-1.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+def test_rotation_between(to):
+    start = np.array([[1.0, 0.0, 0.0]])
+    rotation = rotation_between(start, np.array([to]))
+    np.testing.assert_allclose(rotation[0] @ start[0], to, atol=1e-12)
+    np.testing.assert_allclose(rotation[0] @ rotation[0].T, np.eye(3), atol=1e-12)
+    assert np.linalg.det(rotation[0]) == pytest.approx(1.0)
+
+def test_chain_at_rest_stays_at_rest():
+    arguments = chain_arguments()
+    world = simulate_spring_joints(**arguments)
+    np.testing.assert_allclose(world, np.broadcast_to(world[0], world.shape), atol=1e-12)
+
+def test_gravity_bends_the_chain_and_keeps_its_lengths():
+    world = simulate_spring_joints(**chain_arguments(gravity=(0.0, 0.0, -9.8), stiffness=0.5))
+    heads = world[..., :3, 3]
+    tails = joint_tails(world)
+    np.testing.assert_allclose(np.linalg.norm(tails - heads, axis=-1), link_length, atol=1e-9)
+    # Each joint's head is its parent's tail
+    np.testing.assert_allclose(heads[:, 1:], tails[:, :-1], atol=1e-9)
+    assert tails[-1, -1, 2] < tails[0, -1, 2] - 0.01
+    rotations = world[..., :3, :3]
+    np.testing.assert_allclose(rotations @ np.swapaxes(rotations, -1, -2), np.broadcast_to(np.eye(3), rotations.shape), atol=1e-9)
+
+def test_sphere_collider_pushes_the_tails_out():
+    # The chain falls to hang straight down, its last tail ending next to the collider's center
+    center, radius = np.array([0.02, 0.0, 0.72]), 0.05
+    falling = simulate_spring_joints(**chain_arguments(gravity=(0.0, 0.0, -9.8), stiffness=0.1))
+    assert np.linalg.norm(joint_tails(falling)[-1, -1] - center) < radius
+    world = simulate_spring_joints(**chain_arguments(gravity=(0.0, 0.0, -9.8), stiffness=0.1, colliders=[(center, radius)]))
+    # Pushed tails are pulled back to the bone's length afterwards, so they can still end slightly inside
+    pushed = np.linalg.norm(joint_tails(world)[-1, -1] - center)
+    assert pushed > np.linalg.norm(joint_tails(falling)[-1, -1] - center) + 0.01
+    heads = world[..., :3, 3]
+    np.testing.assert_allclose(np.linalg.norm(joint_tails(world) - heads, axis=-1), link_length, atol=1e-9)
+
+def test_no_joints():
+    arguments = chain_arguments(joint_count=1)
+    arguments.update(parents=np.zeros(0, dtype=np.int64), driver_index=np.zeros(0, dtype=np.int64))
+    assert simulate_spring_joints(**arguments).shape == (frame_count, 0, 4, 4)
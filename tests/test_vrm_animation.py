@@ -0,0 +1,23 @@
+import numpy as np
+
+from vrm_spacing_core import linear_sample_frames
+
+constant, linear, bezier = 0, 1, 2
+
+
+def test_linear_curves_keep_their_key_frames():
+    frames = linear_sample_frames([(np.array([1.0, 10.0, 20.0]), np.array([linear] * 3))], linear)
+    np.testing.assert_array_equal(frames, [1.0, 10.0, 20.0])
+
+def test_curved_segments_are_sampled_on_every_frame():
+    frames = linear_sample_frames([(np.array([1.0, 5.0, 20.0]), np.array([bezier, linear, bezier]))], linear)
+    np.testing.assert_array_equal(frames, [1.0, 2.0, 3.0, 4.0, 5.0, 20.0])
+
+def test_any_curved_component_resamples_the_channel():
+    # Only the second curve's stepped segment is resampled; outside its keys it is extrapolated
+    curves = [(np.array([1.0, 4.0, 8.0]), np.array([linear] * 3)), (np.array([2.0, 4.5]), np.array([constant, linear]))]
+    np.testing.assert_array_equal(linear_sample_frames(curves, linear), [1.0, 2.0, 3.0, 4.0, 4.5, 8.0])
+
+def test_subframe_keys_add_the_whole_frames_between_them():
+    frames = linear_sample_frames([(np.array([0.5, 3.0, 3.5]), np.array([bezier, bezier, bezier]))], linear)
+    np.testing.assert_array_equal(frames, [0.5, 1.0, 2.0, 3.0, 3.5])
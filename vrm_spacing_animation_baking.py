@@ -9,10 +9,51 @@ bl_info = {
 }
 
 import bpy
+import argparse
+import fnmatch
+import functools
+import hashlib
+import json
 import math
-import mathutils
+import multiprocessing
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bpy_extras.io_utils import ExportHelper
+
+# The NumPy-only core lives next to this file (Blender doesn't put a -P script's directory on the path)
+addon_directory = os.path.dirname(os.path.abspath(__file__))
+if addon_directory not in sys.path:
+    sys.path.append(addon_directory)
+
+from vrm_spacing_core import (
+    keyframe_array_props, build_keyframe_arrays, match_keyframes, set_keyframe_values, offset_keyframe_values,
+    offset_keyframe_range, merge_keyframe_range, unique_key_frames,
+    euler_order_axes, blender_matrices_to_numpy, euler_to_quaternion, quaternion_to_euler,
+    decompose_matrices, matrix_to_quaternion, make_quaternions_compatible,
+    spacing_axis_indices, add_spacing_offset, accumulate_spacing_layer, spacing_layer_undo_rotations,
+    spacing_offsets_to_rotations, rotate_rotation_keys, spacing_rotation_offset, rotate_spacing_keys,
+    quaternion_to_axis_angle,
+    loopify_frame_range, loopify_keyframe_arrays, loop_blend_weights, crossfade_loop_values, crossfade_loop_quaternions,
+    find_best_loop_easing,
+    pose_deltas, apply_rotation_delta,
+    fit_reduced_keys, reduced_keyframe_arrays,
+    physics_bone_regex, classify_physics_bones,
+    split_spring_joints, subset_spring_parents, simulate_spring_joints,
+    rotation_keys_to_quaternions, conjugate_rotations, linear_sample_frames, blender_to_gltf_vectors,
+    blender_to_gltf_quaternions,
+    pack_keyframe_arrays, unpack_keyframe_arrays, diff_keyframe_arrays,
+)
 
-tracked_changes = {}
+tracked_changes = None  # PoseTrackingState of the armature being tracked
 is_tracking = False  # Global flag to determine if we're recording
 
 # List of bone pairs for dropdown menu
@@ -32,18 +73,217 @@ bone_pairs = [
     ("HEAD", "J_Bip_C_Head", None, "Head", False)
 ]
 
+spacing_axis_items = [
+    ('SIDEWAYS', "Space Sideways (Z-Axis)", "Rotates about Z. On XYZ Euler bones this only offsets the existing Z keys"),
+    ('FORWARD_BACKWARD', "Space Forward/Backward (Y-Axis)", "Rotates about Y. On XYZ Euler bones this keys X, Y and Z on every frame one of them is keyed, adding the missing rotation curves"),
+    ('DEPTH', "Space Depth (X-Axis)", "Rotates about X. On XYZ Euler bones this keys X, Y and Z on every frame one of them is keyed, adding the missing rotation curves")
+]
+
 # Add a toggle property for choosing spacing axis
 bpy.types.Scene.spacing_axis = bpy.props.EnumProperty(
     name="Spacing Axis",
     description="Choose which axis to apply the spacing on",
-    items=[
-        ('SIDEWAYS', "Space Sideways (Z-Axis)", ""),
-        ('FORWARD_BACKWARD', "Space Forward/Backward (Y-Axis)", ""),
-        ('DEPTH', "Space Depth (X-Axis)", "")
-    ],
+    items=spacing_axis_items,
     default='SIDEWAYS'
 )
 
+# ----------------------------- Profiling -----------------------------
+
+profiling_enabled = False  # Mirrors the add-on preference, so unprofiled calls only pay for one check
+profile_stack = []  # Records of the profiled calls in progress, outermost first
+profile_totals = {}  # Profiled name -> totals over every call since the last clear
+profile_history = []  # Records of the most recent operator runs, newest last
+profile_history_limit = 20
+
+class ProfileRecord:
+    """Wall time and work done by one profiled call, including everything it calls."""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.frame_sets = 0
+        self.keys_read = 0
+        self.keys_written = 0
+        self.curves = set()  # as_pointer() of the F-Curves read or written
+        self.helpers = {}  # Profiled helper name -> [calls, seconds] of the nested calls
+        self.details = {}
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "seconds": round(self.seconds, 6),
+            "frame_sets": self.frame_sets,
+            "keys_read": self.keys_read,
+            "keys_written": self.keys_written,
+            "curves_touched": len(self.curves),
+            "helpers": {name: {"calls": calls, "seconds": round(seconds, 6)} for name, (calls, seconds) in self.helpers.items()},
+            **self.details,
+        }
+
+def count_profile(frame_sets=0, keys_read=0, keys_written=0, fcurve=None):
+    """Adds work to every profiled call in progress. Does nothing when nothing is being profiled."""
+    if not profile_stack:
+        return
+    pointer = fcurve.as_pointer() if fcurve is not None else None
+    for record in profile_stack:
+        record.frame_sets += frame_sets
+        record.keys_read += keys_read
+        record.keys_written += keys_written
+        if pointer is not None:
+            record.curves.add(pointer)
+
+def profile_note(**details):
+    """Attaches details (frame ranges, settings) to the outermost profiled call in progress."""
+    if profile_stack:
+        profile_stack[0].details.update(details)
+
+def set_scene_frame(scene, frame):
+    count_profile(frame_sets=1)
+    scene.frame_set(frame)
+
+def get_addon_preferences(context):
+    """Returns the add-on preferences, or None when the file isn't running as an installed add-on (e.g. headless)."""
+    addon = context.preferences.addons.get(__name__)
+    return addon.preferences if addon is not None else None
+
+def write_profile_log(record):
+    preferences = get_addon_preferences(bpy.context)
+    if preferences is None or not preferences.profile_log_path:
+        return
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "blender": bpy.app.version_string,
+        "file": os.path.basename(bpy.data.filepath),
+        **record.as_dict(),
+    }
+    try:
+        with open(bpy.path.abspath(preferences.profile_log_path), "a", encoding="utf-8") as log:
+            log.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write the profile log: {e}")
+
+def finish_profile_record(record, is_operator):
+    totals = profile_totals.setdefault(record.name, {"calls": 0, "seconds": 0.0, "frame_sets": 0, "keys_read": 0, "keys_written": 0, "curves_touched": 0})
+    totals["calls"] += 1
+    totals["seconds"] += record.seconds
+    totals["frame_sets"] += record.frame_sets
+    totals["keys_read"] += record.keys_read
+    totals["keys_written"] += record.keys_written
+    totals["curves_touched"] += len(record.curves)
+
+    if profile_stack:
+        # Nested calls are summarized on the outermost record
+        helper = profile_stack[0].helpers.setdefault(record.name, [0, 0.0])
+        helper[0] += 1
+        helper[1] += record.seconds
+    elif is_operator:
+        profile_history.append(record)
+        del profile_history[:-profile_history_limit]
+        write_profile_log(record)
+
+def run_profiled(name, function, args, kwargs, is_operator=False, context=None):
+    record = ProfileRecord(name)
+    if context is not None:
+        armature = context.object
+        if armature is not None and armature.type == 'ARMATURE':
+            action = armature.animation_data.action if armature.animation_data else None
+            record.details.update(armature=armature.name, bones=len(armature.pose.bones))
+            if action is not None:
+                record.details.update(action=action.name, frames=int(action.frame_range[1] - action.frame_range[0]) + 1)
+    profile_stack.append(record)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        record.seconds = time.perf_counter() - record.start
+        profile_stack.pop()
+        finish_profile_record(record, is_operator)
+
+def profiled(name):
+    """Decorator recording the wall time and work of each call of a helper function while profiling is on."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiling_enabled:
+                return function(*args, **kwargs)
+            return run_profiled(name, function, args, kwargs)
+        return wrapper
+    return decorator
+
+def profiled_execute(execute):
+    """Decorator for Operator.execute: profiles the run and notes the rig and clip size it ran on."""
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        if not profiling_enabled:
+            return execute(self, context)
+        return run_profiled(self.bl_idname, execute, (self, context), {}, is_operator=True, context=context)
+    return wrapper
+
+def clear_profile_results():
+    profile_totals.clear()
+    profile_history.clear()
+
+def update_profiling_enabled(self, context):
+    global profiling_enabled
+    profiling_enabled = self.enable_profiling
+    if not profiling_enabled:
+        profile_stack.clear()
+
+class VRMSpacingPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+
+    enable_profiling: bpy.props.BoolProperty(
+        name="Profile Operators",
+        description="Record the time, frame changes, keyframes read and written and curves touched by each operator run and its main helpers, and show them in the panel",
+        default=False,
+        update=update_profiling_enabled
+    )
+    profile_log_path: bpy.props.StringProperty(
+        name="Profile Log",
+        description="JSONL file every profiled operator run is appended to, with the rig and clip size. Leave empty to only show the results in the panel",
+        default="",
+        subtype='FILE_PATH'
+    )
+    snapshot_memory_limit: bpy.props.IntProperty(
+        name="Snapshot Memory (MB)",
+        description="Memory the compressed keyframe snapshots used by Revert Last VRM Edit may take. The least recently used snapshots are dropped past it",
+        default=256,
+        min=1,
+        soft_max=4096
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "enable_profiling")
+        row = layout.row()
+        row.enabled = self.enable_profiling
+        row.prop(self, "profile_log_path")
+        layout.prop(self, "snapshot_memory_limit")
+
+class ClearProfileResultsOperator(bpy.types.Operator):
+    bl_idname = "object.clear_profile_results"
+    bl_label = "Clear Profile"
+    bl_description = "Forgets the profiled operator runs and totals"
+
+    def execute(self, context):
+        clear_profile_results()
+        return {'FINISHED'}
+
+def find_action_slot(action, datablock):
+    """Returns the slot of a layered action that animates the datablock."""
+    anim_data = datablock.animation_data
+    if anim_data is not None and anim_data.action == action and anim_data.action_slot:
+        return anim_data.action_slot
+    # Actions that aren't assigned (NLA strips, library clips) are matched by slot identifier
+    for slot in action.slots:
+        if slot.identifier == "OB" + datablock.name:
+            return slot
+    for slot in action.slots:
+        if slot.target_id_type == 'OBJECT':
+            return slot
+    return None
+
+@profiled("get_action_curves")
 def get_action_curves(action, datablock):
     if hasattr(action, 'fcurves'):
         return action.fcurves
@@ -51,14 +291,782 @@ def get_action_curves(action, datablock):
         layer = action.layers[0]
         if layer.strips:
             strip = layer.strips[0]
-            slot = datablock.animation_data.action_slot
+            slot = find_action_slot(action, datablock)
+            if slot is None:
+                return None
             channelbag = strip.channelbag(slot, ensure=False)
             if channelbag:
                 return channelbag.fcurves
     return None
 
+# ----------------------------- F-Curve Index -----------------------------
+
+# Matches 'pose.bones["Bone"].property' data paths (bone names are escaped with backslashes)
+bone_data_path_pattern = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\]\.(.+)$')
+escaped_char_pattern = re.compile(r'\\(.)')
+
+# Cached FCurveIndex per (action, datablock), rebuilt when the curve count changes
+fcurve_index_cache = {}
+
+
+class FCurveIndex:
+    """Maps each bone name to its F-Curves, parsing every data_path only once."""
+
+    def __init__(self, curves_coll):
+        self.curves_coll = curves_coll
+        self.count = len(curves_coll)
+        self.bone_entries = {}  # bone name -> list of (property, array index, curve index)
+        for curve_index, fcurve in enumerate(curves_coll):
+            match = bone_data_path_pattern.match(fcurve.data_path)
+            if match is None:
+                continue
+            bone_name = escaped_char_pattern.sub(r'\1', match.group(1))
+            self.bone_entries.setdefault(bone_name, []).append((match.group(2), fcurve.array_index, curve_index))
+
+    def bones(self):
+        return self.bone_entries.keys()
+
+    def has_bone(self, bone_name):
+        return bone_name in self.bone_entries
+
+    def bone_curves(self, bone_name, prop=None):
+        """Returns the F-Curves of a bone, optionally only those of one property (e.g. 'rotation_euler')."""
+        return [self.curves_coll[curve_index]
+                for entry_prop, array_index, curve_index in self.bone_entries.get(bone_name, ())
+                if prop is None or entry_prop == prop]
+
+    def curves_for_bones(self, bone_names, prop=None):
+        fcurves = []
+        for bone_name in bone_names:
+            fcurves.extend(self.bone_curves(bone_name, prop))
+        return fcurves
+
+    def find(self, bone_name, prop, index):
+        for entry_prop, array_index, curve_index in self.bone_entries.get(bone_name, ()):
+            if entry_prop == prop and array_index == index:
+                return self.curves_coll[curve_index]
+        return None
+
+
+def get_fcurve_index(action, datablock):
+    """Returns the cached FCurveIndex of the action's curves for the datablock, or None if it has no curves."""
+    curves_coll = get_action_curves(action, datablock)
+    if curves_coll is None:
+        return None
+
+    key = (action.as_pointer(), datablock.as_pointer())
+    index = fcurve_index_cache.get(key)
+    if index is None or index.count != len(curves_coll):
+        index = FCurveIndex(curves_coll)
+        fcurve_index_cache[key] = index
+    else:
+        index.curves_coll = curves_coll
+    return index
+
+
+@bpy.app.handlers.persistent
+def clear_fcurve_index_cache(*args):
+    """Drops every cached index when undo or file loading may have reallocated the curves."""
+    fcurve_index_cache.clear()
+
+
+def get_armature_actions(armature, scope):
+    """Returns the actions to process for the armature: the active one, all of the armature's, or every action in the file."""
+    anim_data = armature.animation_data
+    actions = []
+    if anim_data is not None and anim_data.action is not None:
+        actions.append(anim_data.action)
+    if scope == 'ACTIVE':
+        return actions
+
+    if anim_data is not None:
+        for track in anim_data.nla_tracks:
+            for strip in track.strips:
+                if strip.action is not None and strip.action not in actions:
+                    actions.append(strip.action)
+
+    for action in bpy.data.actions:
+        if action in actions:
+            continue
+        index = get_fcurve_index(action, armature)
+        if index is None:
+            continue
+        if scope == 'FILE' or any(bone.name in index.bone_entries for bone in armature.pose.bones):
+            actions.append(action)
+    return actions
+
+# ----------------------------- Keyframe Arrays -----------------------------
+
+def keyframe_enum_value(prop, identifier):
+    """Returns the integer value foreach_get/foreach_set use for a keyframe enum item."""
+    return bpy.types.Keyframe.bl_rna.properties[prop].enum_items[identifier].value
+
+def new_keyframe_defaults(context):
+    """Returns the per-key values Blender gives a newly inserted keyframe, for building keys in bulk."""
+    edit = context.preferences.edit
+    return {
+        "interpolation": keyframe_enum_value("interpolation", edit.keyframe_new_interpolation_type),
+        "handle_left_type": keyframe_enum_value("handle_left_type", edit.keyframe_new_handle_type),
+        "handle_right_type": keyframe_enum_value("handle_right_type", edit.keyframe_new_handle_type),
+        "easing": keyframe_enum_value("easing", 'AUTO'),
+        "type": keyframe_enum_value("type", 'KEYFRAME'),
+        "back": 1.70158,
+        "amplitude": 0.8,
+        "period": 4.1,
+        "select_control_point": True,
+    }
+
+def read_keyframe_arrays(fcurve, props=None):
+    """Reads every key of the F-Curve into a dict of NumPy arrays, one per keyframe property (or only the given ones)."""
+    keyframe_points = fcurve.keyframe_points
+    count = len(keyframe_points)
+    arrays = {}
+    for prop, size, dtype in keyframe_array_props:
+        if props is not None and prop not in props:
+            continue
+        buffer = np.empty(count * size, dtype=dtype)
+        keyframe_points.foreach_get(prop, buffer)
+        arrays[prop] = buffer.reshape(count, size) if size > 1 else buffer
+    count_profile(keys_read=count, fcurve=fcurve)
+    return arrays
+
+def resize_keyframe_points(fcurve, count):
+    keyframe_points = fcurve.keyframe_points
+    current = len(keyframe_points)
+    if count > current:
+        keyframe_points.add(count - current)
+    elif count < current:
+        if hasattr(keyframe_points, "clear"):
+            keyframe_points.clear()
+            keyframe_points.add(count)
+        else:
+            # Older Blender versions: removing from the end doesn't shift the remaining keys
+            for _ in range(current - count):
+                keyframe_points.remove(keyframe_points[-1], fast=True)
+
+def write_keyframe_arrays(fcurve, arrays):
+    """Replaces all keys of the F-Curve with the given arrays (as returned by read_keyframe_arrays)."""
+    resize_keyframe_points(fcurve, len(arrays["co"]))
+    keyframe_points = fcurve.keyframe_points
+    for prop, size, dtype in keyframe_array_props:
+        if prop in arrays:
+            keyframe_points.foreach_set(prop, np.ascontiguousarray(arrays[prop], dtype=dtype).ravel())
+    fcurve.update()
+    count_profile(keys_written=len(arrays["co"]), fcurve=fcurve)
+
+def set_keyframe_positions(fcurve, arrays):
+    """Writes the key and handle positions of the arrays over the F-Curve's keys (same count) in one bulk pass, without
+    recalculating the handles."""
+    keyframe_points = fcurve.keyframe_points
+    for prop in ("co", "handle_left", "handle_right"):
+        keyframe_points.foreach_set(prop, np.ascontiguousarray(arrays[prop], dtype=np.float32).ravel())
+    count_profile(keys_written=len(arrays["co"]), fcurve=fcurve)
+
+def keyframe_values_at(fcurve, arrays, frames):
+    """Returns the curve's value on each frame: the key value where there is a key, the evaluated curve elsewhere."""
+    key_index = match_keyframes(arrays["co"][:, 0], frames)
+    values = np.zeros(len(frames))
+    has_key = key_index >= 0
+    values[has_key] = arrays["co"][key_index[has_key], 1]
+    for row in np.flatnonzero(~has_key):
+        values[row] = fcurve.evaluate(float(frames[row]))
+    return values
+
+def offset_fcurve_keys(fcurve, offset, frame_range=None):
+    """Adds offset to the value and handles of every key of the F-Curve (or only those in frame_range) in one bulk pass."""
+    count = len(fcurve.keyframe_points)
+    if count == 0:
+        return 0
+    arrays = read_keyframe_arrays(fcurve, ("co", "handle_left", "handle_right"))
+    if frame_range is None:
+        arrays = offset_keyframe_values(arrays, offset)
+    else:
+        arrays = offset_keyframe_range(arrays, offset, frame_range[0], frame_range[1] + 1)
+    write_keyframe_arrays(fcurve, arrays)
+    return count
+
+# ID property of the action holding its accumulated spacing layer (see accumulate_spacing_layer)
+spacing_layer_prop = "vrm_spacing_layer"
+
+def get_spacing_layer(action):
+    layer = action.get(spacing_layer_prop)
+    return [entry.to_dict() for entry in layer] if layer is not None else []
+
+def set_spacing_layer(action, layer):
+    if layer:
+        action[spacing_layer_prop] = layer
+    elif spacing_layer_prop in action:
+        del action[spacing_layer_prop]
+
+def rotation_channel(rotation_mode):
+    """Returns the (property, component count) of the rotation curves used in a rotation mode."""
+    if rotation_mode == 'QUATERNION':
+        return "rotation_quaternion", 4
+    if rotation_mode == 'AXIS_ANGLE':
+        return "rotation_axis_angle", 4
+    return "rotation_euler", 3
+
+def read_bone_rotation_keys(index, pose_bone, frame_range=None):
+    """Reads the rotation curves of a bone (in its rotation mode) on every frame any of them has a key on.
+
+    Returns the (fcurve, key arrays) of each component, the frames and a (frames, components) value array,
+    or None if the bone has no rotation keys (in frame_range)."""
+    prop, size = rotation_channel(pose_bone.rotation_mode)
+    key_frames = [read_keyframe_arrays(fcurve, ("co",))["co"][:, 0] for fcurve in index.bone_curves(pose_bone.name, prop) if len(fcurve.keyframe_points)]
+    if not key_frames:
+        return None
+    frames = np.unique(np.concatenate(key_frames)).astype(np.float64)
+    if frame_range is not None:
+        frames = frames[(frames >= frame_range[0]) & (frames <= frame_range[1])]
+    if not frames.size:
+        return None
+
+    # Components without keys start from the bone's current value and get keys on the same frames
+    bone_path = f'pose.bones["{bpy.utils.escape_identifier(pose_bone.name)}"]'
+    channels, values = read_channel_keys(index.curves_coll, f"{bone_path}.{prop}", size, pose_bone.name, frames, tuple(getattr(pose_bone, prop)))
+    return channels, frames, values
+
+def read_spacing_rotation_keys(index, pose_bone, quaternion, frame_range=None):
+    """Reads the rotation keys a spacing rotation of the bone changes, like read_bone_rotation_keys.
+
+    A rotation about the last axis of an Euler bone's order (Z on the default XYZ bones) only adds its angle to
+    that component, so only the keys of that curve are read (and the values are a single column), and nothing is
+    read if the bone doesn't key it. Any other rotation changes every component: all of them are read on every frame
+    any of them has a key on, and the components missing a key there get one."""
+    offset = spacing_rotation_offset(quaternion, pose_bone.rotation_mode)
+    if offset is None:
+        return read_bone_rotation_keys(index, pose_bone, frame_range)
+    fcurve = index.find(pose_bone.name, "rotation_euler", offset[0])
+    if fcurve is None or not len(fcurve.keyframe_points):
+        return None
+    arrays = read_keyframe_arrays(fcurve)
+    frames, values = arrays["co"][:, 0].astype(np.float64), arrays["co"][:, 1:].astype(np.float64)
+    if frame_range is not None:
+        in_range = (frames >= frame_range[0]) & (frames <= frame_range[1])
+        frames, values = frames[in_range], values[in_range]
+    if not frames.size:
+        return None
+    return [(fcurve, arrays)], frames, values
+
+def read_spacing_rotations(action, armature, rotations, frame_range=None):
+    """Reads the rotation keys of every bone the rotations (WXYZ quaternions keyed by bone name) change, on the
+    main thread.
+
+    Returns a list of (channels, frames, values, rotation mode, quaternion) per bone with keys, and the rotations of
+    those bones."""
+    index = get_fcurve_index(action, armature)
+    if index is None:
+        return [], {}
+
+    bones = []
+    applied = {}
+    for bone_name, quaternion in rotations.items():
+        pose_bone = armature.pose.bones.get(bone_name)
+        keys = read_spacing_rotation_keys(index, pose_bone, quaternion, frame_range) if pose_bone is not None else None
+        if keys is None:
+            continue
+        channels, frames, values = keys
+        bones.append((channels, frames, values, pose_bone.rotation_mode, quaternion))
+        applied[bone_name] = quaternion
+    return bones, applied
+
+def read_spacing_edit(action, armature, offsets, frame_range=None):
+    """Reads the rotation keys of every bone the offsets (radians keyed by (bone name, axis index)) rotate, like
+    read_spacing_rotations."""
+    offsets = {key: offset for key, offset in offsets.items() if offset != 0.0}
+    return read_spacing_rotations(action, armature, spacing_offsets_to_rotations(offsets), frame_range)
+
+def compute_spacing_edit(bones, defaults):
+    """Rotates the keys read by read_spacing_edit. Only touches arrays, so it can run off the main thread.
+
+    Returns the (fcurve, key arrays) pairs to write."""
+    edits = []
+    for channels, frames, values, rotation_mode, quaternion in bones:
+        rotated = rotate_spacing_keys(values, rotation_mode, quaternion)
+        for component, (fcurve, arrays) in enumerate(channels):
+            edits.append((fcurve, set_keyframe_values(arrays, frames, rotated[:, component], defaults)))
+    return edits
+
+def write_curve_edits(edits):
+    for fcurve, arrays in edits:
+        write_keyframe_arrays(fcurve, arrays)
+    return len(edits)
+
+def record_spacing_layer(action, applied, frame_range=None):
+    if applied:
+        set_spacing_layer(action, accumulate_spacing_layer(get_spacing_layer(action), applied, frame_range))
+
+def apply_spacing_rotations(action, armature, rotations, frame_range=None, record=True):
+    """Rotates every affected bone's rotation keys by its rotation, in the bone's own rotation mode.
+
+    All components of a bone's rotation are read, rotated with one batched quaternion multiply and written back
+    once, only on frame_range if given; rotations that only add to one Euler component just offset its keys. The
+    applied rotations are added to the action's spacing layer unless record is False. Returns the number of curves
+    edited."""
+    bones, applied = read_spacing_rotations(action, armature, rotations, frame_range)
+    edited = write_curve_edits(compute_spacing_edit(bones, new_keyframe_defaults(bpy.context)))
+    if record:
+        record_spacing_layer(action, applied, frame_range)
+    return edited
+
+def apply_spacing_offsets(action, armature, offsets, frame_range=None, record=True):
+    """Rotates every affected bone's rotation keys about its spacing axes (see apply_spacing_rotations).
+
+    Returns the number of curves edited."""
+    offsets = {key: offset for key, offset in offsets.items() if offset != 0.0}
+    return apply_spacing_rotations(action, armature, spacing_offsets_to_rotations(offsets), frame_range, record)
+
+def reset_spacing_layer(action, armature):
+    """Removes the accumulated spacing of the action by applying the inverse of every layer entry, last edit first.
+
+    Returns the number of curves edited."""
+    edited = 0
+    for bone_name, frame_range, quaternion in spacing_layer_undo_rotations(get_spacing_layer(action)):
+        edited += apply_spacing_rotations(action, armature, {bone_name: quaternion}, frame_range, record=False)
+    set_spacing_layer(action, [])
+    return edited
+
+def get_spacing_frame_range(scene):
+    return (scene.spacing_frame_start, scene.spacing_frame_end) if scene.spacing_use_frame_range else None
+
 # Updated bone pair spacing function
-def adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis):
+def adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis, mode='KEYFRAMES', frame_range=None):
+    if not affect_left and not affect_right:
+        return {'CANCELLED'}
+
+    if mode == 'FRAME_STEP':
+        return adjust_bone_pair_spacing_per_frame(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis)
+
+    anim_data = armature.animation_data
+    if anim_data is None or anim_data.action is None:
+        return {'FINISHED'}
+
+    offsets = add_spacing_offset({}, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis, armature.pose.bones)
+    if mode == 'NLA_ADD':
+        # Key the offsets on the additive layer, whatever keys the base action has
+        apply_spacing_additive(bpy.context, armature, offsets)
+        return {'FINISHED'}
+
+    # Edit the keys directly, without evaluating the scene on every frame
+    apply_spacing_offsets(anim_data.action, armature, offsets, frame_range)
+
+    return {'FINISHED'}
+
+# ----------------------------- Keyframe Snapshots -----------------------------
+# The heavy operators don't push a global undo step (a full copy of the file on big scenes). Instead they store the
+# compressed keys of the curves they are about to edit here, and Revert Last VRM Edit writes them back.
+
+default_snapshot_memory_limit = 256  # MB, when the add-on preferences aren't available (e.g. headless)
+
+# Stored snapshots, oldest first
+keyframe_snapshots = []
+snapshot_use_counter = 0
+
+
+class KeyframeSnapshot:
+    """Compressed keys of the curves an operator run edits, per (action, armature) target.
+
+    Each target keeps the action and armature names, the bones whose curves were saved (None for every bone),
+    the (data path, array index, group name, key count, packed arrays) of each curve, the action's spacing layer,
+    and whether the operator is about to create the armature's additive spacing layer."""
+
+    def __init__(self, name):
+        self.name = name
+        self.created = time.time()
+        self.targets = []
+        self.nbytes = 0
+        self.last_used = 0
+
+    def add_target(self, action, armature, bone_names=None, creates_spacing_layer=False):
+        index = get_fcurve_index(action, armature)
+        curves = []
+        if index is not None:
+            for bone_name in (index.bones() if bone_names is None else bone_names):
+                for fcurve in index.bone_curves(bone_name):
+                    payload = pack_keyframe_arrays(read_keyframe_arrays(fcurve))
+                    group_name = fcurve.group.name if fcurve.group is not None else bone_name
+                    curves.append((fcurve.data_path, fcurve.array_index, group_name, len(fcurve.keyframe_points), payload))
+                    self.nbytes += len(payload)
+        self.targets.append({
+            "action": action.name,
+            "armature": armature.name,
+            "bones": None if bone_names is None else list(bone_names),
+            "curves": curves,
+            "spacing_layer": get_spacing_layer(action),
+            "creates_spacing_layer": creates_spacing_layer,
+        })
+
+    def curve_count(self):
+        return sum(len(target["curves"]) for target in self.targets)
+
+
+def get_snapshot_memory_limit(context):
+    preferences = get_addon_preferences(context)
+    limit = preferences.snapshot_memory_limit if preferences is not None else default_snapshot_memory_limit
+    return limit * 1024 * 1024
+
+def touch_snapshot(snapshot):
+    global snapshot_use_counter
+    snapshot_use_counter += 1
+    snapshot.last_used = snapshot_use_counter
+
+def store_keyframe_snapshot(context, snapshot):
+    """Adds the snapshot to the store, then evicts the least recently used snapshots until the store fits in the
+    memory limit. Returns False if the snapshot alone is over the limit (it isn't kept)."""
+    touch_snapshot(snapshot)
+    keyframe_snapshots.append(snapshot)
+    limit = get_snapshot_memory_limit(context)
+    while keyframe_snapshots and sum(stored.nbytes for stored in keyframe_snapshots) > limit:
+        keyframe_snapshots.remove(min(keyframe_snapshots, key=lambda stored: stored.last_used))
+    return snapshot in keyframe_snapshots
+
+def snapshot_bone_curves(context, name, targets, creates_spacing_layer=False):
+    """Snapshots the curves of the given bones for each (action, armature, bone names or None) target and stores it.
+
+    Returns the snapshot, or None if it didn't fit in the memory limit."""
+    snapshot = KeyframeSnapshot(name)
+    for action, armature, bone_names in targets:
+        if action is not None:
+            snapshot.add_target(action, armature, bone_names, creates_spacing_layer)
+    return snapshot if store_keyframe_snapshot(context, snapshot) else None
+
+def discard_keyframe_snapshot(snapshot):
+    """Forgets a snapshot whose edit was rolled back."""
+    if snapshot in keyframe_snapshots:
+        keyframe_snapshots.remove(snapshot)
+
+def snapshot_targets(snapshot):
+    """Yields each target of the snapshot with its action, armature and current curve index (None if missing)."""
+    for target in snapshot.targets:
+        action = bpy.data.actions.get(target["action"])
+        armature = bpy.data.objects.get(target["armature"])
+        if action is None or armature is None:
+            yield target, None, None, None
+            continue
+        yield target, action, armature, get_fcurve_index(action, armature)
+
+def restore_keyframe_snapshot(snapshot):
+    """Writes the snapshot's keys back, recreating the curves removed since and removing the curves added to the
+    snapshotted bones. Returns the number of curves restored and the number of targets whose action or armature
+    no longer exists."""
+    restored = missing = 0
+    for target, action, armature, index in snapshot_targets(snapshot):
+        if action is None:
+            missing += 1
+            continue
+        saved = {(data_path, array_index) for data_path, array_index, _group, _count, _payload in target["curves"]}
+        if index is not None:
+            bones = index.bones() if target["bones"] is None else target["bones"]
+            for fcurve in index.curves_for_bones(list(bones)):
+                if (fcurve.data_path, fcurve.array_index) not in saved:
+                    index.curves_coll.remove(fcurve)
+        for data_path, array_index, group_name, count, payload in target["curves"]:
+            fcurve = ensure_datablock_curve(action, armature, data_path, array_index, group_name)
+            write_keyframe_arrays(fcurve, unpack_keyframe_arrays(payload, count))
+            restored += 1
+
+        set_spacing_layer(action, target["spacing_layer"])
+        if target["creates_spacing_layer"] and get_spacing_strip(armature) is not None:
+            remove_spacing_strip(armature)
+    return restored, missing
+
+def compare_keyframe_snapshot(snapshot):
+    """Returns how the current curves differ from the snapshot: curves changed, removed and added, keys removed and
+    added, and the largest value change of the keys still on the same frame."""
+    stats = {"changed": 0, "removed_curves": 0, "added_curves": 0, "removed_keys": 0, "added_keys": 0, "max_delta": 0.0}
+    for target, action, armature, index in snapshot_targets(snapshot):
+        if action is None:
+            stats["removed_curves"] += len(target["curves"])
+            continue
+        saved = set()
+        for data_path, array_index, _group, count, payload in target["curves"]:
+            saved.add((data_path, array_index))
+            fcurve = index.curves_coll.find(data_path, index=array_index) if index is not None else None
+            if fcurve is None:
+                stats["removed_curves"] += 1
+                stats["removed_keys"] += count
+                continue
+            max_delta, removed, added = diff_keyframe_arrays(unpack_keyframe_arrays(payload, count), read_keyframe_arrays(fcurve))
+            if max_delta > 0.0 or removed or added:
+                stats["changed"] += 1
+            stats["max_delta"] = max(stats["max_delta"], max_delta)
+            stats["removed_keys"] += removed
+            stats["added_keys"] += added
+        if index is not None:
+            bones = index.bones() if target["bones"] is None else target["bones"]
+            for fcurve in index.curves_for_bones(list(bones)):
+                if (fcurve.data_path, fcurve.array_index) not in saved:
+                    stats["added_curves"] += 1
+                    stats["added_keys"] += len(fcurve.keyframe_points)
+    return stats
+
+@bpy.app.handlers.persistent
+def clear_keyframe_snapshots(*args):
+    """Drops the snapshots of the previous file when another one is loaded."""
+    keyframe_snapshots.clear()
+
+
+class RevertVRMEditOperator(bpy.types.Operator):
+    bl_idname = "object.revert_vrm_edit"
+    bl_label = "Revert Last VRM Edit"
+    bl_description = "Restores the keys the last spacing, bake, loopify, reduction or delete edited, from the add-on's keyframe snapshots"
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        if not keyframe_snapshots:
+            self.report({'WARNING'}, "No VRM edit snapshot to revert.")
+            return {'CANCELLED'}
+
+        snapshot = keyframe_snapshots.pop()
+        restored, missing = restore_keyframe_snapshot(snapshot)
+        set_scene_frame(context.scene, context.scene.frame_current)
+        if missing:
+            self.report({'WARNING'}, f"Reverted {snapshot.name} on {restored} curves, {missing} actions or armatures no longer exist.")
+        else:
+            self.report({'INFO'}, f"Reverted {snapshot.name} on {restored} curves.")
+        return {'FINISHED'}
+
+
+class CompareVRMSnapshotOperator(bpy.types.Operator):
+    bl_idname = "object.compare_vrm_snapshot"
+    bl_label = "Compare to Snapshot"
+    bl_description = "Reports how the current keys differ from the last VRM edit snapshot, without changing anything"
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        if not keyframe_snapshots:
+            self.report({'WARNING'}, "No VRM edit snapshot to compare to.")
+            return {'CANCELLED'}
+
+        snapshot = keyframe_snapshots[-1]
+        touch_snapshot(snapshot)
+        stats = compare_keyframe_snapshot(snapshot)
+        self.report({'INFO'}, f"Since {snapshot.name}: {stats['changed']} of {snapshot.curve_count()} curves changed, "
+                              f"{stats['added_curves']} added, {stats['removed_curves']} removed, "
+                              f"{stats['added_keys']} keys added, {stats['removed_keys']} removed, max value change {stats['max_delta']:.4f}.")
+        return {'FINISHED'}
+
+# ----------------------------- Additive Spacing Layer -----------------------------
+
+# NLA track holding the additive spacing action of an armature
+spacing_track_name = "VRM Spacing"
+
+def get_spacing_strip(armature):
+    """Returns the NLA strip of the armature's additive spacing layer, or None."""
+    anim_data = armature.animation_data
+    if anim_data is None:
+        return None
+    track = anim_data.nla_tracks.get(spacing_track_name)
+    if track is None or not track.strips or track.strips[0].action is None:
+        return None
+    return track.strips[0]
+
+def ensure_action_channelbag(action, datablock):
+    """Returns the channelbag of the datablock's slot on a layered action, creating the slot, layer and keyframe
+    strip if needed. Works on actions that aren't assigned to the datablock, like the ones on NLA strips."""
+    slot = find_action_slot(action, datablock)
+    if slot is None:
+        slot = action.slots.new('OBJECT', datablock.name)
+    layer = action.layers[0] if action.layers else action.layers.new("Layer")
+    strip = layer.strips[0] if layer.strips else layer.strips.new(type='KEYFRAME')
+    return strip.channelbag(slot, ensure=True)
+
+def ensure_datablock_curve(action, datablock, data_path, index, group_name):
+    """Returns the F-Curve of a channel of the action, creating it (and the layered action's slot) if needed."""
+    anim_data = datablock.animation_data
+    if hasattr(action, "slots") and (anim_data is None or anim_data.action != action):
+        # fcurve_ensure_for_datablock only works on the datablock's assigned action
+        return ensure_action_curve(ensure_action_channelbag(action, datablock).fcurves, data_path, index, group_name)
+    if hasattr(action, "fcurve_ensure_for_datablock"):
+        try:
+            return action.fcurve_ensure_for_datablock(datablock, data_path, index=index, group_name=group_name)
+        except TypeError:
+            # Blender 4.4/4.5 have no group_name argument
+            return action.fcurve_ensure_for_datablock(datablock, data_path, index=index)
+    return ensure_action_curve(action.fcurves, data_path, index, group_name)
+
+def apply_spacing_additive(context, armature, offsets):
+    """Adds the offsets to the armature's additive spacing action, one constant key per channel.
+
+    The base action is left untouched: the spacing action sits on an NLA track in Combine mode and the base
+    action is combined on top of it. Euler bones get their offsets added to the rotation_euler channels,
+    quaternion bones get the spacing rotation multiplied onto their rotation_quaternion channels.
+    Returns the number of channels edited."""
+    anim_data = armature.animation_data
+    base_action = anim_data.action
+    strip = get_spacing_strip(armature)
+    action = strip.action if strip is not None else bpy.data.actions.new(f"{base_action.name}_Spacing")
+
+    start, end = base_action.frame_range
+    defaults = new_keyframe_defaults(context)
+    defaults["interpolation"] = keyframe_enum_value("interpolation", 'CONSTANT')
+
+    def layer_curve(bone_name, prop, index, default):
+        data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"].{prop}'
+        fcurve = ensure_datablock_curve(action, armature, data_path, index, bone_name)
+        value = fcurve.keyframe_points[0].co[1] if len(fcurve.keyframe_points) else default
+        return fcurve, value
+
+    def write_layer_key(fcurve, value):
+        write_keyframe_arrays(fcurve, build_keyframe_arrays(np.array([start]), np.array([value]), defaults))
+
+    edited = 0
+    offsets = {key: offset for key, offset in offsets.items() if offset != 0.0}
+    for bone_name, quaternion in spacing_offsets_to_rotations(offsets).items():
+        pose_bone = armature.pose.bones.get(bone_name)
+        if pose_bone is not None and pose_bone.rotation_mode == 'QUATERNION':
+            curves = [layer_curve(bone_name, "rotation_quaternion", index, 1.0 if index == 0 else 0.0) for index in range(4)]
+            rotation = rotate_rotation_keys(np.array([value for _fcurve, value in curves]), 'QUATERNION', quaternion)
+            for (fcurve, _value), value in zip(curves, rotation):
+                write_layer_key(fcurve, value)
+            edited += 4
+            continue
+        for (offset_bone, axis_index), offset in offsets.items():
+            if offset_bone == bone_name:
+                fcurve, value = layer_curve(bone_name, "rotation_euler", axis_index, 0.0)
+                write_layer_key(fcurve, value + offset)
+                edited += 1
+
+    if strip is None:
+        if hasattr(action, "use_frame_range"):
+            # The strip spans the whole clip even though the action only has one key per channel
+            action.use_frame_range = True
+            action.frame_start = start
+            action.frame_end = max(end, start + 1)
+        track = anim_data.nla_tracks.new()
+        track.name = spacing_track_name
+        strip = track.strips.new(spacing_track_name, int(start), action)
+        strip.extrapolation = 'HOLD'
+        if hasattr(strip, "action_slot"):
+            strip.action_slot = find_action_slot(action, armature)
+    # Combine adds Euler values like Add, but multiplies quaternions
+    strip.blend_type = 'COMBINE'
+    # The active action is evaluated after the NLA, so it has to combine with the layer instead of replacing it
+    anim_data.action_blend_type = 'COMBINE'
+    return edited
+
+def read_spacing_layer_rotations(action, armature):
+    """Returns the Euler offsets (radians keyed by (bone name, axis index)) and the quaternions (keyed by bone
+    name) stored in an additive spacing action."""
+    offsets, quaternions = {}, {}
+    index = get_fcurve_index(action, armature)
+    if index is None:
+        return offsets, quaternions
+    for bone_name in index.bones():
+        quaternion = np.array([1.0, 0.0, 0.0, 0.0])
+        for prop, array_index, curve_index in index.bone_entries[bone_name]:
+            fcurve = index.curves_coll[curve_index]
+            if not len(fcurve.keyframe_points):
+                continue
+            value = float(read_keyframe_arrays(fcurve, ("co",))["co"][0, 1])
+            if prop == "rotation_euler":
+                offsets[(bone_name, array_index)] = value
+            elif prop == "rotation_quaternion":
+                quaternion[array_index] = value
+                quaternions[bone_name] = quaternion
+    return offsets, quaternions
+
+def format_spacing_layer_rotations(offsets, quaternions):
+    """Returns one display line per Euler offset and per quaternion rotation of an additive spacing action."""
+    lines = [f"{bone_name} {'XYZ'[axis_index]}: {math.degrees(offset):+.2f}°" for (bone_name, axis_index), offset in sorted(offsets.items())]
+    for bone_name, quaternion in sorted(quaternions.items()):
+        angle = math.degrees(2.0 * math.acos(min(abs(quaternion[0]) / max(np.linalg.norm(quaternion), 1e-12), 1.0)))
+        lines.append(f"{bone_name}: {angle:.2f}° (quaternion)")
+    return lines
+
+def remove_spacing_strip(armature):
+    """Deletes the additive spacing track and action, and lets the base action replace the NLA result again."""
+    anim_data = armature.animation_data
+    strip = get_spacing_strip(armature)
+    action = strip.action if strip is not None else None
+    track = anim_data.nla_tracks.get(spacing_track_name)
+    if track is not None:
+        anim_data.nla_tracks.remove(track)
+    if action is not None and action.users == 0:
+        fcurve_index_cache.pop((action.as_pointer(), armature.as_pointer()), None)
+        bpy.data.actions.remove(action)
+    anim_data.action_blend_type = 'REPLACE'
+
+def flatten_spacing_layer(context, armature):
+    """Bakes the additive spacing into the base action the way the NLA combines it, one bulk pass per curve.
+
+    Euler offsets are added to the base keys, quaternion rotations are multiplied onto them. Channels the base
+    action doesn't key get a key with the layer's value. Returns the number of curves edited."""
+    base_action = armature.animation_data.action
+    offsets, quaternions = read_spacing_layer_rotations(get_spacing_strip(armature).action, armature)
+    index = get_fcurve_index(base_action, armature)
+    defaults = new_keyframe_defaults(context)
+    start = base_action.frame_range[0]
+
+    edited = 0
+    for (bone_name, axis_index), offset in offsets.items():
+        fcurve = index.find(bone_name, "rotation_euler", axis_index) if index is not None else None
+        if fcurve is not None and len(fcurve.keyframe_points):
+            offset_fcurve_keys(fcurve, offset)
+        else:
+            data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"].rotation_euler'
+            fcurve = ensure_datablock_curve(base_action, armature, data_path, axis_index, bone_name)
+            write_keyframe_arrays(fcurve, build_keyframe_arrays(np.array([start]), np.array([offset]), defaults))
+        edited += 1
+
+    index = get_fcurve_index(base_action, armature)
+    for bone_name, quaternion in quaternions.items():
+        pose_bone = armature.pose.bones.get(bone_name)
+        keys = read_bone_rotation_keys(index, pose_bone) if index is not None and pose_bone is not None else None
+        if keys is None:
+            data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"].rotation_quaternion'
+            for array_index in range(4):
+                fcurve = ensure_datablock_curve(base_action, armature, data_path, array_index, bone_name)
+                write_keyframe_arrays(fcurve, build_keyframe_arrays(np.array([start]), np.array([quaternion[array_index]]), defaults))
+            edited += 4
+            continue
+        channels, frames, values = keys
+        write_channel_keys(channels, frames, rotate_rotation_keys(values, pose_bone.rotation_mode, quaternion), defaults)
+        edited += len(channels)
+
+    remove_spacing_strip(armature)
+    return edited
+
+
+class FlattenSpacingLayerOperator(bpy.types.Operator):
+    bl_idname = "object.flatten_spacing_layer"
+    bl_label = "Flatten Spacing Layer"
+    bl_description = "Bakes the additive spacing layer into the current action and removes the layer, e.g. before exporting."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled_execute
+    def execute(self, context):
+        armature = context.object
+        if armature is None or get_active_action(armature) is None or get_spacing_strip(armature) is None:
+            self.report({'WARNING'}, "The armature has no additive spacing layer.")
+            return {'CANCELLED'}
+
+        edited = flatten_spacing_layer(context, armature)
+        self.report({'INFO'}, f"Spacing layer flattened into {edited} curves.")
+        return {'FINISHED'}
+
+
+class RemoveSpacingLayerOperator(bpy.types.Operator):
+    bl_idname = "object.remove_spacing_layer"
+    bl_label = "Remove Spacing Layer"
+    bl_description = "Deletes the additive spacing layer, leaving the current action as it was before the spacing."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled_execute
+    def execute(self, context):
+        armature = context.object
+        if armature is None or get_spacing_strip(armature) is None:
+            self.report({'WARNING'}, "The armature has no additive spacing layer.")
+            return {'CANCELLED'}
+
+        remove_spacing_strip(armature)
+        self.report({'INFO'}, "Spacing layer removed.")
+        return {'FINISHED'}
+
+# Legacy spacing path: steps through every frame and re-inserts the keys (kept to compare results)
+def adjust_bone_pair_spacing_per_frame(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis):
     if not affect_left and not affect_right:
         return {'CANCELLED'}
 
@@ -69,16 +1077,12 @@ def adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, af
         curves_coll = get_action_curves(anim_data.action, armature)
         if curves_coll is None:
             return {'FINISHED'}
-        for f in range(int(anim_data.action.frame_range[0]), int(anim_data.action.frame_range[1]) + 1):
-            bpy.context.scene.frame_set(f)
 
-            # Determine which axis to adjust
-            if axis == 'SIDEWAYS':
-                axis_index = 2  # Z-axis
-            elif axis == 'FORWARD_BACKWARD':
-                axis_index = 1  # Y-axis
-            else:  # DEPTH - X-axis
-                axis_index = 0
+        # Determine which axis to adjust
+        axis_index = spacing_axis_indices.get(axis, 0)
+
+        for f in range(int(anim_data.action.frame_range[0]), int(anim_data.action.frame_range[1]) + 1):
+            set_scene_frame(bpy.context.scene, f)
 
             if affect_left and bone_l_name in armature.pose.bones:
                 bone_l = armature.pose.bones[bone_l_name]
@@ -101,8 +1105,9 @@ class SpacingAdjusterOperator(bpy.types.Operator):
     bl_idname = "object.adjust_spacing"
     bl_label = "Adjust Spacing"
     bl_description = "Adjusts the spacing of the selected bones according to the value chosen above."
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER'}
 
+    @profiled_execute
     def execute(self, context):
         armature = context.object
         bone_pair_key = context.scene.selected_bone_pair
@@ -110,6 +1115,7 @@ class SpacingAdjusterOperator(bpy.types.Operator):
         affect_left = context.scene.affect_left_prop
         affect_right = context.scene.affect_right_prop
         spacing_axis = context.scene.spacing_axis
+        spacing_mode = context.scene.spacing_mode
 
         if not affect_left and not affect_right:
             self.report({'WARNING'}, "You must select at least one bone (Left or Right) to adjust.")
@@ -120,7 +1126,9 @@ class SpacingAdjusterOperator(bpy.types.Operator):
             bone_l_name, bone_r_name = bone_pair[1], bone_pair[2]
             if bone_r_name is None:
                 affect_right = False  # Ensure right bone isn't processed if None
-            result = adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, spacing_axis)
+            snapshot_spacing_edit(context, armature, [name for name, affect in ((bone_l_name, affect_left), (bone_r_name, affect_right)) if affect], spacing_mode)
+            result = adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, spacing_axis, spacing_mode,
+                                              get_spacing_frame_range(context.scene))
             if result != {'FINISHED'}:
                 return result
         else:
@@ -129,319 +1137,2213 @@ class SpacingAdjusterOperator(bpy.types.Operator):
 
         return {'FINISHED'}
 
+def snapshot_spacing_edit(context, armature, bone_names, mode='KEYFRAMES'):
+    """Snapshots the curves a spacing edit of the bones is about to change: the active action's, or the additive
+    layer's (remembering to remove the layer on revert if the edit creates it)."""
+    action = get_active_action(armature) if armature is not None else None
+    if action is None:
+        return
+    if mode != 'NLA_ADD':
+        snapshot_bone_curves(context, "Adjust Spacing", [(action, armature, bone_names)])
+        return
+    strip = get_spacing_strip(armature)
+    if strip is not None:
+        snapshot_bone_curves(context, "Adjust Spacing", [(strip.action, armature, bone_names)])
+    else:
+        snapshot_bone_curves(context, "Adjust Spacing", [(action, armature, [])], creates_spacing_layer=True)
+
+def format_spacing_layer_entry(entry):
+    angle, *axis = quaternion_to_axis_angle(np.asarray(entry["rotation"], dtype=np.float64))
+    frames = f" (frames {entry['frames'][0]}-{entry['frames'][1]})" if len(entry["frames"]) else ""
+    axis_index = int(np.argmax(np.abs(axis)))
+    if abs(axis[axis_index]) > 0.9999:
+        # Rotations about a single axis read like a plain offset of that axis
+        return f"{entry['bone']} {'XYZ'[axis_index]}: {math.degrees(math.copysign(angle, axis[axis_index])):+.2f}°{frames}"
+    return f"{entry['bone']}: {math.degrees(angle):.2f}° about ({axis[0]:.2f}, {axis[1]:.2f}, {axis[2]:.2f}){frames}"
+
+
+class ResetSpacingLayerOperator(bpy.types.Operator):
+    bl_idname = "object.reset_spacing_layer"
+    bl_label = "Reset Spacing"
+    bl_description = "Removes all the spacing applied to the current action so far, restoring the keys in one pass per curve."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        armature = context.object
+        action = get_active_action(armature) if armature is not None else None
+        if action is None or not get_spacing_layer(action):
+            self.report({'WARNING'}, "The current action has no spacing to reset.")
+            return {'CANCELLED'}
+
+        bone_names = {entry["bone"] for entry in get_spacing_layer(action)}
+        snapshot_bone_curves(context, "Reset Spacing", [(action, armature, sorted(bone_names))])
+        edited = reset_spacing_layer(action, armature)
+        self.report({'INFO'}, f"Spacing reset on {edited} curves.")
+        return {'FINISHED'}
+
+# ----------------------------- Batch Spacing -----------------------------
+
+class SpacingBatchEdit(bpy.types.PropertyGroup):
+    bone_pair: bpy.props.EnumProperty(
+        name="Bone Pair",
+        description="Bone pair to adjust",
+        items=[(bp[0], bp[3], "") for bp in bone_pairs],
+        default='SHOULDER'
+    )
+    axis: bpy.props.EnumProperty(
+        name="Spacing Axis",
+        description="Axis to apply the spacing on",
+        items=spacing_axis_items,
+        default='SIDEWAYS'
+    )
+    space_value: bpy.props.FloatProperty(
+        name="Spacing Value",
+        description="Spacing value in degrees",
+        default=5.0,
+        soft_min=-20.0,
+        soft_max=20.0
+    )
+    affect_left: bpy.props.BoolProperty(name="Affect Left", default=True)
+    affect_right: bpy.props.BoolProperty(name="Affect Right", default=True)
+
+
+class AddSpacingBatchEditOperator(bpy.types.Operator):
+    bl_idname = "object.add_spacing_batch_edit"
+    bl_label = "Add Batch Spacing Edit"
+    bl_description = "Adds the current bone pair, axis, value and sides to the batch spacing list."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled_execute
+    def execute(self, context):
+        scene = context.scene
+        edit = scene.spacing_batch_edits.add()
+        edit.bone_pair = scene.selected_bone_pair
+        edit.axis = scene.spacing_axis
+        edit.space_value = scene.space_value_prop
+        edit.affect_left = scene.affect_left_prop
+        edit.affect_right = scene.affect_right_prop
+        return {'FINISHED'}
+
+
+class RemoveSpacingBatchEditOperator(bpy.types.Operator):
+    bl_idname = "object.remove_spacing_batch_edit"
+    bl_label = "Remove Batch Spacing Edit"
+    bl_description = "Removes this edit from the batch spacing list."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    index: bpy.props.IntProperty(default=-1)
+
+    @profiled_execute
+    def execute(self, context):
+        edits = context.scene.spacing_batch_edits
+        if not 0 <= self.index < len(edits):
+            return {'CANCELLED'}
+        edits.remove(self.index)
+        return {'FINISHED'}
+
+
+class BatchSpacingAdjusterOperator(bpy.types.Operator):
+    bl_idname = "object.adjust_spacing_batch"
+    bl_label = "Adjust Spacing (Batch)"
+    bl_description = "Applies every edit of the batch spacing list to the chosen actions in a single pass per action."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        scene = context.scene
+        armature = context.object
+
+        if armature is None or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "No active armature found.")
+            return {'CANCELLED'}
+
+        if not scene.spacing_batch_edits:
+            self.report({'WARNING'}, "The batch spacing list is empty.")
+            return {'CANCELLED'}
+
+        # Sum every edit per (bone, axis) first so each F-Curve is only written once
+        offsets = {}
+        for edit in scene.spacing_batch_edits:
+            bone_pair = next((bp for bp in bone_pairs if bp[0] == edit.bone_pair), None)
+            if bone_pair is None:
+                continue
+            add_spacing_offset(offsets, bone_pair[1], bone_pair[2], edit.space_value, edit.affect_left, edit.affect_right, edit.axis, armature.pose.bones)
+
+        actions = get_armature_actions(armature, scene.spacing_batch_scope)
+        if not actions:
+            self.report({'WARNING'}, "No actions found.")
+            return {'CANCELLED'}
+
+        bone_names = sorted({bone_name for bone_name, _axis_index in offsets})
+        snapshot_bone_curves(context, "Adjust Spacing (Batch)", [(action, armature, bone_names) for action in actions])
+        edited = 0
+        for action in actions:
+            edited += apply_spacing_offsets(action, armature, offsets, get_spacing_frame_range(scene))
+
+        self.report({'INFO'}, f"Applied {len(scene.spacing_batch_edits)} spacing edits to {len(actions)} actions ({edited} curves).")
+        return {'FINISHED'}
+
 # ----------------------------- Animation Helper Functions -----------------------------
 
+# Default name patterns (regular expressions, comma separated) of the VRoid bones driven by spring bone physics.
+# "Ear" must not be followed by a lowercase letter, so bones like "Earring_Static" aren't picked up.
+default_physics_bone_patterns = "Hair, Bust, Skirt, Sleeve, Ear(?![a-z]), Tail"
+
+# Cached PhysicsBoneSet per armature, rebuilt when the bone names, the spring joints or the classifier settings change
+physics_bone_cache = {}
+compiled_pattern_cache = {}
+
+
+def compile_physics_bone_patterns(patterns):
+    """Compiles the comma separated patterns into one regular expression (cached). Raises re.error on invalid patterns."""
+    if patterns not in compiled_pattern_cache:
+        compiled_pattern_cache[patterns] = physics_bone_regex(patterns)
+    return compiled_pattern_cache[patterns]
+
+def get_spring_bone_joint_names(armature):
+    """Returns the names of the bones listed as joints of the armature's VRM 1.0 spring bones (empty without VRM data)."""
+    try:
+        springs = armature.data.vrm_addon_extension.spring_bone1.springs
+    except AttributeError:
+        return set()
+    return {joint.node.bone_name for spring in springs for joint in spring.joints if joint.node.bone_name}
+
+
+class PhysicsBoneSet:
+    """The physics bones of an armature, as a mask over armature.data.bones and their names."""
+
+    def __init__(self, names, joint_names, settings):
+        self.names = names
+        self.joint_names = joint_names
+        self.settings = settings
+        regex = compile_physics_bone_patterns(settings[1]) if not joint_names else None
+        self.source, self.mask = classify_physics_bones(names, joint_names, regex)
+        self.indices = np.flatnonzero(self.mask)
+        self.bone_names = [names[i] for i in self.indices]
+
+
+def get_physics_bone_set(armature, scene=None):
+    """Returns the cached PhysicsBoneSet of the armature, classifying its bones again only when needed."""
+    scene = scene or bpy.context.scene
+    settings = (scene.physics_bone_source, scene.physics_bone_patterns)
+    # Renaming bones or editing the spring joints changes the classification without changing the bone count
+    names = [bone.name for bone in armature.data.bones]
+    joint_names = get_spring_bone_joint_names(armature) if settings[0] == 'AUTO' else set()
+    key = armature.data.as_pointer()
+    bone_set = physics_bone_cache.get(key)
+    if bone_set is None or bone_set.settings != settings or bone_set.names != names or bone_set.joint_names != joint_names:
+        bone_set = PhysicsBoneSet(names, joint_names, settings)
+        physics_bone_cache[key] = bone_set
+    return bone_set
+
+def get_physics_bone_names(armature, scene=None):
+    return get_physics_bone_set(armature, scene).bone_names
+
+
+@bpy.app.handlers.persistent
+def clear_physics_bone_cache(*args):
+    """Drops every cached physics bone set when undo or file loading may have changed the armatures."""
+    physics_bone_cache.clear()
+
+
+def get_selected_bone_names(armature):
+    """Returns the names of the selected bones, reading the select flags in bulk."""
+    bones = armature.data.bones
+    select = np.zeros(len(bones), dtype=bool)
+    bones.foreach_get("select", select)
+    return [bones[int(i)].name for i in np.flatnonzero(select)]
+
+def select_bone_mask(armature, mask):
+    """Selects exactly the bones of the mask (over armature.data.bones) in one bulk write."""
+    armature.data.bones.foreach_set("select", np.ascontiguousarray(mask, dtype=bool))
+    armature.data.update_tag()
+
 # Operator to select physics bones
 class SelectPhysicsBonesOperator(bpy.types.Operator):
     bl_idname = "object.select_physics_bones"
     bl_label = "Select Physics Bones"
-    bl_description = "This selects all the possible physics bones that could exist on your VRM model."
+    bl_description = "This selects all the physics bones of your VRM model: the VRM spring bone joints, or the bones matching the physics bone patterns."
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled_execute
     def execute(self, context):
         armature = context.object
+        if armature is None or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "No active armature found.")
+            return {'CANCELLED'}
 
         # Ensure we are in Pose Mode
         if bpy.context.mode != 'POSE':
             bpy.ops.object.mode_set(mode='POSE')
 
-        # Deselect all bones first
-        bpy.ops.pose.select_all(action='DESELECT')
-
-        # List of patterns for bone names
-        patterns = ["Hair", "Bust", "Skirt", "Sleeve", "Ear", "Tail"]
+        try:
+            bone_set = get_physics_bone_set(armature, context.scene)
+        except re.error as e:
+            self.report({'ERROR'}, f"Invalid physics bone pattern: {e}")
+            return {'CANCELLED'}
 
-        # Iterate over all bones and select those matching the patterns
-        for bone in armature.pose.bones:
-            bone_name = bone.name
-            if any(pattern in bone_name for pattern in patterns):
-                bone.bone.select = True  # Select matching bones
+        # Deselect every other bone and select the physics bones in one pass
+        select_bone_mask(armature, bone_set.mask)
 
+        source = "spring bone joints" if bone_set.source == 'SPRING_BONES' else "name patterns"
+        self.report({'INFO'}, f"Selected {len(bone_set.bone_names)} physics bones from the {source}.")
         return {'FINISHED'}
 
 
 
+def delete_bone_curves(index, bone_names):
+    """Removes the curves of all transformations of the bones. Returns the number of curves removed."""
+    fcurves = index.curves_for_bones(bone_names)
+    for fcurve in fcurves:
+        index.curves_coll.remove(fcurve)
+    return len(fcurves)
+
 # Operator to delete highlighted bones from animation
 class DeleteHighlightedBonesOperator(bpy.types.Operator):
     bl_idname = "object.delete_highlighted_bones"
     bl_label = "Delete Highlighted Bones from Animation"
     bl_description = "This removes the physics bones from the current animation, which is often the case when retargeting animations to the VRM model."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        armature = context.object
+        anim_data = armature.animation_data
+
+        if bpy.context.mode != 'POSE':
+            self.report({'WARNING'}, "You must be in Pose Mode.")
+            return {'CANCELLED'}
+
+        if not armature.pose.bones:
+            self.report({'WARNING'}, "No bones selected.")
+            return {'CANCELLED'}
+
+        if anim_data is None or anim_data.action is None:
+            self.report({'WARNING'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        index = get_fcurve_index(anim_data.action, armature)
+        if index is None:
+            self.report({'WARNING'}, "No curves collection found.")
+            return {'CANCELLED'}
+
+        selected_bones = get_selected_bone_names(armature)
+
+        if not selected_bones:
+            self.report({'WARNING'}, "No bones selected.")
+            return {'CANCELLED'}
+
+        snapshot_bone_curves(context, "Delete Highlighted Bones", [(anim_data.action, armature, selected_bones)])
+        delete_bone_curves(index, selected_bones)
+        return {'FINISHED'}
+
+
+# Operator to toggle VRM Spring Bone Physics
+class ToggleVRMSpringBonePhysicsOperator(bpy.types.Operator):
+    bl_idname = "object.toggle_vrm_spring_bone_physics"
+    bl_label = "Enable/Disable VRM Spring Bone Physics"
+    bl_description = "Enable VRM Spring Bone Physics for baking; disable before creating looping animations."
     bl_options = {'REGISTER', 'UNDO'}
 
+    @profiled_execute
+    def execute(self, context):
+        # Locate the Armature in the scene
+        armature = None
+        for obj in bpy.context.scene.objects:
+            if obj.type == 'ARMATURE':
+                armature = obj
+                break
+        
+        if armature is None:
+            self.report({'ERROR'}, "No Armature object found in the scene.")
+            return {'CANCELLED'}
+        
+        # Set the Armature as the active object and select it
+        bpy.context.view_layer.objects.active = armature
+        armature.select_set(True)
+        
+        # Access the VRM Spring Bone settings
+        try:
+            # Toggle the spring bone physics status
+            vrm_module = armature.data.vrm_addon_extension  # Placeholder for actual VRM property path
+            enabled = not getattr(vrm_module.spring_bone1, 'enable_animation', False)
+            vrm_module.spring_bone1.enable_animation = enabled
+            
+            # Update the scene property to reflect the toggle status
+            context.scene.vrm_spring_bone_physics_enabled = enabled
+
+            status = "enabled" if enabled else "disabled"
+            self.report({'INFO'}, f"VRM Spring Bone Physics {status}.")
+
+        except AttributeError:
+            self.report({'ERROR'}, "VRM Spring Bone system not available.")
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+    
+# ----------------------------- Physics-Only Bake -----------------------------
+
+def sample_armatures_pose_matrices(context, armatures, frame_start, frame_end, world_matrices=None):
+    """Steps the scene once over the frame range, sampling every armature on each frame.
+
+    Returns one (frames, bones, 4, 4) array of pose-space matrices per armature. If world_matrices is a list,
+    the (frames, 4, 4) object matrices of each armature are appended to it."""
+    scene = context.scene
+    frame_count = frame_end - frame_start + 1
+    pose_bones = [armature.pose.bones for armature in armatures]
+    samples = [np.empty((frame_count, len(bones) * 16), dtype=np.float32) for bones in pose_bones]
+    world_samples = [np.empty((frame_count, 4, 4)) for _armature in armatures] if world_matrices is not None else None
+
+    original_frame = scene.frame_current
+    for row, frame in enumerate(range(frame_start, frame_end + 1)):
+        set_scene_frame(scene, frame)
+        for bones, buffer in zip(pose_bones, samples):
+            bones.foreach_get("matrix", buffer[row])
+        if world_samples is not None:
+            for armature, buffer in zip(armatures, world_samples):
+                buffer[row] = armature.matrix_world
+    set_scene_frame(scene, original_frame)
+
+    if world_samples is not None:
+        world_matrices.extend(world_samples)
+    return [buffer.reshape(frame_count, len(bones), 4, 4).transpose(0, 1, 3, 2).astype(np.float64)
+            for bones, buffer in zip(pose_bones, samples)]
+
+def sample_pose_matrices(context, armature, frame_start, frame_end):
+    """Steps the scene over the frame range and returns every pose bone's pose-space matrix as a (frames, bones, 4, 4) array."""
+    return sample_armatures_pose_matrices(context, [armature], frame_start, frame_end)[0]
+
+def pose_to_basis_matrices(armature, pose_matrices, bone_names):
+    """Converts sampled pose-space matrices into the local (matrix_basis) transforms of the given bones, like visual keying."""
+    pose_bones = armature.pose.bones
+    bones = armature.data.bones
+    pose_index = {bone.name: i for i, bone in enumerate(pose_bones)}
+    rest_index = {bone.name: i for i, bone in enumerate(bones)}
+
+    rest_buffer = np.empty(len(bones) * 16, dtype=np.float32)
+    bones.foreach_get("matrix_local", rest_buffer)
+    rest = blender_matrices_to_numpy(rest_buffer, len(bones))
+
+    basis = {}
+    for name in bone_names:
+        pose_bone = pose_bones[name]
+        pose = pose_matrices[:, pose_index[name]]
+        rest_inverse = np.linalg.inv(rest[rest_index[name]])
+        if pose_bone.parent is None:
+            basis[name] = rest_inverse @ pose
+        else:
+            parent_name = pose_bone.parent.name
+            parent_pose = pose_matrices[:, pose_index[parent_name]]
+            basis[name] = rest_inverse @ rest[rest_index[parent_name]] @ np.linalg.inv(parent_pose) @ pose
+    return basis
+
+def ensure_action_curve(curves_coll, data_path, index, group_name):
+    fcurve = curves_coll.find(data_path, index=index)
+    if fcurve is None:
+        try:
+            fcurve = curves_coll.new(data_path, index=index, action_group=group_name)
+        except TypeError:
+            # Channelbag curves (layered actions) have no action_group argument
+            fcurve = curves_coll.new(data_path, index=index)
+    return fcurve
+
+def write_baked_channel(curves_coll, data_path, index, group_name, frames, values, defaults):
+    """Replaces the keys of one channel inside the baked frame range, keeping the keys outside of it."""
+    fcurve = ensure_action_curve(curves_coll, data_path, index, group_name)
+    baked = build_keyframe_arrays(frames, values, defaults)
+    if len(fcurve.keyframe_points):
+        baked = merge_keyframe_range(read_keyframe_arrays(fcurve), baked)
+    write_keyframe_arrays(fcurve, baked)
+
+def write_baked_bones(context, armature, action, basis_matrices, frames):
+    """Writes the location, rotation and scale curves of every baked bone in bulk."""
+    curves_coll = get_action_curves(action, armature)
+    defaults = new_keyframe_defaults(context)
+    frames = np.asarray(frames, dtype=np.float32)
+
+    for name, matrices in basis_matrices.items():
+        pose_bone = armature.pose.bones[name]
+        rotation_mode = pose_bone.rotation_mode
+        location, rotation, scale = decompose_matrices(matrices, rotation_mode)
+        if rotation_mode == 'QUATERNION':
+            rotation_path = "rotation_quaternion"
+        elif rotation_mode == 'AXIS_ANGLE':
+            rotation_path = "rotation_axis_angle"
+        else:
+            rotation_path = "rotation_euler"
+
+        bone_path = f'pose.bones["{bpy.utils.escape_identifier(name)}"]'
+        for prop, values in (("location", location), (rotation_path, rotation), ("scale", scale)):
+            for index in range(values.shape[-1]):
+                write_baked_channel(curves_coll, f"{bone_path}.{prop}", index, name, frames, values[:, index], defaults)
+
+# ----------------------------- Spring Bone Solver -----------------------------
+
+def find_vrm_item(items, uuid, name):
+    """Finds a VRM add-on collider or collider group by the uuid (or, for older files, the name) a reference holds."""
+    for item in items:
+        if uuid and getattr(item, "uuid", "") == uuid:
+            return item
+    for item in items:
+        if name and name in (item.name, getattr(item, "vrm_name", "")):
+            return item
+    return None
+
+class SpringBoneSetup:
+    """The VRM 1.0 spring bones of an armature (joints, their settings and colliders) as arrays for the NumPy solver.
+
+    Every joint but the last of each spring is simulated; the last one only marks the tail of the previous joint.
+    Raises AttributeError when the armature has no VRM add-on data."""
+
+    def __init__(self, armature):
+        spring_bone = armature.data.vrm_addon_extension.spring_bone1
+        pose_bones = armature.pose.bones
+        bones = armature.data.bones
+        pose_index = {bone.name: i for i, bone in enumerate(pose_bones)}
+        rest_buffer = np.empty(len(bones) * 16, dtype=np.float32)
+        bones.foreach_get("matrix_local", rest_buffer)
+        rest = blender_matrices_to_numpy(rest_buffer, len(bones))
+        rest_index = {bone.name: i for i, bone in enumerate(bones)}
+
+        colliders = []  # (bone pose index, is capsule, offset, tail, radius)
+        collider_rows = {}
+        joints = []  # (bone name, tail bone name, joint settings, collider rows)
+        for spring in spring_bone.springs:
+            rows = set()
+            for group_reference in spring.collider_groups:
+                group = find_vrm_item(spring_bone.collider_groups, getattr(group_reference, "collider_group_uuid", ""),
+                                      getattr(group_reference, "collider_group_name", ""))
+                if group is None:
+                    continue
+                for collider_reference in group.colliders:
+                    collider = find_vrm_item(spring_bone.colliders, getattr(collider_reference, "collider_uuid", ""),
+                                             getattr(collider_reference, "collider_name", ""))
+                    if collider is None or collider.node.bone_name not in pose_index:
+                        continue
+                    key = collider.as_pointer()
+                    if key not in collider_rows:
+                        shape = collider.shape
+                        is_capsule = shape.shape_type.lower() == "capsule"
+                        settings = shape.capsule if is_capsule else shape.sphere
+                        tail = tuple(settings.tail) if is_capsule else tuple(settings.offset)
+                        collider_rows[key] = len(colliders)
+                        colliders.append((pose_index[collider.node.bone_name], is_capsule, tuple(settings.offset), tail, settings.radius))
+                    rows.add(collider_rows[key])
+
+            spring_joints = [joint for joint in spring.joints if joint.node.bone_name in pose_index]
+            for joint, tail_joint in zip(spring_joints, spring_joints[1:]):
+                joints.append((joint.node.bone_name, tail_joint.node.bone_name, joint, rows))
+
+        # A bone listed in several springs is simulated once, with the first spring's settings
+        seen = set()
+        joints = [entry for entry in joints if not (entry[0] in seen or seen.add(entry[0]))]
+        self.joint_names = [name for name, _tail, _joint, _rows in joints]
+        joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        count = len(joints)
+
+        self.parents = np.full(count, -1, dtype=np.int64)
+        self.driver_index = np.zeros(count, dtype=np.int64)
+        self.rest_local = np.empty((count, 4, 4))
+        self.tail_offsets = np.empty((count, 3))
+        driver_bones = {}  # pose index of the driving bone (-1 for the armature object) -> driver row
+        for row, (name, tail_name, _joint, _rows) in enumerate(joints):
+            joint_rest = rest[rest_index[name]]
+            parent = pose_bones[name].parent
+            if parent is None:
+                self.rest_local[row] = joint_rest
+                self.driver_index[row] = driver_bones.setdefault(-1, len(driver_bones))
+            else:
+                self.rest_local[row] = np.linalg.inv(rest[rest_index[parent.name]]) @ joint_rest
+                if parent.name in joint_index:
+                    self.parents[row] = joint_index[parent.name]
+                else:
+                    self.driver_index[row] = driver_bones.setdefault(pose_index[parent.name], len(driver_bones))
+            self.tail_offsets[row] = (np.linalg.inv(joint_rest) @ rest[rest_index[tail_name]])[:3, 3]
+        self.driver_bones = np.array(sorted(driver_bones, key=driver_bones.get), dtype=np.int64)
+
+        self.stiffness = np.array([joint.stiffness for _name, _tail, joint, _rows in joints], dtype=np.float64)
+        self.drag = np.array([joint.drag_force for _name, _tail, joint, _rows in joints], dtype=np.float64)
+        self.hit_radius = np.array([joint.hit_radius for _name, _tail, joint, _rows in joints], dtype=np.float64)
+        self.gravity = np.array([np.array(joint.gravity_dir) * joint.gravity_power for _name, _tail, joint, _rows in joints], dtype=np.float64).reshape(count, 3)
+
+        self.collider_bones = np.array([collider[0] for collider in colliders], dtype=np.int64)
+        self.collider_capsule = np.array([collider[1] for collider in colliders], dtype=bool)
+        self.collider_offsets = np.array([collider[2] for collider in colliders], dtype=np.float64).reshape(-1, 3)
+        self.collider_tails = np.array([collider[3] for collider in colliders], dtype=np.float64).reshape(-1, 3)
+        self.collider_radius = np.array([collider[4] for collider in colliders], dtype=np.float64)
+        self.collider_mask = np.zeros((count, len(colliders)), dtype=bool)
+        for row, (_name, _tail, _joint, rows) in enumerate(joints):
+            self.collider_mask[row, sorted(rows)] = True
+
+    def solver_arguments(self, pose_matrices, world_matrices, delta_time, joints=None):
+        """Returns the arguments of simulate_spring_joints for the sampled frames, for all joints or a closed subset."""
+        # World matrices of the driving bones and colliders; the armature object itself drives root joints
+        driver_pose = np.concatenate([pose_matrices, np.broadcast_to(np.eye(4), (len(pose_matrices), 1, 4, 4))], axis=1)
+        drivers = world_matrices[:, None] @ driver_pose[:, self.driver_bones]
+        colliders = world_matrices[:, None] @ pose_matrices[:, self.collider_bones]
+        if joints is None:
+            joints = np.arange(len(self.joint_names))
+        return (drivers, self.driver_index[joints], subset_spring_parents(self.parents, joints), self.rest_local[joints],
+                self.tail_offsets[joints], self.stiffness[joints], self.drag[joints], self.gravity[joints],
+                self.hit_radius[joints], colliders, self.collider_offsets, self.collider_tails, self.collider_radius,
+                self.collider_capsule, self.collider_mask[joints], delta_time)
+
+def simulate_spring_setup(setup, pose_matrices, world_matrices, delta_time, workers=1, operator=None):
+    """Runs the solver over the sampled frames and returns the joints' (frames, joints, 4, 4) world matrices.
+
+    With several workers, independent chains are split over a process pool (the solver only needs NumPy).
+    Falls back to a single process if the pool can't be started, warning on the operator."""
+    groups = split_spring_joints(setup.parents, workers) if workers > 1 else []
+    if len(groups) > 1:
+        world = np.empty((len(pose_matrices), len(setup.joint_names), 4, 4))
+        try:
+            # Forking Blender copies its threads and GPU state into the workers; spawned workers only import the
+            # NumPy core (sys.path is passed on) and receive plain arrays
+            with ProcessPoolExecutor(max_workers=len(groups), mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(simulate_spring_joints, *setup.solver_arguments(pose_matrices, world_matrices, delta_time, joints))
+                           for joints in groups]
+                for joints, future in zip(groups, futures):
+                    world[:, joints] = future.result()
+            return world
+        except (OSError, BrokenProcessPool) as e:
+            if operator is not None:
+                operator.report({'WARNING'}, f"Spring solver process pool unavailable, simulating in one process: {e}")
+    return simulate_spring_joints(*setup.solver_arguments(pose_matrices, world_matrices, delta_time))
+
+def solver_delta_time(scene):
+    return scene.render.fps_base / scene.render.fps
+
+def set_spring_animation(armatures, enabled):
+    """Sets the VRM add-on's spring bone animation flag of the armatures. Returns their previous values."""
+    previous = []
+    for armature in armatures:
+        spring_bone = armature.data.vrm_addon_extension.spring_bone1
+        previous.append(spring_bone.enable_animation)
+        spring_bone.enable_animation = enabled
+    return previous
+
+def restore_spring_animation(armatures, previous):
+    for armature, enabled in zip(armatures, previous):
+        armature.data.vrm_addon_extension.spring_bone1.enable_animation = enabled
+
+def sample_spring_drivers(context, armatures, frame_start, frame_end):
+    """Steps the scene once with the VRM add-on's spring bone animation off, sampling the pose and object matrices.
+
+    Returns one (pose matrices, world matrices) pair per armature."""
+    previous = set_spring_animation(armatures, False)
+    try:
+        world_matrices = []
+        pose_matrices = sample_armatures_pose_matrices(context, armatures, frame_start, frame_end, world_matrices)
+    finally:
+        restore_spring_animation(armatures, previous)
+    return list(zip(pose_matrices, world_matrices))
+
+def solve_spring_basis(scene, armature, setup, pose_matrices, world_matrices, operator=None):
+    """Simulates the spring bones over the sampled frames and returns the joints' local (matrix_basis) transforms."""
+    world = simulate_spring_setup(setup, pose_matrices, world_matrices, solver_delta_time(scene), scene.spring_solver_workers, operator)
+    pose_index = {bone.name: i for i, bone in enumerate(armature.pose.bones)}
+    joint_columns = [pose_index[name] for name in setup.joint_names]
+
+    # Simulated joints replace the sampled ones, so children read their simulated parent
+    solved = pose_matrices.copy()
+    solved[:, joint_columns] = np.linalg.inv(world_matrices)[:, None] @ world
+    return pose_to_basis_matrices(armature, solved, setup.joint_names)
+
+def bake_spring_solver(context, armature, action, setup, frame_start, frame_end, operator=None):
+    """Bakes the spring bones with the built-in solver: one pass over the frames without the VRM add-on's physics,
+    the simulation on the sampled arrays, and the joints keyed in bulk."""
+    pose_matrices, world_matrices = sample_spring_drivers(context, [armature], frame_start, frame_end)[0]
+    basis_matrices = solve_spring_basis(context.scene, armature, setup, pose_matrices, world_matrices, operator)
+    write_baked_bones(context, armature, action, basis_matrices, range(frame_start, frame_end + 1))
+
+def get_spring_bone_setup(operator, armature):
+    """Reads the armature's spring bones, reporting on the operator and returning None when there are none."""
+    try:
+        setup = SpringBoneSetup(armature)
+    except AttributeError:
+        operator.report({'ERROR'}, "VRM Spring Bone system not available.")
+        return None
+    if not setup.joint_names:
+        operator.report({'ERROR'}, "No VRM spring bone joints to simulate.")
+        return None
+    return setup
+
+class CompareSpringSolverOperator(bpy.types.Operator):
+    bl_idname = "object.compare_spring_solver"
+    bl_label = "Compare Spring Solver"
+    bl_description = "Simulates the spring bones with both the built-in solver and the VRM add-on, without keying anything, and reports how far apart the joints end up"
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        scene = context.scene
+        armature = context.object
+        action = get_active_action(armature) if armature is not None and armature.type == 'ARMATURE' else None
+        if action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+        setup = get_spring_bone_setup(self, armature)
+        if setup is None:
+            return {'CANCELLED'}
+
+        final_frame = int(action.frame_range[1])
+        pose_matrices, world_matrices = sample_spring_drivers(context, [armature], 1, final_frame)[0]
+        world = simulate_spring_setup(setup, pose_matrices, world_matrices, solver_delta_time(scene), scene.spring_solver_workers, self)
+
+        # The VRM add-on's result, stepped over the same frames with its spring bone animation on
+        previous = set_spring_animation([armature], True)
+        try:
+            reference_pose = sample_pose_matrices(context, armature, 1, final_frame)
+        finally:
+            restore_spring_animation([armature], previous)
+        pose_index = {bone.name: i for i, bone in enumerate(armature.pose.bones)}
+        reference = world_matrices[:, None] @ reference_pose[:, [pose_index[name] for name in setup.joint_names]]
+
+        # Angle between the simulated and reference bone directions (local Y), per joint and frame
+        solved_axis = world[..., :3, 1] / np.linalg.norm(world[..., :3, 1], axis=-1, keepdims=True)
+        reference_axis = reference[..., :3, 1] / np.linalg.norm(reference[..., :3, 1], axis=-1, keepdims=True)
+        angles = np.degrees(np.arccos(np.clip(np.einsum('fji,fji->fj', solved_axis, reference_axis), -1.0, 1.0)))
+        worst = np.argsort(-angles.max(axis=0))[:3]
+        worst_text = ", ".join(f"{setup.joint_names[joint]} {angles[:, joint].max():.1f}°" for joint in worst)
+        profile_note(joints=len(setup.joint_names), mean_angle=float(angles.mean()), max_angle=float(angles.max()))
+        self.report({'INFO'}, f"Spring solver vs VRM add-on over {final_frame} frames: mean {angles.mean():.2f}°, max {angles.max():.2f}° (worst: {worst_text}).")
+        return {'FINISHED'}
+
+# ----------------------------- Physics Bake Cache -----------------------------
+
+# Spring bone properties that don't change the simulation (toggled around every bake)
+bake_cache_ignored_props = {"rna_type", "enable_animation"}
+
+def get_bake_cache_directory(scene):
+    return bpy.path.abspath(scene.bake_cache_directory) if scene.bake_cache_directory else os.path.join(tempfile.gettempdir(), "vrm_bake_cache")
+
+def hash_rna_struct(hasher, struct, depth=0):
+    """Feeds every property value of an RNA struct (recursing into pointers and collections) into the hasher."""
+    if struct is None or depth > 8:
+        return
+    for prop in struct.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier in bake_cache_ignored_props:
+            continue
+        value = getattr(struct, identifier, None)
+        hasher.update(identifier.encode())
+        if prop.type == 'POINTER':
+            if isinstance(value, bpy.types.ID):
+                hasher.update(value.name.encode())
+            else:
+                hash_rna_struct(hasher, value, depth + 1)
+        elif prop.type == 'COLLECTION':
+            for item in value:
+                hash_rna_struct(hasher, item, depth + 1)
+        elif isinstance(value, str):
+            hasher.update(value.encode())
+        elif isinstance(value, (set, frozenset)):
+            # ENUM_FLAG values are sets, whose iteration order changes between sessions
+            hasher.update(repr(sorted(value)).encode())
+        else:
+            hasher.update(repr(tuple(value) if hasattr(value, "__len__") else value).encode())
+
+def hash_action_curves(hasher, action, armature, skipped_bones=()):
+    """Feeds the keys of the action's curves for the armature into the hasher, except those of the skipped bones."""
+    index = get_fcurve_index(action, armature)
+    for fcurve in (index.curves_coll if index is not None else ()):
+        match = bone_data_path_pattern.match(fcurve.data_path)
+        if match is not None and escaped_char_pattern.sub(r'\1', match.group(1)) in skipped_bones:
+            continue
+        hasher.update(f"{fcurve.data_path}[{fcurve.array_index}]".encode())
+        for values in read_keyframe_arrays(fcurve, ("co", "handle_left", "handle_right", "interpolation")).values():
+            hasher.update(values.tobytes())
+
+def physics_bake_cache_key(scene, armature, action, bone_names, frame_start, frame_end):
+    """Returns the cache key of a physics bake: a hash of everything the simulated bones depend on.
+
+    That is the keys of every curve except the physics bones' own, the NLA tracks evaluated with the action (like
+    the additive spacing layer), the spring bone settings, the rest pose, the object transform, the frame rate and
+    the frame range."""
+    hasher = hashlib.sha256()
+    hasher.update(repr((frame_start, frame_end, scene.render.fps, scene.render.fps_base, sorted(bone_names))).encode())
+
+    rest = np.empty(len(armature.data.bones) * 16, dtype=np.float32)
+    armature.data.bones.foreach_get("matrix_local", rest)
+    hasher.update(rest.tobytes())
+    hasher.update(np.array(armature.matrix_world, dtype=np.float32).tobytes())
+
+    # The bake replaces the physics bones' own curves of the action, so they must not change the key
+    hash_action_curves(hasher, action, armature, set(bone_names))
+
+    anim_data = armature.animation_data
+    if anim_data is not None:
+        hasher.update(repr((anim_data.action_blend_type, anim_data.action_influence, anim_data.action_extrapolation,
+                            anim_data.use_nla)).encode())
+        for track in anim_data.nla_tracks:
+            hasher.update(repr((track.name, track.mute, track.is_solo)).encode())
+            for strip in track.strips:
+                hasher.update(repr((strip.name, strip.mute, strip.influence, strip.use_animated_influence, strip.blend_type,
+                                    strip.extrapolation, strip.frame_start, strip.frame_end, strip.action_frame_start,
+                                    strip.action_frame_end, strip.scale, strip.repeat, strip.blend_in, strip.blend_out,
+                                    strip.use_reverse)).encode())
+                for fcurve in strip.fcurves:
+                    hasher.update(read_keyframe_arrays(fcurve, ("co",))["co"].tobytes())
+                if strip.action is not None:
+                    hash_action_curves(hasher, strip.action, armature)
+
+    try:
+        hash_rna_struct(hasher, armature.data.vrm_addon_extension.spring_bone1)
+    except AttributeError:
+        pass
+    return hasher.hexdigest()
+
+def load_bake_cache(directory, key, bone_names):
+    """Returns the cached {bone name: (frames, 4, 4) matrices} of a bake, or None on a miss."""
+    path = os.path.join(directory, f"{key}.npz")
+    try:
+        with np.load(path) as data:
+            cached_names = data["bone_names"].tolist()
+            matrices = data["matrices"].astype(np.float64)
+    except (OSError, KeyError, ValueError):
+        return None
+    if sorted(cached_names) != sorted(bone_names):
+        return None
+    # Mark the entry as recently used for the LRU eviction
+    os.utime(path)
+    return {name: matrices[row] for row, name in enumerate(cached_names)}
+
+def save_bake_cache(directory, key, basis_matrices, size_limit):
+    """Stores the baked matrices of a bake compressed, then evicts the least recently used entries over size_limit bytes."""
+    os.makedirs(directory, exist_ok=True)
+    names = list(basis_matrices)
+    path = os.path.join(directory, f"{key}.npz")
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        np.savez_compressed(f, bone_names=np.array(names), matrices=np.stack([basis_matrices[name] for name in names]).astype(np.float32))
+    os.replace(temporary_path, path)
+    evict_bake_cache(directory, size_limit)
+
+def evict_bake_cache(directory, size_limit):
+    """Removes the least recently used cache entries until the directory holds at most size_limit bytes."""
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(".npz"):
+            stat = os.stat(os.path.join(directory, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _mtime, size, _name in entries)
+    for _mtime, size, name in sorted(entries):
+        if total <= size_limit:
+            break
+        os.remove(os.path.join(directory, name))
+        total -= size
+
+def cached_physics_basis(scene, armature, action, bone_names, frame_start, frame_end):
+    """Looks the bake up in the cache if it is enabled. Returns (cache key or None, cached matrices or None)."""
+    if not scene.use_bake_cache:
+        return None, None
+    key = physics_bake_cache_key(scene, armature, action, bone_names, frame_start, frame_end)
+    return key, load_bake_cache(get_bake_cache_directory(scene), key, bone_names)
+
+def store_physics_basis(scene, key, basis_matrices):
+    if key is not None:
+        save_bake_cache(get_bake_cache_directory(scene), key, basis_matrices, scene.bake_cache_size_limit * 1024 * 1024)
+
+def bake_physics_bones(context, armature, action, bone_names, frame_start, frame_end):
+    """Bakes only the given bones: one simulation pass over the frames, sampled into arrays and keyed in bulk at the end.
+
+    With the bake cache enabled, a bake whose inputs haven't changed is read from disk instead of simulated.
+    Returns True on a cache hit."""
+    scene = context.scene
+    key, basis_matrices = cached_physics_basis(scene, armature, action, bone_names, frame_start, frame_end)
+    cache_hit = basis_matrices is not None
+    if not cache_hit:
+        pose_matrices = sample_pose_matrices(context, armature, frame_start, frame_end)
+        basis_matrices = pose_to_basis_matrices(armature, pose_matrices, bone_names)
+        store_physics_basis(scene, key, basis_matrices)
+    write_baked_bones(context, armature, action, basis_matrices, range(frame_start, frame_end + 1))
+    return cache_hit
+
+class AdjustPlaybackAndBakeOperator(bpy.types.Operator):
+    bl_idname = "object.adjust_playback_and_bake"
+    bl_label = "Adjust Playback Range and Bake Animation"
+    bl_description = "Bakes the hair physics into the animation and also changes the playback range of the scene to that of the animation. If you don't need a looping animation, this is the final step."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        scene = context.scene
+        armature = context.object
+
+        # Ensure we're in Object Mode
+        if bpy.context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        # Get the action
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+
+        # Adjust playback range's final frame to match the final frame of the current action
+        final_frame = int(action.frame_range[1])
+        scene.frame_end = final_frame
+        message = f"Playback range adjusted to frame {final_frame} and animation baked."
+
+        if scene.bake_mode == 'PHYSICS_ONLY':
+            # Only sample the physics bones, leaving the humanoid curves untouched
+            try:
+                bone_names = get_physics_bone_names(armature, scene)
+            except re.error as e:
+                self.report({'ERROR'}, f"Invalid physics bone pattern: {e}")
+                return {'CANCELLED'}
+            if not bone_names:
+                self.report({'ERROR'}, "No physics bones found.")
+                return {'CANCELLED'}
+            snapshot_bone_curves(context, "Adjust Playback & Bake", [(action, armature, bone_names)])
+            if bake_physics_bones(context, armature, action, bone_names, 1, final_frame):
+                message = f"Playback range adjusted to frame {final_frame} and physics read from the bake cache."
+        elif scene.bake_mode == 'SOLVER':
+            # Simulate the spring bones with the built-in solver and key only the joints
+            setup = get_spring_bone_setup(self, armature)
+            if setup is None:
+                return {'CANCELLED'}
+            bone_names = setup.joint_names
+            snapshot_bone_curves(context, "Adjust Playback & Bake", [(action, armature, bone_names)])
+            bake_spring_solver(context, armature, action, setup, 1, final_frame, self)
+            message = f"Playback range adjusted to frame {final_frame} and {len(bone_names)} spring bone joints simulated."
+        else:
+            bone_names = [bone.name for bone in armature.pose.bones]
+            snapshot_bone_curves(context, "Adjust Playback & Bake", [(action, armature, None)])
+
+            # Bake Animation
+            bpy.ops.object.mode_set(mode='POSE')  # Switch to Pose Mode
+            bpy.ops.nla.bake(
+                frame_start=1,
+                frame_end=final_frame,
+                bake_types={'POSE'},
+                visual_keying=True,
+                clear_constraints=False,
+                use_current_action=True,
+                only_selected=False
+            )
+            bpy.ops.object.mode_set(mode='OBJECT')  # Switch back to Object Mode
+
+        if scene.reduce_after_bake:
+            stats = reduce_bone_keys(scene, action, armature, bone_names)
+            self.report({'INFO'}, f"{message} {format_reduction_stats(stats)}")
+            return {'FINISHED'}
+
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+    
+# ----------------------------- Keyframe Reduction -----------------------------
+
+def get_reduction_tolerance(prop, scene):
+    """Returns (tolerance in curve units, factor converting curve units to reported units, channel type) for a bone property."""
+    rotation_tolerance = math.radians(scene.reduce_rotation_tolerance)
+    if prop == "location":
+        return scene.reduce_location_tolerance, 1.0, "location"
+    if prop == "scale":
+        return scene.reduce_scale_tolerance, 1.0, "scale"
+    if prop == "rotation_quaternion":
+        # A rotation of angle a changes the quaternion components by about a / 2
+        return rotation_tolerance / 2.0, math.degrees(2.0), "rotation"
+    if prop in ("rotation_euler", "rotation_axis_angle"):
+        return rotation_tolerance, math.degrees(1.0), "rotation"
+    return None
+
+def reduce_bone_keys(scene, action, armature, bone_names):
+    """Decimates the transform curves of the bones and returns the key counts and max error (location, degrees, scale)."""
+    stats = {"keys_before": 0, "keys_after": 0, "curves": 0, "max_error": {"location": 0.0, "rotation": 0.0, "scale": 0.0}}
+    index = get_fcurve_index(action, armature)
+    if index is None:
+        return stats
+
+    bezier = keyframe_enum_value("interpolation", 'BEZIER')
+    linear = keyframe_enum_value("interpolation", 'LINEAR')
+    aligned = keyframe_enum_value("handle_left_type", 'ALIGNED')
+    fcurves, curve_arrays, tolerance_arrays, factors, channel_types = [], [], [], [], []
+    for bone_name in bone_names:
+        for prop, array_index, curve_index in index.bone_entries.get(bone_name, ()):
+            tolerance = get_reduction_tolerance(prop, scene)
+            if tolerance is None:
+                continue
+            fcurve = index.curves_coll[curve_index]
+            arrays = read_keyframe_arrays(fcurve)
+            # Stepped or eased curves can't be reproduced by Bezier segments, so they are left as they are
+            if len(arrays["co"]) < 3 or not np.isin(arrays["interpolation"], (bezier, linear)).all():
+                continue
+            fcurves.append(fcurve)
+            curve_arrays.append(arrays)
+            tolerance_arrays.append(np.full(len(arrays["co"]), tolerance[0]))
+            factors.append(tolerance[1])
+            channel_types.append(tolerance[2])
+
+    if not fcurves:
+        return stats
+
+    lengths = np.array([len(arrays["co"]) for arrays in curve_arrays])
+    curve_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    times = np.concatenate([arrays["co"][:, 0] for arrays in curve_arrays]).astype(np.float64)
+    values = np.concatenate([arrays["co"][:, 1] for arrays in curve_arrays]).astype(np.float64)
+    kept, slopes, error = fit_reduced_keys(times, values, curve_starts, np.concatenate(tolerance_arrays))
+
+    for fcurve, arrays, start, length, factor, channel_type in zip(fcurves, curve_arrays, curve_starts, lengths, factors, channel_types):
+        curve_kept = kept[start:start + length]
+        write_keyframe_arrays(fcurve, reduced_keyframe_arrays(arrays, curve_kept, slopes[start:start + length], bezier, aligned))
+        curve_error = float(error[start:start + length].max()) * factor
+        stats["max_error"][channel_type] = max(stats["max_error"][channel_type], curve_error)
+
+    stats["keys_before"] = int(lengths.sum())
+    stats["keys_after"] = int(kept.sum())
+    stats["curves"] = len(fcurves)
+    return stats
+
+def format_reduction_stats(stats):
+    ratio = stats["keys_before"] / max(stats["keys_after"], 1)
+    max_error = stats["max_error"]
+    return (f"Reduced {stats['keys_before']} keys to {stats['keys_after']} ({ratio:.1f}x) on {stats['curves']} curves, "
+            f"max error: location {max_error['location']:.4f}, rotation {max_error['rotation']:.3f}°, scale {max_error['scale']:.4f}")
+
+
+class ReduceBakedKeysOperator(bpy.types.Operator):
+    bl_idname = "object.reduce_baked_keys"
+    bl_label = "Reduce Baked Keys"
+    bl_description = "Removes redundant keys from the baked curves of the selected bones (or every bone if none are selected) and fits Bezier handles to the remaining keys, within the chosen tolerances."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        armature = context.object
+        if armature is None or armature.type != 'ARMATURE' or armature.animation_data is None or armature.animation_data.action is None:
+            self.report({'ERROR'}, "No active armature or animation data found.")
+            return {'CANCELLED'}
+
+        bone_names = get_selected_bone_names(armature)
+        if not bone_names:
+            bone_names = [bone.name for bone in armature.pose.bones]
+
+        snapshot_bone_curves(context, "Reduce Baked Keys", [(armature.animation_data.action, armature, bone_names)])
+        stats = reduce_bone_keys(context.scene, armature.animation_data.action, armature, bone_names)
+        if not stats["curves"]:
+            self.report({'WARNING'}, "No baked curves to reduce.")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, format_reduction_stats(stats))
+        return {'FINISHED'}
+
+# ----------------------------- Loopify Physics Operator -----------------------------
+
+def sample_loop_channels(index, bone_names, frames):
+    """Reads the keyed curves of the bones and their values on every frame.
+
+    Returns a list of (bone name, property, array index, fcurve, key arrays) and a (channels, frames) value array."""
+    channels = []
+    for bone_name in bone_names:
+        for prop, array_index, curve_index in index.bone_entries.get(bone_name, ()):
+            fcurve = index.curves_coll[curve_index]
+            if len(fcurve.keyframe_points):
+                channels.append((bone_name, prop, array_index, fcurve, read_keyframe_arrays(fcurve)))
+    values = np.array([keyframe_values_at(fcurve, arrays, frames) for _bone, _prop, _index, fcurve, arrays in channels]).reshape(len(channels), len(frames))
+    return channels, values
+
+def crossfade_loop_channels(channels, values, frames, frame_selection, frame_easing, new_key_defaults):
+    """Crossfades the easing range of every channel toward the loop pose and keys the loop pose on the paste frame.
+
+    Quaternion rotations are slerped per bone, every other channel is blended linearly. All channels are blended at once.
+    Returns the (fcurve, key arrays) pairs to write."""
+    start_frame, end_frame = int(frames[0]), int(frames[-1])
+    copy_frame, delete_range_start, delete_range_end, paste_frame = loopify_frame_range(start_frame, end_frame, frame_selection, frame_easing)
+    window = (frames >= delete_range_start) & (frames <= delete_range_end)
+    weights = loop_blend_weights(frames[window], delete_range_start, delete_range_end, frame_selection)
+    target = values[:, copy_frame - start_frame]
+
+    blended = crossfade_loop_values(values[:, window], weights, target)
+    paste_values = target.copy()
+
+    quaternion_rows = {}
+    for row, (bone_name, prop, array_index, _fcurve, _arrays) in enumerate(channels):
+        if prop == "rotation_quaternion":
+            quaternion_rows.setdefault(bone_name, {})[array_index] = row
+    groups = np.array([[rows[i] for i in range(4)] for rows in quaternion_rows.values() if len(rows) == 4], dtype=np.int64).reshape(-1, 4)
+    if len(groups):
+        quaternions, paste_quaternions = crossfade_loop_quaternions(values[groups][:, :, window].transpose(0, 2, 1), weights, target[groups], frame_selection)
+        blended[groups] = quaternions.transpose(0, 2, 1)
+        paste_values[groups] = paste_quaternions
+
+    key_frames = np.append(frames[window], paste_frame)
+    return [(fcurve, set_keyframe_values(arrays, key_frames, np.append(blended[row], paste_values[row]), new_key_defaults))
+            for row, (_bone_name, _prop, _array_index, fcurve, arrays) in enumerate(channels)]
+
+def read_loopify_edit(context, index, start_frame, end_frame, bone_names):
+    """Reads the loopify settings and the bones' keyed curves (and, for crossfade or the loop point search, their
+    values on every frame) on the main thread. Returns None if the bones have no keys."""
+    scene = context.scene
+    plan = {
+        "start_frame": start_frame,
+        "end_frame": end_frame,
+        "frame_selection": scene.frame_selection,
+        "frame_easing": scene.loopify_frame_easing,
+        "loopify_mode": scene.loopify_mode,
+        "auto_easing": scene.loopify_auto_easing,
+        "defaults": new_keyframe_defaults(context),
+    }
+    if plan["loopify_mode"] == 'CROSSFADE' or plan["auto_easing"]:
+        plan["frames"] = np.arange(start_frame, end_frame + 1)
+        plan["channels"], plan["values"] = sample_loop_channels(index, bone_names, plan["frames"])
+    else:
+        plan["channels"] = [(None, None, None, fcurve, read_keyframe_arrays(fcurve))
+                            for fcurve in index.curves_for_bones(bone_names) if len(fcurve.keyframe_points)]
+    return plan if plan["channels"] else None
+
+def compute_loopify_edit(plan):
+    """Loops the curves read by read_loopify_edit. Only touches arrays, so it can run off the main thread.
+
+    Returns the (fcurve, key arrays) pairs to write, the frame easing used and the loop frame range
+    (copy frame, delete range start, delete range end, paste frame)."""
+    start_frame, end_frame = plan["start_frame"], plan["end_frame"]
+    frame_selection, frame_easing = plan["frame_selection"], plan["frame_easing"]
+    if plan["auto_easing"]:
+        # Frame Easing is the longest easing searched
+        values = plan["values"]
+        copy_frame = loopify_frame_range(start_frame, end_frame, frame_selection, frame_easing)[0]
+        frame_easing = find_best_loop_easing(values, values[:, copy_frame - start_frame], frame_selection, frame_easing)
+    loop_range = loopify_frame_range(start_frame, end_frame, frame_selection, frame_easing)
+
+    if plan["loopify_mode"] == 'CROSSFADE':
+        # Blend the easing range toward the loop pose, every selected curve at once
+        edits = crossfade_loop_channels(plan["channels"], plan["values"], plan["frames"], frame_selection, frame_easing, plan["defaults"])
+    else:
+        # Delete the easing range and paste the copied key, one bulk rewrite per curve
+        edits = []
+        for _bone_name, _prop, _array_index, fcurve, arrays in plan["channels"]:
+            looped = loopify_keyframe_arrays(arrays, *loop_range, plan["defaults"])
+            if looped is not None:
+                edits.append((fcurve, looped))
+    return edits, frame_easing, loop_range
+
+def loopify_bones(context, index, start_frame, end_frame, bone_names):
+    """Loops the curves of the bones over the frame range with the scene's loopify settings.
+
+    Returns the frame easing used, or None if the bones have no keys."""
+    plan = read_loopify_edit(context, index, start_frame, end_frame, bone_names)
+    if plan is None:
+        return None
+    edits, frame_easing, (copy_frame, delete_range_start, delete_range_end, paste_frame) = compute_loopify_edit(plan)
+    profile_note(loopify_mode=plan["loopify_mode"], frame_selection=plan["frame_selection"], frame_easing=frame_easing,
+                 copy_frame=copy_frame, delete_range=[delete_range_start, delete_range_end], paste_frame=paste_frame)
+    write_curve_edits(edits)
+    return frame_easing
+
+class LoopifyPhysicsOperator(bpy.types.Operator):
+    bl_idname = "object.loopify_physics"
+    bl_label = "Loopify Physics"
+    bl_description = "Deletes the front or back of the animation's physics and inserts the opposite side's last or first frame of physics bones, making the animation loop seamlessly. The more frame easing there is, the more frames are deleted, at the cost of less precise physics for a longer portion of the animation. This is the final step for looping animations."
+    bl_options = {'REGISTER'}
+
+    # Use the frame easing defined in the scene properties
+    @profiled_execute
+    def execute(self, context):
+        armature = context.object
+
+        # Ensure we are in Pose Mode
+        if bpy.context.mode != 'POSE':
+            bpy.ops.object.mode_set(mode='POSE')
+
+        # Get the action
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+        index = get_fcurve_index(action, armature)
+        if index is None:
+            self.report({'ERROR'}, "No curves collection found.")
+            return {'CANCELLED'}
+
+        frame_range = action.frame_range
+        start_frame = int(frame_range[0])
+        end_frame = int(frame_range[1])
+
+        # Get selected bones
+        selected_bones = get_selected_bone_names(armature)
+        if not selected_bones:
+            self.report({'ERROR'}, "No bones selected.")
+            return {'CANCELLED'}
+        profile_note(selected_bones=len(selected_bones))
+
+        snapshot_bone_curves(context, "Loopify Physics", [(action, armature, selected_bones)])
+        frame_easing = loopify_bones(context, index, start_frame, end_frame, selected_bones)
+        if frame_easing is None:
+            self.report({'ERROR'}, "The selected bones have no keys.")
+            return {'CANCELLED'}
+
+        if context.scene.loopify_auto_easing:
+            self.report({'INFO'}, f"Best loop point found with {frame_easing} frames of easing.")
+        return {'FINISHED'}
+
+# ----------------------------- Scene-Wide Operators -----------------------------
+
+def is_vrm_armature(obj):
+    return obj.type == 'ARMATURE' and hasattr(obj.data, "vrm_addon_extension")
+
+def get_scene_armatures(context, scope):
+    """Returns the VRM armatures the scene-wide operators work on: the selected ones or every one in the scene.
+
+    Without any VRM armature (e.g. the VRM add-on isn't installed), every armature of the scope is used."""
+    if scope == 'SELECTED':
+        objects = context.selected_objects
+    else:
+        objects = context.scene.objects
+    armatures = [obj for obj in objects if obj.type == 'ARMATURE']
+    vrm_armatures = [obj for obj in armatures if is_vrm_armature(obj)]
+    return vrm_armatures or armatures
+
+def get_active_action(armature):
+    anim_data = armature.animation_data
+    return anim_data.action if anim_data is not None else None
+
+
+class ToggleSceneSpringBonePhysicsOperator(bpy.types.Operator):
+    bl_idname = "object.toggle_scene_spring_bone_physics"
+    bl_label = "Enable/Disable Spring Bone Physics (All Armatures)"
+    bl_description = "Enables the VRM Spring Bone Physics of every target armature, or disables it if it is already enabled on all of them."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled_execute
+    def execute(self, context):
+        armatures = [armature for armature in get_scene_armatures(context, context.scene.scene_armature_scope) if is_vrm_armature(armature)]
+        if not armatures:
+            self.report({'ERROR'}, "No VRM armatures found.")
+            return {'CANCELLED'}
+
+        enabled = not all(getattr(armature.data.vrm_addon_extension.spring_bone1, 'enable_animation', False) for armature in armatures)
+        for armature in armatures:
+            armature.data.vrm_addon_extension.spring_bone1.enable_animation = enabled
+        context.scene.vrm_spring_bone_physics_enabled = enabled
+
+        status = "enabled" if enabled else "disabled"
+        self.report({'INFO'}, f"VRM Spring Bone Physics {status} on {len(armatures)} armatures.")
+        return {'FINISHED'}
+
+
+class SelectScenePhysicsBonesOperator(bpy.types.Operator):
+    bl_idname = "object.select_scene_physics_bones"
+    bl_label = "Select Physics Bones (All Armatures)"
+    bl_description = "Selects the physics bones of every target armature."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @profiled_execute
+    def execute(self, context):
+        armatures = get_scene_armatures(context, context.scene.scene_armature_scope)
+        if not armatures:
+            self.report({'ERROR'}, "No armatures found.")
+            return {'CANCELLED'}
+
+        selected = 0
+        try:
+            for armature in armatures:
+                bone_set = get_physics_bone_set(armature, context.scene)
+                select_bone_mask(armature, bone_set.mask)
+                selected += len(bone_set.bone_names)
+        except re.error as e:
+            self.report({'ERROR'}, f"Invalid physics bone pattern: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Selected {selected} physics bones on {len(armatures)} armatures.")
+        return {'FINISHED'}
+
+
+class DeleteSceneHighlightedBonesOperator(bpy.types.Operator):
+    bl_idname = "object.delete_scene_highlighted_bones"
+    bl_label = "Delete Highlighted Bones from Animation (All Armatures)"
+    bl_description = "Removes the selected bones of every target armature from its current animation."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        armatures = get_scene_armatures(context, context.scene.scene_armature_scope)
+        snapshot = KeyframeSnapshot("Delete Highlighted Bones (All Armatures)")
+        removed = 0
+        edited = 0
+        for armature in armatures:
+            action = get_active_action(armature)
+            selected_bones = get_selected_bone_names(armature)
+            if action is None or not selected_bones:
+                continue
+            index = get_fcurve_index(action, armature)
+            if index is None:
+                continue
+            snapshot.add_target(action, armature, selected_bones)
+            removed += delete_bone_curves(index, selected_bones)
+            edited += 1
+
+        if not edited:
+            self.report({'WARNING'}, "No animated armatures with selected bones found.")
+            return {'CANCELLED'}
+        store_keyframe_snapshot(context, snapshot)
+        self.report({'INFO'}, f"Removed {removed} curves from {edited} armatures.")
+        return {'FINISHED'}
+
+
+class SceneBakeOperator(bpy.types.Operator):
+    bl_idname = "object.adjust_playback_and_bake_scene"
+    bl_label = "Adjust Playback Range and Bake Animation (All Armatures)"
+    bl_description = "Bakes every target armature in a single pass over the timeline: each frame is evaluated once and the bones of all armatures are sampled together."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        scene = context.scene
+
+        if bpy.context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        targets = []
+        setups = {}
+        try:
+            for armature in get_scene_armatures(context, scene.scene_armature_scope):
+                action = get_active_action(armature)
+                if action is None:
+                    continue
+                if scene.bake_mode == 'PHYSICS_ONLY':
+                    bone_names = get_physics_bone_names(armature, scene)
+                elif scene.bake_mode == 'SOLVER':
+                    setups[armature.name] = SpringBoneSetup(armature)
+                    bone_names = setups[armature.name].joint_names
+                else:
+                    bone_names = [bone.name for bone in armature.pose.bones]
+                if bone_names:
+                    targets.append((armature, action, bone_names, int(action.frame_range[1])))
+        except re.error as e:
+            self.report({'ERROR'}, f"Invalid physics bone pattern: {e}")
+            return {'CANCELLED'}
+        except AttributeError:
+            self.report({'ERROR'}, "VRM Spring Bone system not available.")
+            return {'CANCELLED'}
+
+        if not targets:
+            self.report({'ERROR'}, "No animated armatures with bones to bake found.")
+            return {'CANCELLED'}
+
+        snapshot_bone_curves(context, "Adjust Playback & Bake All",
+                             [(action, armature, None if scene.bake_mode == 'FULL' else bone_names) for armature, action, bone_names, _end_frame in targets])
+
+        # The playback range covers the longest action, every armature is keyed up to its own last frame
+        final_frame = max(target[3] for target in targets)
+        scene.frame_end = final_frame
+        armatures = [target[0] for target in targets]
+        if setups:
+            # The built-in solver needs the driving bones without the VRM add-on's physics
+            samples = sample_spring_drivers(context, armatures, 1, final_frame)
+        else:
+            samples = [(matrices, None) for matrices in sample_armatures_pose_matrices(context, armatures, 1, final_frame)]
+
+        stats = []
+        for (armature, action, bone_names, end_frame), (matrices, world_matrices) in zip(targets, samples):
+            if setups:
+                basis_matrices = solve_spring_basis(scene, armature, setups[armature.name], matrices[:end_frame], world_matrices[:end_frame], self)
+            else:
+                basis_matrices = pose_to_basis_matrices(armature, matrices[:end_frame], bone_names)
+            write_baked_bones(context, armature, action, basis_matrices, range(1, end_frame + 1))
+            if scene.reduce_after_bake:
+                stats.append(reduce_bone_keys(scene, action, armature, bone_names))
+
+        message = f"Playback range adjusted to frame {final_frame} and {len(targets)} armatures baked."
+        if stats:
+            message += f" Reduced {sum(s['keys_before'] for s in stats)} keys to {sum(s['keys_after'] for s in stats)}."
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+
+class LoopifySceneOperator(bpy.types.Operator):
+    bl_idname = "object.loopify_physics_scene"
+    bl_label = "Loopify Physics (All Armatures)"
+    bl_description = "Loopifies the selected bones of every target armature's current animation with the Loopify settings."
+    bl_options = {'REGISTER'}
+
+    @profiled_execute
+    def execute(self, context):
+        snapshot = KeyframeSnapshot("Loopify Physics All")
+        edited = 0
+        for armature in get_scene_armatures(context, context.scene.scene_armature_scope):
+            action = get_active_action(armature)
+            selected_bones = get_selected_bone_names(armature)
+            if action is None or not selected_bones:
+                continue
+            index = get_fcurve_index(action, armature)
+            if index is None:
+                continue
+            snapshot.add_target(action, armature, selected_bones)
+            if loopify_bones(context, index, int(action.frame_range[0]), int(action.frame_range[1]), selected_bones) is not None:
+                edited += 1
+
+        if not edited:
+            self.report({'WARNING'}, "No animated armatures with selected bones found.")
+            return {'CANCELLED'}
+        store_keyframe_snapshot(context, snapshot)
+        self.report({'INFO'}, f"Loopified {edited} armatures.")
+        return {'FINISHED'}
+
+# ----------------------------- Action Library Queue -----------------------------
+
+library_queue_steps = ("SPACING", "BAKE", "LOOPIFY")
+
+class LibraryQueueEntry(bpy.types.PropertyGroup):
+    action_name: bpy.props.StringProperty(name="Action")
+    status: bpy.props.EnumProperty(
+        name="Status",
+        items=[
+            ('PENDING', "Pending", "Not processed yet"),
+            ('DONE', "Done", "Every step succeeded"),
+            ('FAILED', "Failed", "A step failed, Resume retries the steps that didn't run"),
+        ],
+        default='PENDING'
+    )
+    completed_steps: bpy.props.StringProperty(name="Completed Steps", description="Comma separated steps already applied to the action")
+    message: bpy.props.StringProperty(name="Message")
+    seconds: bpy.props.FloatProperty(name="Seconds")
+
+def get_library_queue_actions(armature, scene):
+    """Returns the armature's actions (active, NLA strips and every action animating its bones) matching the filter,
+    leaving out the additive spacing layers."""
+    actions = get_armature_actions(armature, 'ARMATURE')
+    track = armature.animation_data.nla_tracks.get(spacing_track_name) if armature.animation_data is not None else None
+    if track is not None:
+        layers = {strip.action for strip in track.strips}
+        actions = [action for action in actions if action not in layers]
+    patterns = [pattern.strip().lower() for pattern in scene.library_queue_filter.split(",") if pattern.strip()]
+    if patterns:
+        actions = [action for action in actions if any(fnmatch.fnmatchcase(action.name.lower(), pattern) for pattern in patterns)]
+    return actions
+
+def assign_action(armature, action):
+    """Makes the action the armature's active action, picking its slot for layered actions."""
+    anim_data = armature.animation_data or armature.animation_data_create()
+    anim_data.action = action
+    if action is not None and hasattr(anim_data, "action_slot") and anim_data.action_slot is None:
+        slot = find_action_slot(action, armature)
+        if slot is not None:
+            anim_data.action_slot = slot
+
+def run_queue_stage(jobs, read, compute, write, workers, timings, fail):
+    """Runs one queue step over the jobs: read on the main thread, compute in a thread pool, write back in order
+    on the main thread.
+
+    At most twice the worker count of jobs are in flight, so the key arrays of the whole library are never held
+    at once. A job whose read, compute or write raises is passed to fail with the error and the others go on."""
+    def timed_compute(data):
+        start = time.perf_counter()
+        return compute(data), time.perf_counter() - start
+
+    def flush(job, future):
+        try:
+            result, seconds = future.result()
+            start = time.perf_counter()
+            write(job, result)
+            timings[job[0].action_name] += seconds + time.perf_counter() - start
+        except Exception as e:
+            fail(job, e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = []
+        for job in jobs:
+            start = time.perf_counter()
+            try:
+                data = read(job)
+            except Exception as e:
+                fail(job, e)
+                continue
+            timings[job[0].action_name] += time.perf_counter() - start
+            in_flight.append((job, pool.submit(timed_compute, data)))
+            if len(in_flight) >= 2 * workers:
+                flush(*in_flight.pop(0))
+        for job, future in in_flight:
+            flush(job, future)
+
+class ProcessActionLibraryOperator(bpy.types.Operator):
+    bl_idname = "object.process_action_library"
+    bl_label = "Process Action Library"
+    bl_description = "Applies the batch spacing, the physics bake and loopify to every action of the armature matching the filter, without switching actions by hand. The array work runs on several threads, the keys are written on the main thread"
+    bl_options = {'REGISTER'}
+
+    resume: bpy.props.BoolProperty(
+        name="Resume",
+        description="Only process the actions that failed or didn't run last time, skipping the steps they already completed",
+        default=False
+    )
+
+    @profiled_execute
+    def execute(self, context):
+        scene = context.scene
+        armature = context.object
+        if armature is None or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "No active armature found.")
+            return {'CANCELLED'}
+
+        steps = [step for step, enabled in zip(library_queue_steps, (scene.library_queue_spacing, scene.library_queue_bake, scene.library_queue_loopify)) if enabled]
+        if not steps:
+            self.report({'WARNING'}, "Enable at least one step to run.")
+            return {'CANCELLED'}
+        if "BAKE" in steps and scene.bake_mode == 'FULL':
+            self.report({'ERROR'}, "Full armature bakes can't be queued, use Physics Bones Only or the Built-in Spring Solver.")
+            return {'CANCELLED'}
+
+        # Sum every batch spacing edit per (bone, axis), like Adjust Spacing (Batch)
+        offsets = {}
+        for edit in scene.spacing_batch_edits:
+            bone_pair = next((bp for bp in bone_pairs if bp[0] == edit.bone_pair), None)
+            if bone_pair is not None:
+                add_spacing_offset(offsets, bone_pair[1], bone_pair[2], edit.space_value, edit.affect_left, edit.affect_right, edit.axis, armature.pose.bones)
+        if "SPACING" in steps and not offsets:
+            self.report({'WARNING'}, "The batch spacing list is empty.")
+            return {'CANCELLED'}
+
+        setup = None
+        if "BAKE" in steps and scene.bake_mode == 'SOLVER':
+            setup = get_spring_bone_setup(self, armature)
+            if setup is None:
+                return {'CANCELLED'}
+            bone_names = setup.joint_names
+        else:
+            try:
+                bone_names = get_physics_bone_names(armature, scene)
+            except re.error as e:
+                self.report({'ERROR'}, f"Invalid physics bone pattern: {e}")
+                return {'CANCELLED'}
+        if ("BAKE" in steps or "LOOPIFY" in steps) and not bone_names:
+            self.report({'ERROR'}, "No physics bones found.")
+            return {'CANCELLED'}
+
+        queue = scene.library_queue
+        if not self.resume or not len(queue):
+            queue.clear()
+            for action in get_library_queue_actions(armature, scene):
+                queue.add().action_name = action.name
+        jobs = []
+        for entry in queue:
+            if entry.status == 'DONE':
+                continue
+            entry.status = 'PENDING'
+            entry.message = ""
+            action = bpy.data.actions.get(entry.action_name)
+            if action is None:
+                entry.status = 'FAILED'
+                entry.message = "Action not found."
+                continue
+            jobs.append((entry, action))
+        if not jobs:
+            self.report({'WARNING'}, "No actions left to process.")
+            return {'CANCELLED'}
+
+        snapshot_bones = sorted(set(bone_names) | {bone_name for bone_name, _axis_index in offsets})
+        snapshot_bone_curves(context, "Process Action Library", [(action, armature, snapshot_bones) for _entry, action in jobs])
+
+        timings = {entry.action_name: 0.0 for entry, _action in jobs}
+        notes = {entry.action_name: [] for entry, _action in jobs}
+        failed = set()
+
+        def fail(job, error):
+            job[0].status = 'FAILED'
+            job[0].message = f"{error}"
+            failed.add(job[0].action_name)
+
+        def complete(job, step, note):
+            entry = job[0]
+            entry.completed_steps = ",".join(filter(None, (entry.completed_steps, step)))
+            notes[entry.action_name].append(note)
+
+        def pending(step):
+            return [job for job in jobs if job[0].action_name not in failed and step not in job[0].completed_steps.split(",")]
+
+        workers = scene.library_queue_threads
+        frame_range = get_spacing_frame_range(scene)
+        defaults = new_keyframe_defaults(context)
+
+        if "SPACING" in steps:
+            def write_spacing(job, result):
+                edits, applied = result
+                write_curve_edits(edits)
+                record_spacing_layer(job[1], applied, frame_range)
+                complete(job, "SPACING", f"{len(edits)} curves spaced")
+
+            run_queue_stage(pending("SPACING"),
+                            lambda job: read_spacing_edit(job[1], armature, offsets, frame_range),
+                            lambda data: (compute_spacing_edit(data[0], defaults), data[1]),
+                            write_spacing, workers, timings, fail)
+
+        if "BAKE" in steps:
+            # Baking steps the timeline with the action assigned, so it stays on the main thread, one action at a time
+            original_action = get_active_action(armature)
+            try:
+                for job in pending("BAKE"):
+                    entry, action = job
+                    start = time.perf_counter()
+                    try:
+                        assign_action(armature, action)
+                        final_frame = int(action.frame_range[1])
+                        if setup is not None:
+                            bake_spring_solver(context, armature, action, setup, 1, final_frame, self)
+                        else:
+                            bake_physics_bones(context, armature, action, bone_names, 1, final_frame)
+                        complete(job, "BAKE", f"baked to frame {final_frame}")
+                    except Exception as e:
+                        fail(job, e)
+                    timings[entry.action_name] += time.perf_counter() - start
+            finally:
+                assign_action(armature, original_action)
+
+        if "LOOPIFY" in steps:
+            def read_loopify(job):
+                index = get_fcurve_index(job[1], armature)
+                if index is None:
+                    raise RuntimeError("The action has no curves for this armature.")
+                return read_loopify_edit(context, index, int(job[1].frame_range[0]), int(job[1].frame_range[1]), bone_names)
+
+            def write_loopify(job, result):
+                if result is None:
+                    complete(job, "LOOPIFY", "no physics keys to loop")
+                    return
+                edits, frame_easing, _loop_range = result
+                write_curve_edits(edits)
+                complete(job, "LOOPIFY", f"looped with {frame_easing} frames of easing")
+
+            run_queue_stage(pending("LOOPIFY"), read_loopify, lambda plan: compute_loopify_edit(plan) if plan is not None else None,
+                            write_loopify, workers, timings, fail)
+
+        for entry, _action in jobs:
+            entry.seconds += timings[entry.action_name]
+            if entry.action_name not in failed:
+                entry.status = 'DONE'
+                entry.message = ", ".join(notes[entry.action_name]).capitalize() + "."
+
+        done = sum(1 for entry in queue if entry.status == 'DONE')
+        if failed:
+            self.report({'WARNING'}, f"Processed {done} of {len(queue)} actions, {len(failed)} failed. Press Resume to retry them.")
+        else:
+            self.report({'INFO'}, f"Processed {done} of {len(queue)} actions ({sum(timings.values()):.1f}s).")
+        return {'FINISHED'}
+
+# ----------------------------- VRM Animation Export -----------------------------
+
+# VRM humanoid bone names of the spacing bone pairs, as (left, right)
+bone_pair_humanoid_names = {
+    "SHOULDER": ("leftShoulder", "rightShoulder"),
+    "UPPER_ARM": ("leftUpperArm", "rightUpperArm"),
+    "LOWER_ARM": ("leftLowerArm", "rightLowerArm"),
+    "HANDS": ("leftHand", "rightHand"),
+    "UPPER_LEG": ("leftUpperLeg", "rightUpperLeg"),
+    "LOWER_LEG": ("leftLowerLeg", "rightLowerLeg"),
+    "FEET": ("leftFoot", "rightFoot"),
+    "TOES": ("leftToes", "rightToes"),
+    "SPINE": ("spine", None),
+    "CHEST": ("chest", None),
+    "UPPER_CHEST": ("upperChest", None),
+    "NECK": ("neck", None),
+    "HEAD": ("head", None),
+}
+
+# J_Bip_* humanoid bones the bone pairs don't cover
+humanoid_finger_names = {
+    "Thumb": ("ThumbMetacarpal", "ThumbProximal", "ThumbDistal"),
+    "Index": ("IndexProximal", "IndexIntermediate", "IndexDistal"),
+    "Middle": ("MiddleProximal", "MiddleIntermediate", "MiddleDistal"),
+    "Ring": ("RingProximal", "RingIntermediate", "RingDistal"),
+    "Little": ("LittleProximal", "LittleIntermediate", "LittleDistal"),
+}
+
+# Keys converted and written at once per channel, so long clips don't need every converted value in memory
+vrma_chunk_keys = 4096
+
+def get_humanoid_bone_names(armature):
+    """Returns {bone name: VRM humanoid bone name} for the J_Bip_* bones of the armature."""
+    mapping = {"J_Bip_C_Hips": "hips"}
+    for pair_id, bone_l, bone_r, _label, _has_pair in bone_pairs:
+        human_l, human_r = bone_pair_humanoid_names[pair_id]
+        mapping[bone_l] = human_l
+        if bone_r is not None:
+            mapping[bone_r] = human_r
+    for side, prefix in (("L", "left"), ("R", "right")):
+        for finger, names in humanoid_finger_names.items():
+            for segment, name in enumerate(names, start=1):
+                mapping[f"J_Bip_{side}_{finger}{segment}"] = prefix + name
+    bones = armature.data.bones
+    return {bone_name: human_name for bone_name, human_name in mapping.items() if bone_name in bones}
+
+def read_channel_samples(index, bone_name, prop, size, static_values):
+    """Reads the curves of a bone's vector property on every frame any of them has a key on, and on every frame of
+    the segments that aren't linear (Bezier, eased or stepped), without creating curves.
+
+    Returns the frames and a (frames, size) value array, or None if no component is keyed."""
+    fcurves = [index.find(bone_name, prop, component) for component in range(size)]
+    arrays = [read_keyframe_arrays(fcurve, ("co", "interpolation")) if fcurve is not None and len(fcurve.keyframe_points) else None
+              for fcurve in fcurves]
+    keyed = [(curve_arrays["co"][:, 0], curve_arrays["interpolation"]) for curve_arrays in arrays if curve_arrays is not None]
+    if not keyed:
+        return None
+    # glTF samplers interpolate linearly, so curved segments are resampled on every frame
+    frames = linear_sample_frames(keyed, keyframe_enum_value("interpolation", 'LINEAR'))
+    values = np.empty((len(frames), size))
+    for component, (fcurve, curve_arrays) in enumerate(zip(fcurves, arrays)):
+        values[:, component] = keyframe_values_at(fcurve, curve_arrays, frames) if curve_arrays is not None else static_values[component]
+    return frames, values
+
+class GLBAccessorWriter:
+    """Streams float accessor data into a binary file, keeping the matching glTF bufferViews and accessors."""
+
+    def __init__(self, binary_file):
+        self.file = binary_file
+        self.length = 0
+        self.buffer_views = []
+        self.accessors = []
+
+    def write_accessor(self, chunks, count, accessor_type, bounds=None):
+        """Writes the chunks (arrays of float values) as one accessor and returns its index."""
+        offset = self.length
+        for chunk in chunks:
+            data = np.ascontiguousarray(chunk, dtype='<f4')
+            self.file.write(data.tobytes())
+            self.length += data.nbytes
+        self.buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": self.length - offset})
+        accessor = {"bufferView": len(self.buffer_views) - 1, "componentType": 5126, "count": count, "type": accessor_type}
+        if bounds is not None:
+            accessor["min"], accessor["max"] = bounds
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+def write_glb(filepath, gltf, binary_file, binary_length):
+    """Writes a binary glTF file: the JSON chunk, then the binary chunk copied from binary_file in blocks."""
+    gltf["buffers"] = [{"byteLength": binary_length}]
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    binary_padding = -binary_length % 4
+    total_length = 12 + 8 + len(json_chunk) + 8 + binary_length + binary_padding
+
+    with open(filepath, "wb") as output:
+        output.write(struct.pack("<III", 0x46546C67, 2, total_length))  # "glTF", version 2
+        output.write(struct.pack("<II", len(json_chunk), 0x4E4F534A))  # "JSON"
+        output.write(json_chunk)
+        output.write(struct.pack("<II", binary_length + binary_padding, 0x004E4942))  # "BIN"
+        binary_file.seek(0)
+        shutil.copyfileobj(binary_file, output, 1 << 20)
+        output.write(b"\0" * binary_padding)
+
+def export_vrm_animation(context, armature, action, filepath):
+    """Writes the action's humanoid bone curves to a VRM Animation (.vrma, binary glTF) file, straight from the keys.
+
+    Humanoid nodes are written at rest with identity rotations, so each key's rotation is the bone's basis rotation
+    in armature axes; the hips also get their location. Key times come from the curves (no scene evaluation) and are
+    played back with linear interpolation, so the curves' non-linear segments are sampled on every frame.
+    Returns (channels written, keys written)."""
+    scene = context.scene
+    index = get_fcurve_index(action, armature)
+    humanoid = get_humanoid_bone_names(armature)
+    bones = armature.data.bones
+    rest_buffer = np.empty(len(bones) * 16, dtype=np.float32)
+    bones.foreach_get("matrix_local", rest_buffer)
+    rest = dict(zip((bone.name for bone in bones), blender_matrices_to_numpy(rest_buffer, len(bones))))
+
+    # Humanoid nodes, each parented to its closest humanoid ancestor
+    names = [bone.name for bone in bones if bone.name in humanoid]
+    node_index = {name: i for i, name in enumerate(names)}
+    parents = {}
+    for name in names:
+        parent = bones[name].parent
+        while parent is not None and parent.name not in node_index:
+            parent = parent.parent
+        parents[name] = parent.name if parent is not None else None
+    nodes, roots = [], []
+    for name in names:
+        head = rest[name][:3, 3]
+        offset = head - rest[parents[name]][:3, 3] if parents[name] is not None else head
+        nodes.append({"name": name, "translation": blender_to_gltf_vectors(offset).tolist()})
+    for name in names:
+        if parents[name] is None:
+            roots.append(node_index[name])
+        else:
+            nodes[node_index[parents[name]]].setdefault("children", []).append(node_index[name])
+
+    fps = scene.render.fps / scene.render.fps_base
+    frame_start = action.frame_range[0]
+    channels, samplers = [], []
+    key_count = 0
+    with tempfile.TemporaryFile() as binary_file:
+        writer = GLBAccessorWriter(binary_file)
+
+        def add_channel(name, path, frames, output_chunks, output_type):
+            # The bounds must equal the stored float32 times
+            times = ((frames - frame_start) / fps).astype(np.float32)
+            chunks = (times[start:start + vrma_chunk_keys] for start in range(0, len(times), vrma_chunk_keys))
+            input_accessor = writer.write_accessor(chunks, len(times), "SCALAR", ([float(times[0])], [float(times[-1])]))
+            output_accessor = writer.write_accessor(output_chunks, len(times), output_type)
+            samplers.append({"input": input_accessor, "output": output_accessor, "interpolation": "LINEAR"})
+            channels.append({"sampler": len(samplers) - 1, "target": {"node": node_index[name], "path": path}})
+
+        for name in names:
+            if index is None:
+                break
+            pose_bone = armature.pose.bones[name]
+            rest_rotation = matrix_to_quaternion(rest[name][:3, :3])
+            prop, size = rotation_channel(pose_bone.rotation_mode)
+            samples = read_channel_samples(index, name, prop, size, tuple(getattr(pose_bone, prop)))
+            if samples is not None:
+                frames, values = samples
+
+                def rotation_chunks(values=values, rotation_mode=pose_bone.rotation_mode, rest_rotation=rest_rotation):
+                    previous = None
+                    for start in range(0, len(values), vrma_chunk_keys):
+                        rotations = conjugate_rotations(rest_rotation, rotation_keys_to_quaternions(values[start:start + vrma_chunk_keys], rotation_mode))
+                        # Keep consecutive keys in the same hemisphere, across chunk boundaries too
+                        if previous is not None:
+                            rotations = make_quaternions_compatible(np.concatenate([previous[None], rotations]))[1:]
+                        else:
+                            rotations = make_quaternions_compatible(rotations)
+                        previous = rotations[-1]
+                        yield blender_to_gltf_quaternions(rotations)
+
+                add_channel(name, "rotation", frames, rotation_chunks(), "VEC4")
+                key_count += len(frames)
+
+            if humanoid[name] == "hips":
+                samples = read_channel_samples(index, name, "location", 3, tuple(pose_bone.location))
+                if samples is not None:
+                    frames, values = samples
+
+                    def translation_chunks(values=values, rest_matrix=rest[name]):
+                        for start in range(0, len(values), vrma_chunk_keys):
+                            # The location is in the bone's rest axes, offset from its rest head
+                            location = values[start:start + vrma_chunk_keys] @ rest_matrix[:3, :3].T + rest_matrix[:3, 3]
+                            yield blender_to_gltf_vectors(location)
+
+                    add_channel(name, "translation", frames, translation_chunks(), "VEC3")
+                    key_count += len(frames)
+
+        if not channels:
+            return 0, 0
+
+        gltf = {
+            "asset": {"version": "2.0", "generator": f"{bl_info['name']} {'.'.join(map(str, bl_info['version']))}"},
+            "extensionsUsed": ["VRMC_vrm_animation"],
+            "extensions": {"VRMC_vrm_animation": {
+                "specVersion": "1.0",
+                "humanoid": {"humanBones": {humanoid[name]: {"node": node_index[name]} for name in names}},
+            }},
+            "scene": 0,
+            "scenes": [{"nodes": roots}],
+            "nodes": nodes,
+            "animations": [{"name": action.name, "channels": channels, "samplers": samplers}],
+            "bufferViews": writer.buffer_views,
+            "accessors": writer.accessors,
+        }
+        write_glb(filepath, gltf, binary_file, writer.length)
+    return len(channels), key_count
+
+class ExportVRMAnimationOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_vrm_animation"
+    bl_label = "Export VRM Animation"
+    bl_description = "Writes the active action's humanoid (J_Bip) bone keys to a VRM Animation (.vrma) file directly from the F-Curves, without re-sampling the scene on every frame"
+
+    filename_ext = ".vrma"
+    filter_glob: bpy.props.StringProperty(default="*.vrma;*.glb", options={'HIDDEN'})
+
+    @profiled_execute
     def execute(self, context):
         armature = context.object
-        anim_data = armature.animation_data
-
-        if bpy.context.mode != 'POSE':
-            self.report({'WARNING'}, "You must be in Pose Mode.")
+        action = get_active_action(armature) if armature is not None and armature.type == 'ARMATURE' else None
+        if action is None:
+            self.report({'ERROR'}, "No animation data found.")
             return {'CANCELLED'}
-
-        if not armature.pose.bones:
-            self.report({'WARNING'}, "No bones selected.")
+        if not get_humanoid_bone_names(armature):
+            self.report({'ERROR'}, "No J_Bip humanoid bones found.")
             return {'CANCELLED'}
 
-        if anim_data is None or anim_data.action is None:
-            self.report({'WARNING'}, "No animation data found.")
+        try:
+            channel_count, key_count = export_vrm_animation(context, armature, action, self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write the VRM Animation: {e}")
             return {'CANCELLED'}
-
-        curves_coll = get_action_curves(anim_data.action, armature)
-        if curves_coll is None:
-            self.report({'WARNING'}, "No curves collection found.")
+        if not channel_count:
+            self.report({'ERROR'}, "The humanoid bones have no rotation or hips location keys.")
             return {'CANCELLED'}
 
-        selected_bones = [bone.name for bone in armature.pose.bones if bone.bone.select]
-
-        if not selected_bones:
-            self.report({'WARNING'}, "No bones selected.")
-            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported {channel_count} channels ({key_count} keys) to {self.filepath}.")
+        return {'FINISHED'}
 
-        # Loop through selected bones and remove keyframes for all transformations
-        for bone_name in selected_bones:
-            fcurves = [fc for fc in curves_coll if fc.data_path.startswith(f'pose.bones["{bone_name}"]')]
-            for fcurve in fcurves:
-                curves_coll.remove(fcurve)
+def menu_func_export_vrma(self, context):
+    self.layout.operator(ExportVRMAnimationOperator.bl_idname, text="VRM Animation from Keys (.vrma)")
 
-        return {'FINISHED'}
+# ----------------------------- Modal Execution -----------------------------
 
+class ChunkedModalOperator:
+    """Runs an operator's work a chunk of frames per timer tick, with a progress bar and Esc to cancel.
 
-# Operator to toggle VRM Spring Bone Physics
-class ToggleVRMSpringBonePhysicsOperator(bpy.types.Operator):
-    bl_idname = "object.toggle_vrm_spring_bone_physics"
-    bl_label = "Enable/Disable VRM Spring Bone Physics"
-    bl_description = "Enable VRM Spring Bone Physics for baking; disable before creating looping animations."
-    bl_options = {'REGISTER', 'UNDO'}
+    Subclasses implement start (returns the number of frames to process, or None after reporting an error),
+    run_chunk (processes frames [first, last) of that count), finish (writes the result, returns the report
+    message) and rollback (undoes the partial writes)."""
 
-    def execute(self, context):
-        # Locate the Armature in the scene
-        armature = None
-        for obj in bpy.context.scene.objects:
-            if obj.type == 'ARMATURE':
-                armature = obj
-                break
-        
-        if armature is None:
-            self.report({'ERROR'}, "No Armature object found in the scene.")
+    def invoke(self, context, event):
+        self.total = self.start(context)
+        if self.total is None:
             return {'CANCELLED'}
-        
-        # Set the Armature as the active object and select it
-        bpy.context.view_layer.objects.active = armature
-        armature.select_set(True)
-        
-        # Access the VRM Spring Bone settings
-        try:
-            # Toggle the spring bone physics status
-            vrm_module = armature.data.vrm_addon_extension  # Placeholder for actual VRM property path
-            enabled = not getattr(vrm_module.spring_bone1, 'enable_animation', False)
-            vrm_module.spring_bone1.enable_animation = enabled
-            
-            # Update the scene property to reflect the toggle status
-            context.scene.vrm_spring_bone_physics_enabled = enabled
+        self.done = 0
+        self.start_time = time.perf_counter()
+        wm = context.window_manager
+        wm.progress_begin(0, max(self.total, 1))
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.rollback(context)
+            self.end_modal(context)
+            self.report({'WARNING'}, f"Cancelled after {self.done} of {self.total} frames, the changes were rolled back.")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
 
-            status = "enabled" if enabled else "disabled"
-            self.report({'INFO'}, f"VRM Spring Bone Physics {status}.")
+        self.step(context)
+        context.window_manager.progress_update(self.done)
+        if self.done < self.total:
+            return {'RUNNING_MODAL'}
 
-        except AttributeError:
-            self.report({'ERROR'}, "VRM Spring Bone system not available.")
-            return {'CANCELLED'}
+        self.end_modal(context)
+        return self.complete(context)
 
+    @profiled_execute
+    def execute(self, context):
+        # Without a window (scripts, background mode) the whole range runs at once
+        self.total = self.start(context)
+        if self.total is None:
+            return {'CANCELLED'}
+        self.done = 0
+        self.start_time = time.perf_counter()
+        while self.done < self.total:
+            self.step(context)
+        return self.complete(context)
+
+    def step(self, context):
+        last = min(self.done + max(context.scene.modal_chunk_frames, 1), self.total)
+        self.run_chunk(context, self.done, last)
+        self.done = last
+
+    def complete(self, context):
+        message = self.finish(context)
+        elapsed = time.perf_counter() - self.start_time
+        self.report({'INFO'}, f"{message} ({self.total} frames in {elapsed:.1f}s, {self.total / max(elapsed, 1e-6):.1f} frames/s)")
         return {'FINISHED'}
 
-    
-class AdjustPlaybackAndBakeOperator(bpy.types.Operator):
-    bl_idname = "object.adjust_playback_and_bake"
-    bl_label = "Adjust Playback Range and Bake Animation"
-    bl_description = "Bakes the hair physics into the animation and also changes the playback range of the scene to that of the animation. If you don't need a looping animation, this is the final step."
-    bl_options = {'REGISTER', 'UNDO'}
+    def end_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
 
-    def execute(self, context):
+
+class ModalBakeOperator(ChunkedModalOperator, bpy.types.Operator):
+    bl_idname = "object.adjust_playback_and_bake_modal"
+    bl_label = "Adjust Playback Range and Bake Animation (Modal)"
+    bl_description = "Bakes the animation like Adjust Playback & Bake, a few frames at a time so the interface stays responsive. Press Esc to cancel."
+    bl_options = {'REGISTER'}
+
+    def start(self, context):
         scene = context.scene
         armature = context.object
-
-        # Ensure we're in Object Mode
         if bpy.context.mode != 'OBJECT':
             bpy.ops.object.mode_set(mode='OBJECT')
 
-        # Get the action
-        anim_data = armature.animation_data
+        anim_data = armature.animation_data if armature is not None else None
         if anim_data is None or anim_data.action is None:
             self.report({'ERROR'}, "No animation data found.")
-            return {'CANCELLED'}
+            return None
+
+        self.setup = None
+        if scene.bake_mode == 'PHYSICS_ONLY':
+            try:
+                self.bone_names = get_physics_bone_names(armature, scene)
+            except re.error as e:
+                self.report({'ERROR'}, f"Invalid physics bone pattern: {e}")
+                return None
+            if not self.bone_names:
+                self.report({'ERROR'}, "No physics bones found.")
+                return None
+        elif scene.bake_mode == 'SOLVER':
+            self.setup = get_spring_bone_setup(self, armature)
+            if self.setup is None:
+                return None
+            self.bone_names = self.setup.joint_names
+        else:
+            # nla.bake can't be split into chunks, so every bone is sampled and keyed in bulk instead
+            self.bone_names = [bone.name for bone in armature.pose.bones]
+
+        self.armature_name = armature.name
+        self.action = anim_data.action
+        self.final_frame = int(self.action.frame_range[1])
+        self.original_frame = scene.frame_current
+
+        # A cache hit leaves no frames to simulate
+        self.cache_key, self.cached_basis = None, None
+        if scene.bake_mode == 'PHYSICS_ONLY':
+            self.cache_key, self.cached_basis = cached_physics_basis(scene, armature, self.action, self.bone_names, 1, self.final_frame)
+            if self.cached_basis is not None:
+                return 0
+
+        self.samples = np.empty((self.final_frame, len(armature.pose.bones) * 16), dtype=np.float32)
+        if self.setup is not None:
+            # The solver samples the driving bones with the VRM add-on's physics off, until finish or rollback
+            self.world_samples = np.empty((self.final_frame, 4, 4))
+            self.spring_animation = set_spring_animation([armature], False)
+        return self.final_frame
+
+    def run_chunk(self, context, first, last):
+        scene = context.scene
+        armature = bpy.data.objects[self.armature_name]
+        pose_bones = armature.pose.bones
+        for row in range(first, last):
+            set_scene_frame(scene, row + 1)
+            pose_bones.foreach_get("matrix", self.samples[row])
+            if self.setup is not None:
+                self.world_samples[row] = armature.matrix_world
+
+    def rollback(self, context):
+        # Nothing is written before the last chunk, only the frame (and the spring bone flag) has to be restored
+        set_scene_frame(context.scene, self.original_frame)
+        if self.setup is not None:
+            restore_spring_animation([bpy.data.objects[self.armature_name]], self.spring_animation)
+
+    def finish(self, context):
+        scene = context.scene
+        armature = bpy.data.objects[self.armature_name]
+        set_scene_frame(scene, self.original_frame)
+        scene.frame_end = self.final_frame
+
+        basis_matrices = self.cached_basis
+        if basis_matrices is None:
+            pose_matrices = self.samples.reshape(self.final_frame, -1, 4, 4).transpose(0, 1, 3, 2).astype(np.float64)
+            if self.setup is not None:
+                restore_spring_animation([armature], self.spring_animation)
+                basis_matrices = solve_spring_basis(scene, armature, self.setup, pose_matrices, self.world_samples, self)
+            else:
+                basis_matrices = pose_to_basis_matrices(armature, pose_matrices, self.bone_names)
+                store_physics_basis(scene, self.cache_key, basis_matrices)
+        snapshot_bone_curves(context, "Adjust Playback & Bake", [(self.action, armature, self.bone_names)])
+        write_baked_bones(context, armature, self.action, basis_matrices, range(1, self.final_frame + 1))
+
+        message = f"Playback range adjusted to frame {self.final_frame} and animation baked."
+        if scene.reduce_after_bake:
+            message += " " + format_reduction_stats(reduce_bone_keys(scene, self.action, armature, self.bone_names))
+        return message
+
+
+class ModalSpacingOperator(ChunkedModalOperator, bpy.types.Operator):
+    bl_idname = "object.adjust_spacing_modal"
+    bl_label = "Adjust Spacing (Modal)"
+    bl_description = "Adjusts the spacing like Adjust Spacing, a few frames at a time so the interface stays responsive. Press Esc to cancel and restore the keys."
+    bl_options = {'REGISTER'}
 
-        action = anim_data.action
+    def start(self, context):
+        scene = context.scene
+        armature = context.object
+        if not scene.affect_left_prop and not scene.affect_right_prop:
+            self.report({'WARNING'}, "You must select at least one bone (Left or Right) to adjust.")
+            return None
 
-        # Adjust playback range's final frame to match the final frame of the current action
-        final_frame = int(action.frame_range[1])
-        scene.frame_end = final_frame
+        if scene.spacing_mode == 'NLA_ADD':
+            self.report({'WARNING'}, "The additive layer only has one key per channel, use Adjust Spacing.")
+            return None
 
-        # Bake Animation
-        bpy.ops.object.mode_set(mode='POSE')  # Switch to Pose Mode
-        bpy.ops.nla.bake(
-            frame_start=1,
-            frame_end=final_frame,
-            bake_types={'POSE'},
-            visual_keying=True,
-            clear_constraints=False,
-            use_current_action=True,
-            only_selected=False
-        )
-        bpy.ops.object.mode_set(mode='OBJECT')  # Switch back to Object Mode
+        bone_pair = next((bp for bp in bone_pairs if bp[0] == scene.selected_bone_pair), None)
+        if bone_pair is None:
+            self.report({'ERROR'}, "Invalid bone pair selected.")
+            return None
 
-        self.report({'INFO'}, f"Playback range adjusted to frame {final_frame} and animation baked.")
-        return {'FINISHED'}
-    
-# ----------------------------- Loopify Physics Operator -----------------------------
-class LoopifyPhysicsOperator(bpy.types.Operator):
-    bl_idname = "object.loopify_physics"
-    bl_label = "Loopify Physics"
-    bl_description = "Deletes the front or back of the animation's physics and inserts the opposite side's last or first frame of physics bones, making the animation loop seamlessly. The more frame easing there is, the more frames are deleted, at the cost of less precise physics for a longer portion of the animation. This is the final step for looping animations."
-    bl_options = {'REGISTER', 'UNDO'}
+        action = get_active_action(armature) if armature is not None else None
+        index = get_fcurve_index(action, armature) if action is not None else None
+        if index is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return None
+
+        offsets = add_spacing_offset({}, bone_pair[1], bone_pair[2], scene.space_value_prop, scene.affect_left_prop,
+                                     scene.affect_right_prop and bone_pair[2] is not None, scene.spacing_axis, armature.pose.bones)
+
+        # The original keys are kept to restore them on cancel. The frames a component is missing are keyed with its
+        # current value up front, so each chunk only rotates and moves the keys inside it, and finish writes every
+        # curve once
+        self.action = action
+        self.armature_name = armature.name
+        self.frame_range = get_spacing_frame_range(scene)
+        defaults = new_keyframe_defaults(context)
+        bone_names = sorted({bone_name for bone_name, _axis_index in offsets})
+        existing = {(fcurve.data_path, fcurve.array_index) for fcurve in index.curves_for_bones(bone_names)}
+        # Snapshotted before reading, which creates the rotation curves a bone is missing
+        self.snapshot = snapshot_bone_curves(context, "Adjust Spacing", [(action, armature, bone_names)])
+        self.bones = []
+        self.created = set()
+        bones, self.applied = read_spacing_edit(action, armature, offsets, self.frame_range)
+        for channels, frames, values, rotation_mode, quaternion in bones:
+            working, rows = [], []
+            for component, (fcurve, arrays) in enumerate(channels):
+                if (fcurve.data_path, fcurve.array_index) not in existing:
+                    self.created.add((fcurve.data_path, fcurve.array_index))
+                keyed = set_keyframe_values({prop: array.copy() for prop, array in arrays.items()}, frames, values[:, component], defaults)
+                if len(keyed["co"]) != len(arrays["co"]):
+                    write_keyframe_arrays(fcurve, keyed)
+                working.append(keyed)
+                rows.append(match_keyframes(keyed["co"][:, 0], frames))
+            self.bones.append((channels, frames, values, rotation_mode, quaternion, working, rows))
+
+        if self.frame_range is not None:
+            self.frame_start = self.frame_range[0]
+            return max(self.frame_range[1] - self.frame_range[0] + 1, 0)
+        self.frame_start = int(math.floor(action.frame_range[0]))
+        return int(math.ceil(action.frame_range[1])) - self.frame_start + 1
+
+    def run_chunk(self, context, first, last):
+        # Over the whole action, the outermost chunks are open-ended so keys outside its frame range are rotated too
+        whole_action = self.frame_range is None
+        frame_start = -math.inf if whole_action and first == 0 else self.frame_start + first
+        frame_end = math.inf if whole_action and last == self.total else self.frame_start + last
+        for channels, frames, values, rotation_mode, quaternion, working, rows in self.bones:
+            in_chunk = (frames >= frame_start) & (frames < frame_end)
+            if not in_chunk.any():
+                continue
+            deltas = rotate_spacing_keys(values[in_chunk], rotation_mode, quaternion) - values[in_chunk]
+            for component, (fcurve, _original) in enumerate(channels):
+                chunk_rows, delta = rows[component][in_chunk], deltas[:, component]
+                for prop in ("co", "handle_left", "handle_right"):
+                    working[component][prop][chunk_rows, 1] += delta
+                # The working arrays only differ from the curve in the chunk's keys and their handles
+                set_keyframe_positions(fcurve, working[component])
+
+    def rollback(self, context):
+        curves_coll = get_action_curves(self.action, bpy.data.objects[self.armature_name])
+        for channels, *_rest in self.bones:
+            for fcurve, original in channels:
+                if (fcurve.data_path, fcurve.array_index) in self.created:
+                    # The curve didn't exist before the run
+                    curves_coll.remove(fcurve)
+                else:
+                    write_keyframe_arrays(fcurve, original)
+        discard_keyframe_snapshot(self.snapshot)
+
+    def finish(self, context):
+        # One write per curve recalculates the handles, for the same result as Adjust Spacing
+        for channels, *_rest, working, _rows in self.bones:
+            for component, (fcurve, _original) in enumerate(channels):
+                write_keyframe_arrays(fcurve, working[component])
+        if self.applied:
+            record_spacing_layer(self.action, self.applied, self.frame_range)
+        return f"Spacing applied to {sum(len(channels) for channels, *_rest in self.bones)} curves."
 
-    # Use the frame easing defined in the scene properties
-    def execute(self, context):
-        armature = context.object
+# ----------------------- Track Pose Changes -----------------------
 
-        # Ensure we are in Pose Mode
-        if bpy.context.mode != 'POSE':
-            bpy.ops.object.mode_set(mode='POSE')
+class PoseTrackingState:
+    """Original pose and tracked deltas of every bone of the tracked armature, as flat arrays indexed like armature.pose.bones."""
+
+    def __init__(self, armature):
+        pose_bones = armature.pose.bones
+        self.armature_name = armature.name
+        self.bone_names = [bone.name for bone in pose_bones]
+        count = len(self.bone_names)
+        self.count = count
+
+        # armature.data.bones may be ordered differently from the pose bones
+        data_bone_index = {bone.name: i for i, bone in enumerate(armature.data.bones)}
+        self.select_order = np.array([data_bone_index[name] for name in self.bone_names], dtype=np.int64)
+        rotation_mode_items = bpy.types.PoseBone.bl_rna.properties["rotation_mode"].enum_items
+        self.rotation_mode_values = {item.value: item.identifier for item in rotation_mode_items}
+
+        self.seen = np.zeros(count, dtype=bool)
+        self.has_changes = np.zeros(count, dtype=bool)
+        self.original_location = np.zeros((count, 3))
+        self.original_rotation = np.tile([1.0, 0.0, 0.0, 0.0], (count, 1))
+        self.original_scale = np.zeros((count, 3))
+        self.delta_location = np.zeros((count, 3))
+        self.delta_rotation = np.tile([1.0, 0.0, 0.0, 0.0], (count, 1))  # Identity quaternions
+        self.delta_scale = np.zeros((count, 3))
+
+        # Reusable foreach_get buffers
+        self.select_buffer = np.zeros(count, dtype=bool)
+        self.location_buffer = np.empty(count * 3, dtype=np.float32)
+        self.quaternion_buffer = np.empty(count * 4, dtype=np.float32)
+        self.euler_buffer = np.empty(count * 3, dtype=np.float32)
+        self.scale_buffer = np.empty(count * 3, dtype=np.float32)
+        self.rotation_mode_buffer = np.empty(count, dtype=np.int32)
+
+    def read_pose(self, armature):
+        """Returns the location, rotation (as quaternions) and scale of every bone."""
+        pose_bones = armature.pose.bones
+        pose_bones.foreach_get("location", self.location_buffer)
+        pose_bones.foreach_get("rotation_quaternion", self.quaternion_buffer)
+        pose_bones.foreach_get("rotation_euler", self.euler_buffer)
+        pose_bones.foreach_get("scale", self.scale_buffer)
+        pose_bones.foreach_get("rotation_mode", self.rotation_mode_buffer)
+
+        rotation = self.quaternion_buffer.reshape(-1, 4).astype(np.float64)
+        euler = self.euler_buffer.reshape(-1, 3).astype(np.float64)
+        # Non-quaternion bones are tracked through their Euler rotation, in their own order (XYZ for axis-angle)
+        for value in np.unique(self.rotation_mode_buffer):
+            mode = self.rotation_mode_values[value]
+            if mode == 'QUATERNION':
+                continue
+            rows = self.rotation_mode_buffer == value
+            rotation[rows] = euler_to_quaternion(euler[rows], mode if mode in euler_order_axes else 'XYZ')
 
-        # Get the action
-        anim_data = armature.animation_data
-        if anim_data is None or anim_data.action is None:
-            self.report({'ERROR'}, "No animation data found.")
-            return {'CANCELLED'}
+        return self.location_buffer.reshape(-1, 3).astype(np.float64), rotation, self.scale_buffer.reshape(-1, 3).astype(np.float64)
 
-        action = anim_data.action
-        curves_coll = get_action_curves(action, armature)
-        if curves_coll is None:
-            self.report({'ERROR'}, "No curves collection found.")
-            return {'CANCELLED'}
+    def update(self, armature):
+        armature.data.bones.foreach_get("select", self.select_buffer)
+        selected = self.select_buffer[self.select_order]
+        if not selected.any():
+            return
 
-        frame_range = action.frame_range
-        start_frame = int(frame_range[0])
-        end_frame = int(frame_range[1])
+        location, rotation, scale = self.read_pose(armature)
 
-        # Get user input for frame selection and easing value from context
-        frame_selection = context.scene.frame_selection
-        frame_easing = context.scene.loopify_frame_easing  # Correctly fetching frame easing from the scene property
-
-        # Determine the copy frame and delete frame range based on user selection
-        if frame_selection == 'LAST_FRAME':
-            copy_frame = end_frame
-            delete_range_start = start_frame
-            delete_range_end = start_frame + frame_easing - 1
-            paste_frame = 0
-        else:  # 'FIRST_FRAME'
-            copy_frame = start_frame
-            delete_range_start = end_frame - frame_easing + 1
-            delete_range_end = end_frame
-            paste_frame = end_frame + 1
-
-        # Log debug information
-        print(f"Action Frame Range: {start_frame} to {end_frame}")
-        print(f"Frame Selection: {frame_selection}")
-        print(f"Frame Easing: {frame_easing}")
-        print(f"Copy Frame: {copy_frame}")
-        print(f"Delete Range: {delete_range_start} to {delete_range_end}")
-        print(f"Paste Frame: {paste_frame}")
+        # Newly selected bones only get their original pose recorded
+        new = selected & ~self.seen
+        self.original_location[new] = location[new]
+        self.original_rotation[new] = rotation[new]
+        self.original_scale[new] = scale[new]
+        self.seen |= new
 
-        # Get selected bones
-        selected_bones = [bone.name for bone in armature.pose.bones if bone.bone.select]
-        if not selected_bones:
-            self.report({'ERROR'}, "No bones selected.")
-            return {'CANCELLED'}
-        print(f"Selected Bones: {selected_bones}")
-
-        # Helper function to get F-Curves for selected bones
-        def get_selected_bone_fcurves():
-            fcurves = []
-            for fcurve in curves_coll:
-                if any(bone_name in fcurve.data_path for bone_name in selected_bones):
-                    fcurves.append(fcurve)
-            return fcurves
-
-        fcurves = get_selected_bone_fcurves()
-
-        # Collect keyframe data to copy
-        keyframe_data = {}
-        for fcurve in fcurves:
-            keyframe_data[fcurve] = {}
-            for keyframe in fcurve.keyframe_points:
-                if keyframe.co[0] == copy_frame:
-                    keyframe_data[fcurve][keyframe.co[0]] = keyframe.co[1]
-
-        # Delete keyframes within the delete range
-        for fcurve in fcurves:
-            for frame in range(delete_range_start, delete_range_end + 1):
-                keyframes_to_remove = [kf for kf in fcurve.keyframe_points if kf.co[0] == frame]
-                for keyframe in keyframes_to_remove:
-                    fcurve.keyframe_points.remove(keyframe)
-
-        # Insert keyframes at the paste position
-        for fcurve in fcurves:
-            for frame, value in keyframe_data.get(fcurve, {}).items():
-                fcurve.keyframe_points.insert(paste_frame, value, options={'FAST'})
-
-        # Re-delete the original delete range to clear any additional frames
-        for fcurve in fcurves:
-            for frame in range(delete_range_start, delete_range_end + 1):
-                keyframes_to_remove = [kf for kf in fcurve.keyframe_points if kf.co[0] == frame]
-                for keyframe in keyframes_to_remove:
-                    fcurve.keyframe_points.remove(keyframe)
+        rows = np.flatnonzero(selected & ~new)
+        if not rows.size:
+            return
 
-        return {'FINISHED'}
+        delta_location, delta_rotation, delta_scale, changed = pose_deltas(
+            location[rows], rotation[rows], scale[rows],
+            self.original_location[rows], self.original_rotation[rows], self.original_scale[rows])
+
+        # Store deltas only if there is meaningful change
+        rows = rows[changed]
+        self.delta_location[rows] = delta_location[changed]
+        self.delta_rotation[rows] = delta_rotation[changed]
+        self.delta_scale[rows] = delta_scale[changed]
+        self.has_changes[rows] = True
 
-# ----------------------- Track Pose Changes -----------------------
 
+@profiled("track_pose_changes")
 def track_pose_changes(scene, depsgraph):
     """Tracks changes in Pose Mode for selected bones only when recording is active."""
-    global tracked_changes, is_tracking
-
-    if not is_tracking:
+    if not is_tracking or tracked_changes is None:
         return  # Stop tracking if not in recording mode
 
-    armature = bpy.context.object
-    if not armature or armature.type != 'ARMATURE':
+    # Return early unless this update touched the tracked armature
+    if not depsgraph.id_type_updated('OBJECT') and not depsgraph.id_type_updated('ARMATURE'):
+        return
+    armature = bpy.data.objects.get(tracked_changes.armature_name)
+    if armature is None or armature.type != 'ARMATURE' or len(armature.pose.bones) != tracked_changes.count:
+        return
+    if not any(update.id.original in (armature, armature.data) for update in depsgraph.updates):
         return
 
-    try:
-        for bone in armature.pose.bones:
-            if not bone.bone.select:  # Only track selected bones
-                continue
-
-            bone_name = bone.name
-
-            # Initialize tracking for the selected bone
-            if bone_name not in tracked_changes:
-                tracked_changes[bone_name] = {
-                    "original_location": bone.location.copy(),
-                    "original_rotation": bone.rotation_quaternion.copy() if bone.rotation_mode == 'QUATERNION' else bone.rotation_euler.to_quaternion(),
-                    "original_scale": bone.scale.copy(),
-                    "delta_location": mathutils.Vector((0, 0, 0)),
-                    "delta_rotation": mathutils.Quaternion((1, 0, 0, 0)),  # Identity quaternion
-                    "delta_scale": mathutils.Vector((0, 0, 0)),
-                    "has_changes": False  # Flag to check if bone has changed
-                }
-                continue  # Skip computing deltas on the first frame
-
-            # Compute deltas (change from original pose)
-            original = tracked_changes[bone_name]
-
-            delta_loc = bone.location - original["original_location"]
-            
-            # Convert Euler to Quaternion if needed
-            current_rot = bone.rotation_quaternion if bone.rotation_mode == 'QUATERNION' else bone.rotation_euler.to_quaternion()
-            # Compute delta rotation
-            delta_rot = current_rot.rotation_difference(original["original_rotation"])
-
-            delta_scale = bone.scale - original["original_scale"]
-
-            # Store deltas only if there is meaningful change
-            if delta_loc.length > 0.0001 or delta_rot.angle > 0.0001 or delta_scale.length > 0.0001:
-                tracked_changes[bone_name]["delta_location"] = delta_loc
-                tracked_changes[bone_name]["delta_rotation"] = delta_rot
-                tracked_changes[bone_name]["delta_scale"] = delta_scale
-                tracked_changes[bone_name]["has_changes"] = True
+    # Frame changes during playback aren't edits
+    screen = bpy.context.screen
+    if screen is not None and screen.is_animation_playing:
+        return
 
+    try:
+        tracked_changes.update(armature)
     except Exception as e:
         print(f"Error in pose tracking: {e}")
 
@@ -454,6 +3356,7 @@ class StartListeningOperator(bpy.types.Operator):
     bl_label = "Start Tracking Pose Changes"
     bl_options = {'REGISTER'}
 
+    @profiled_execute
     def execute(self, context):
         global tracked_changes, is_tracking
 
@@ -464,7 +3367,7 @@ class StartListeningOperator(bpy.types.Operator):
             self.report({'ERROR'}, "No active armature found.")
             return {'CANCELLED'}
 
-        tracked_changes = {}  # Clear previous tracking
+        tracked_changes = PoseTrackingState(bpy.context.object)  # Clear previous tracking
         is_tracking = True  # Activate tracking
 
         if track_pose_changes not in bpy.app.handlers.depsgraph_update_post:
@@ -481,11 +3384,12 @@ class CancelTrackingOperator(bpy.types.Operator):
     bl_label = "Cancel Tracking"
     bl_options = {'REGISTER'}
 
+    @profiled_execute
     def execute(self, context):
         global tracked_changes, is_tracking
 
         is_tracking = False
-        tracked_changes.clear()  # Clear recorded data
+        tracked_changes = None  # Clear recorded data
 
         if track_pose_changes in bpy.app.handlers.depsgraph_update_post:
             bpy.app.handlers.depsgraph_update_post.remove(track_pose_changes)
@@ -499,11 +3403,73 @@ class CancelTrackingOperator(bpy.types.Operator):
 
 # ----------------------- Apply Tracked Changes -----------------------
 
+def read_channel_keys(curves_coll, data_path, size, group_name, frames, static_values):
+    """Reads the curves of a vector property on the given frames, creating the missing ones.
+
+    Returns the (fcurve, key arrays) of each component and a (frames, size) array of the property's values.
+    Components without keys take their value from static_values."""
+    channels = []
+    values = np.empty((len(frames), size))
+    for index in range(size):
+        fcurve = curves_coll.find(data_path, index=index)
+        if fcurve is None or not len(fcurve.keyframe_points):
+            values[:, index] = static_values[index]
+            fcurve = ensure_action_curve(curves_coll, data_path, index, group_name)
+            arrays = read_keyframe_arrays(fcurve)
+        else:
+            arrays = read_keyframe_arrays(fcurve)
+            values[:, index] = keyframe_values_at(fcurve, arrays, frames)
+        channels.append((fcurve, arrays))
+    return channels, values
+
+def write_channel_keys(channels, frames, values, defaults):
+    for index, (fcurve, arrays) in enumerate(channels):
+        write_keyframe_arrays(fcurve, set_keyframe_values(arrays, frames, values[:, index], defaults))
+
+def apply_tracked_deltas(context, armature, action, state, frames):
+    """Composes the tracked deltas onto every changed bone's keys on the given frames, without changing the scene frame.
+
+    Location and scale deltas are added, rotation deltas are multiplied onto the key rotation (converted from and back
+    to Euler for Euler bones). Unkeyed channels start from the pose recorded when tracking started.
+    Returns the number of bones changed."""
+    curves_coll = get_action_curves(action, armature)
+    defaults = new_keyframe_defaults(context)
+    frames = np.asarray(frames, dtype=np.float64)
+
+    applied = 0
+    for row in np.flatnonzero(state.has_changes):
+        bone_name = state.bone_names[row]
+        pose_bone = armature.pose.bones.get(bone_name)
+        if pose_bone is None:
+            continue
+        bone_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"]'
+
+        channels, location = read_channel_keys(curves_coll, f"{bone_path}.location", 3, bone_name, frames, state.original_location[row])
+        write_channel_keys(channels, frames, location + state.delta_location[row], defaults)
+
+        rotation_mode = pose_bone.rotation_mode
+        delta_rotation = state.delta_rotation[row]
+        original_rotation = state.original_rotation[row]
+        if rotation_mode == 'QUATERNION':
+            channels, rotation = read_channel_keys(curves_coll, f"{bone_path}.rotation_quaternion", 4, bone_name, frames, original_rotation)
+            write_channel_keys(channels, frames, apply_rotation_delta(delta_rotation, rotation, rotation_mode), defaults)
+        elif rotation_mode in euler_order_axes:
+            original_euler = quaternion_to_euler(original_rotation, rotation_mode)
+            channels, euler = read_channel_keys(curves_coll, f"{bone_path}.rotation_euler", 3, bone_name, frames, original_euler)
+            write_channel_keys(channels, frames, apply_rotation_delta(delta_rotation, euler, rotation_mode), defaults)
+
+        channels, scale = read_channel_keys(curves_coll, f"{bone_path}.scale", 3, bone_name, frames, state.original_scale[row])
+        write_channel_keys(channels, frames, scale + state.delta_scale[row], defaults)
+
+        applied += 1
+    return applied
+
+
 class ApplyTrackedChangesOperator(bpy.types.Operator):
     """Applies the recorded transformations to selected keyframes for selected bones."""
     bl_idname = "pose.apply_tracked_changes"
     bl_label = "Apply Tracked Changes"
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER'}
 
     def invoke(self, context, event):
         # Show popup message to guide the user
@@ -514,11 +3480,12 @@ class ApplyTrackedChangesOperator(bpy.types.Operator):
         )
         return self.execute(context)
 
+    @profiled_execute
     def execute(self, context):
         global tracked_changes, is_tracking
         armature = bpy.context.object
 
-        if not tracked_changes:
+        if tracked_changes is None or not tracked_changes.seen.any():
             self.report({'WARNING'}, "No changes tracked.")
             return {'CANCELLED'}
 
@@ -527,58 +3494,39 @@ class ApplyTrackedChangesOperator(bpy.types.Operator):
             return {'CANCELLED'}
 
         action = armature.animation_data.action
-        curves_coll = get_action_curves(action, armature)
-        selected_keyframes = get_selected_keyframes(curves_coll)
+        index = get_fcurve_index(action, armature)
+        if index is not None and context.scene.tracked_bones_keys_only:
+            # Only the keys selected on the curves of the changed bones count
+            changed_bones = [tracked_changes.bone_names[row] for row in np.flatnonzero(tracked_changes.has_changes)]
+            selected_keyframes = get_selected_keyframes(index.curves_for_bones(changed_bones))
+        else:
+            selected_keyframes = get_selected_keyframes(index.curves_coll if index is not None else None)
 
         if not selected_keyframes:
             self.report({'WARNING'}, "No keyframes selected.")
             return {'CANCELLED'}
 
+        changed_bones = [tracked_changes.bone_names[row] for row in np.flatnonzero(tracked_changes.has_changes)]
+        snapshot_bone_curves(context, "Apply Tracked Changes", [(action, armature, changed_bones)])
+
         applied = False
         try:
-            for frame in selected_keyframes:
-                bpy.context.scene.frame_set(frame)  # Set the current frame
-
-                for bone_name, changes in tracked_changes.items():
-                    if not changes["has_changes"]:  # Skip unchanged bones
-                        continue
-
-                    if bone_name in armature.pose.bones:
-                        bone = armature.pose.bones[bone_name]
-
-                        # Apply stored deltas to the current bone state at the keyframe
-                        bone.location += changes["delta_location"]
-                        bone.keyframe_insert(data_path="location", frame=frame)
-
-                        if bone.rotation_mode == 'QUATERNION':
-                            bone.rotation_quaternion = changes["delta_rotation"] @ bone.rotation_quaternion
-                            bone.keyframe_insert(data_path="rotation_quaternion", frame=frame)
-                        else:
-                            current_quat = bone.rotation_euler.to_quaternion()
-                            new_quat = changes["delta_rotation"] @ current_quat
-                            bone.rotation_euler = new_quat.to_euler(bone.rotation_mode)
-                            bone.keyframe_insert(data_path="rotation_euler", frame=frame)
-
-                        bone.scale += changes["delta_scale"]
-                        bone.keyframe_insert(data_path="scale", frame=frame)
-
-                        applied = True
-
-            # Rebake keyframes for proper interpolation
-            bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.object.mode_set(mode='POSE')
-
+            # Write the deltas straight into the keys of every selected frame
+            applied = apply_tracked_deltas(context, armature, action, tracked_changes, selected_keyframes) > 0
         except Exception as e:
             print(f"Error applying tracked changes: {e}")
 
         # Clear tracked changes after applying
-        tracked_changes.clear()
+        tracked_changes = None
         is_tracking = False
         context.scene.is_tracking_pose_changes = False
 
         if track_pose_changes in bpy.app.handlers.depsgraph_update_post:
             bpy.app.handlers.depsgraph_update_post.remove(track_pose_changes)
 
+        # Refresh the pose from the edited curves
+        set_scene_frame(context.scene, context.scene.frame_current)
+
         if applied:
             self.report({'INFO'}, "Applied changes to selected keyframes.")
         else:
@@ -589,16 +3537,33 @@ class ApplyTrackedChangesOperator(bpy.types.Operator):
 
 # ----------------------- Utility Function -----------------------
 
-def get_selected_keyframes(curves_coll):
-    """Returns a sorted list of selected keyframes"""
-    if curves_coll is None:
+def read_selected_keys(fcurves):
+    """Returns (fcurve, key indices, key frames) for every F-Curve with selected keys.
+
+    The select flags are read in bulk first, and the key positions only of the curves that have a selection."""
+    selection = []
+    for fcurve in fcurves:
+        keyframe_points = fcurve.keyframe_points
+        count = len(keyframe_points)
+        if not count:
+            continue
+        select = np.empty(count, dtype=np.bool_)
+        keyframe_points.foreach_get("select_control_point", select)
+        if not select.any():
+            continue
+        co = np.empty(count * 2, dtype=np.float32)
+        keyframe_points.foreach_get("co", co)
+        count_profile(keys_read=count, fcurve=fcurve)
+        keys = np.flatnonzero(select)
+        selection.append((fcurve, keys, co.reshape(count, 2)[keys, 0]))
+    return selection
+
+@profiled("get_selected_keyframes")
+def get_selected_keyframes(fcurves):
+    """Returns a sorted list of the frames with a selected key on any of the F-Curves"""
+    if fcurves is None:
         return []
-    selected_frames = set()
-    for fcurve in curves_coll:
-        for keyframe in fcurve.keyframe_points:
-            if keyframe.select_control_point:
-                selected_frames.add(int(keyframe.co[0]))
-    return sorted(selected_frames)
+    return unique_key_frames(frames for _fcurve, _keys, frames in read_selected_keys(fcurves))
 
 
 
@@ -626,8 +3591,57 @@ class SpacingPanel(bpy.types.Panel):
 
         # Add the new axis toggle
         layout.prop(context.scene, 'spacing_axis', text="Spacing Axis")
+        layout.prop(context.scene, 'spacing_mode', text="Spacing Mode")
 
-        layout.operator("object.adjust_spacing", text="Adjust Spacing", icon='MODIFIER')
+        row = layout.row(align=True)
+        row.operator("object.adjust_spacing", text="Adjust Spacing", icon='MODIFIER')
+        row.operator("object.adjust_spacing_modal", text="", icon='TIME')
+
+        row = layout.row(align=True)
+        row.prop(context.scene, 'spacing_use_frame_range', text="Frame Range")
+        sub = row.row(align=True)
+        sub.active = context.scene.spacing_use_frame_range
+        sub.prop(context.scene, 'spacing_frame_start', text="Start")
+        sub.prop(context.scene, 'spacing_frame_end', text="End")
+
+        # Spacing edits applied to the current action
+        action = get_active_action(context.object) if context.object is not None and context.object.type == 'ARMATURE' else None
+        layer = get_spacing_layer(action) if action is not None else []
+        if layer:
+            box = layout.box()
+            box.label(text="Applied Spacing", icon='INFO')
+            col = box.column(align=True)
+            for entry in layer:
+                col.label(text=format_spacing_layer_entry(entry))
+            box.operator("object.reset_spacing_layer", text="Reset Spacing", icon='LOOP_BACK')
+
+        # Additive spacing layer of the armature
+        spacing_strip = get_spacing_strip(context.object) if context.object is not None and context.object.type == 'ARMATURE' else None
+        if spacing_strip is not None:
+            box = layout.box()
+            box.label(text="Additive Spacing Layer", icon='NLA')
+            col = box.column(align=True)
+            for line in format_spacing_layer_rotations(*read_spacing_layer_rotations(spacing_strip.action, context.object)):
+                col.label(text=line)
+            row = box.row(align=True)
+            row.operator("object.flatten_spacing_layer", text="Flatten", icon='IMPORT')
+            row.operator("object.remove_spacing_layer", text="Remove", icon='X')
+
+        # Batch spacing list
+        layout.label(text="Batch Spacing", icon='MOD_ARRAY')
+        for index, edit in enumerate(context.scene.spacing_batch_edits):
+            box = layout.box()
+            row = box.row(align=True)
+            row.prop(edit, 'bone_pair', text="")
+            row.prop(edit, 'axis', text="")
+            row.operator("object.remove_spacing_batch_edit", text="", icon='X').index = index
+            row = box.row(align=True)
+            row.prop(edit, 'space_value', text="Value")
+            row.prop(edit, 'affect_left', text="", icon='TRIA_LEFT')
+            row.prop(edit, 'affect_right', text="", icon='TRIA_RIGHT')
+        layout.operator("object.add_spacing_batch_edit", text="Add Current Settings to Batch", icon='ADD')
+        layout.prop(context.scene, 'spacing_batch_scope', text="Actions")
+        layout.operator("object.adjust_spacing_batch", text="Adjust Spacing (Batch)", icon='MODIFIER')
 
         layout.separator(factor=0.5)
         
@@ -640,12 +3654,15 @@ class SpacingPanel(bpy.types.Panel):
         else:
             layout.operator("pose.cancel_tracking", text="Cancel Tracking", icon='CANCEL')
             layout.label(text="Tracking in Progress...", icon='TIME')
+            layout.prop(context.scene, 'tracked_bones_keys_only', text="Only Changed Bones' Keys")
             # Show "Apply Changes" button only when tracking is active
             layout.operator("pose.apply_tracked_changes", text="Apply Changes", icon='KEY_HLT')
 
         # ------------------- Animation Helper Section -------------------
         layout.label(text="Animation Helper", icon='ANIM')
 
+        layout.prop(context.scene, "physics_bone_source", text="Physics Bones")
+        layout.prop(context.scene, "physics_bone_patterns", text="Patterns")
         row = layout.row(align=True)
         row.operator("object.select_physics_bones", text="Select Physics Bones", icon='BONE_DATA')
         row.operator("object.delete_highlighted_bones", text="Delete Highlighted Bones", icon='TRASH')
@@ -660,24 +3677,138 @@ class SpacingPanel(bpy.types.Panel):
         layout.separator(factor=0.5)
 
         # Adjust Playback and Bake
-        layout.operator("object.adjust_playback_and_bake", text="Adjust Playback & Bake", icon='RENDER_ANIMATION')
+        layout.prop(context.scene, "bake_mode", text="Bake")
+        row = layout.row(align=True)
+        row.operator("object.adjust_playback_and_bake", text="Adjust Playback & Bake", icon='RENDER_ANIMATION')
+        row.operator("object.adjust_playback_and_bake_modal", text="", icon='TIME')
+        layout.prop(context.scene, "modal_chunk_frames", text="Frames per Step")
+        if context.scene.bake_mode == 'SOLVER':
+            row = layout.row(align=True)
+            row.prop(context.scene, "spring_solver_workers", text="Processes")
+            row.operator("object.compare_spring_solver", text="Compare", icon='ARROW_LEFTRIGHT')
+        layout.prop(context.scene, "use_bake_cache", text="Use Bake Cache")
+        if context.scene.use_bake_cache:
+            col = layout.column(align=True)
+            col.prop(context.scene, "bake_cache_directory", text="")
+            col.prop(context.scene, "bake_cache_size_limit", text="Cache Size (MB)")
+
+        # Keyframe reduction
+        layout.prop(context.scene, "reduce_after_bake", text="Reduce Keys After Bake")
+        col = layout.column(align=True)
+        col.prop(context.scene, "reduce_location_tolerance", text="Location Tolerance")
+        col.prop(context.scene, "reduce_rotation_tolerance", text="Rotation Tolerance")
+        col.prop(context.scene, "reduce_scale_tolerance", text="Scale Tolerance")
+        layout.operator("object.reduce_baked_keys", text="Reduce Baked Keys", icon='IPO_BEZIER')
 
         # Loopify Physics
         layout.separator(factor=0.5)
         layout.prop(context.scene, "frame_selection", text="Frame Selection", icon='TIME')
-        layout.prop(context.scene, "loopify_frame_easing", text="Frame Easing", icon='IPO_ELASTIC')
+        layout.prop(context.scene, "loopify_mode", text="Loop Mode")
+        layout.prop(context.scene, "loopify_frame_easing", text="Max Frame Easing" if context.scene.loopify_auto_easing else "Frame Easing", icon='IPO_ELASTIC')
+        layout.prop(context.scene, "loopify_auto_easing", text="Find Best Loop Point")
         layout.operator("object.loopify_physics", text="Loopify Physics", icon='CON_FOLLOWPATH')
 
+        # Export straight from the keys
+        layout.separator(factor=0.5)
+        layout.operator("object.export_vrm_animation", text="Export VRM Animation", icon='EXPORT')
+
+        # Scene-wide variants for scenes with several characters
+        layout.separator(factor=0.5)
+        layout.label(text="All VRM Armatures", icon='OUTLINER_OB_ARMATURE')
+        layout.prop(context.scene, "scene_armature_scope", text="Armatures")
+        layout.operator("object.toggle_scene_spring_bone_physics", text="Toggle Spring Bone Physics", icon='PHYSICS')
+        row = layout.row(align=True)
+        row.operator("object.select_scene_physics_bones", text="Select Physics Bones", icon='BONE_DATA')
+        row.operator("object.delete_scene_highlighted_bones", text="Delete Highlighted Bones", icon='TRASH')
+        layout.operator("object.adjust_playback_and_bake_scene", text="Adjust Playback & Bake All", icon='RENDER_ANIMATION')
+        layout.operator("object.loopify_physics_scene", text="Loopify Physics All", icon='CON_FOLLOWPATH')
+
+        # Every action of the armature in one queue
+        layout.separator(factor=0.5)
+        layout.label(text="Action Library", icon='ACTION')
+        layout.prop(context.scene, "library_queue_filter", text="Filter")
+        row = layout.row(align=True)
+        row.prop(context.scene, "library_queue_spacing", toggle=True)
+        row.prop(context.scene, "library_queue_bake", toggle=True)
+        row.prop(context.scene, "library_queue_loopify", toggle=True)
+        layout.prop(context.scene, "library_queue_threads", text="Threads")
+        row = layout.row(align=True)
+        row.operator("object.process_action_library", text="Process Library", icon='PLAY').resume = False
+        row.operator("object.process_action_library", text="Resume", icon='FILE_REFRESH').resume = True
+        if context.scene.library_queue:
+            box = layout.box()
+            col = box.column(align=True)
+            status_icons = {'PENDING': 'TIME', 'DONE': 'CHECKMARK', 'FAILED': 'ERROR'}
+            for entry in context.scene.library_queue:
+                col.label(text=f"{entry.action_name} ({entry.seconds:.1f}s): {entry.message}" if entry.message else entry.action_name,
+                          icon=status_icons[entry.status])
+
+        # The add-on's own undo for the heavy operators
+        layout.separator(factor=0.5)
+        layout.label(text="Keyframe Snapshots", icon='RECOVER_LAST')
+        if keyframe_snapshots:
+            used = sum(snapshot.nbytes for snapshot in keyframe_snapshots) / (1024 * 1024)
+            layout.label(text=f"{len(keyframe_snapshots)} snapshots, {used:.1f} MB. Last: {keyframe_snapshots[-1].name}")
+        row = layout.row(align=True)
+        row.enabled = bool(keyframe_snapshots)
+        row.operator("object.revert_vrm_edit", text="Revert Last VRM Edit", icon='LOOP_BACK')
+        row.operator("object.compare_vrm_snapshot", text="Compare", icon='ARROW_LEFTRIGHT')
+
+        # Profiling results, when enabled in the add-on preferences
+        if profiling_enabled:
+            layout.separator(factor=0.5)
+            row = layout.row()
+            row.label(text="Profiling", icon='SORTTIME')
+            row.operator("object.clear_profile_results", text="", icon='X')
+            if profile_history:
+                box = layout.box()
+                col = box.column(align=True)
+                for record in reversed(profile_history[-5:]):
+                    col.label(text=f"{record.name}: {record.seconds * 1000.0:.1f} ms")
+                    col.label(text=f"    {record.frame_sets} frame sets, {record.keys_read} keys read, {record.keys_written} written, {len(record.curves)} curves")
+            if profile_totals:
+                box = layout.box()
+                col = box.column(align=True)
+                for name, totals in sorted(profile_totals.items(), key=lambda item: -item[1]["seconds"])[:8]:
+                    col.label(text=f"{name}: {totals['calls']} calls, {totals['seconds'] * 1000.0:.1f} ms total")
+
 # ----------------------------- Register/Unregister Functions -----------------------------
 
 def register():
+    global profiling_enabled
+    bpy.utils.register_class(VRMSpacingPreferences)
+    bpy.utils.register_class(ClearProfileResultsOperator)
+    bpy.utils.register_class(RevertVRMEditOperator)
+    bpy.utils.register_class(CompareVRMSnapshotOperator)
+    preferences = get_addon_preferences(bpy.context)
+    profiling_enabled = preferences is not None and preferences.enable_profiling
+    bpy.utils.register_class(SpacingBatchEdit)
+    bpy.utils.register_class(LibraryQueueEntry)
     bpy.utils.register_class(SpacingAdjusterOperator)
+    bpy.utils.register_class(ResetSpacingLayerOperator)
+    bpy.utils.register_class(FlattenSpacingLayerOperator)
+    bpy.utils.register_class(RemoveSpacingLayerOperator)
+    bpy.utils.register_class(AddSpacingBatchEditOperator)
+    bpy.utils.register_class(RemoveSpacingBatchEditOperator)
+    bpy.utils.register_class(BatchSpacingAdjusterOperator)
     bpy.utils.register_class(SelectPhysicsBonesOperator)
     bpy.utils.register_class(DeleteHighlightedBonesOperator)
     bpy.utils.register_class(SpacingPanel)
     bpy.utils.register_class(AdjustPlaybackAndBakeOperator)
+    bpy.utils.register_class(CompareSpringSolverOperator)
+    bpy.utils.register_class(ExportVRMAnimationOperator)
+    bpy.types.TOPBAR_MT_file_export.append(menu_func_export_vrma)
     bpy.utils.register_class(ToggleVRMSpringBonePhysicsOperator)
+    bpy.utils.register_class(ReduceBakedKeysOperator)
     bpy.utils.register_class(LoopifyPhysicsOperator)
+    bpy.utils.register_class(ToggleSceneSpringBonePhysicsOperator)
+    bpy.utils.register_class(SelectScenePhysicsBonesOperator)
+    bpy.utils.register_class(DeleteSceneHighlightedBonesOperator)
+    bpy.utils.register_class(SceneBakeOperator)
+    bpy.utils.register_class(LoopifySceneOperator)
+    bpy.utils.register_class(ModalBakeOperator)
+    bpy.utils.register_class(ModalSpacingOperator)
+    bpy.utils.register_class(ProcessActionLibraryOperator)
     
     bpy.utils.register_class(StartListeningOperator)
     bpy.utils.register_class(CancelTrackingOperator)
@@ -688,6 +3819,11 @@ def register():
         description="Indicates if pose tracking is active",
         default=False
     )
+    bpy.types.Scene.tracked_bones_keys_only = bpy.props.BoolProperty(
+        name="Only Changed Bones' Keys",
+        description="Apply the tracked changes only on the frames with a selected key on the curves of the changed bones",
+        default=False
+    )
 
     bpy.types.Scene.selected_bone_pair = bpy.props.EnumProperty(
         name="Bone Pair",
@@ -716,12 +3852,46 @@ def register():
     bpy.types.Scene.spacing_axis = bpy.props.EnumProperty(
         name="Spacing Axis",
         description="Choose which axis to apply the spacing on",
+        items=spacing_axis_items,
+        default='SIDEWAYS'
+    )
+    bpy.types.Scene.spacing_mode = bpy.props.EnumProperty(
+        name="Spacing Mode",
+        description="Choose how the spacing is written into the action",
         items=[
-            ('SIDEWAYS', "Space Sideways (Z-Axis)", ""),
-            ('FORWARD_BACKWARD', "Space Forward/Backward (Y-Axis)", ""),
-            ('DEPTH', "Space Depth (X-Axis)", "")
+            ('KEYFRAMES', "Edit Keyframes (Fast)", "Offsets the existing keyframes directly without changing the current frame"),
+            ('NLA_ADD', "Additive Layer", "Keys the spacing on an additive NLA layer, leaving the action untouched (flatten it before exporting)"),
+            ('FRAME_STEP', "Step Frames (Legacy)", "Steps through every frame of the action and re-inserts the keyframes")
         ],
-        default='SIDEWAYS'
+        default='KEYFRAMES'
+    )
+
+    bpy.types.Scene.spacing_use_frame_range = bpy.props.BoolProperty(
+        name="Limit Spacing to Frame Range",
+        description="Only offset the keys between the start and end frames",
+        default=False
+    )
+    bpy.types.Scene.spacing_frame_start = bpy.props.IntProperty(
+        name="Spacing Start Frame",
+        description="First frame the spacing is applied on",
+        default=1
+    )
+    bpy.types.Scene.spacing_frame_end = bpy.props.IntProperty(
+        name="Spacing End Frame",
+        description="Last frame the spacing is applied on",
+        default=250
+    )
+
+    bpy.types.Scene.spacing_batch_edits = bpy.props.CollectionProperty(type=SpacingBatchEdit)
+    bpy.types.Scene.spacing_batch_scope = bpy.props.EnumProperty(
+        name="Batch Actions",
+        description="Choose which actions the batch spacing is applied to",
+        items=[
+            ('ACTIVE', "Active Action", "Only the armature's active action"),
+            ('ARMATURE', "Armature Actions", "The active action, the NLA strips and every action animating this armature's bones"),
+            ('FILE', "All Actions in File", "Every action in the file")
+        ],
+        default='ACTIVE'
     )
 
     bpy.types.Scene.frame_selection = bpy.props.EnumProperty(
@@ -738,37 +3908,454 @@ def register():
         default=4
     )
 
+    bpy.types.Scene.loopify_mode = bpy.props.EnumProperty(
+        name="Loop Mode",
+        description="Choose how the easing range is bridged",
+        items=[
+            ('DELETE_PASTE', "Delete & Paste", "Deletes the keys of the easing range and lets the interpolation bridge the gap"),
+            ('CROSSFADE', "Crossfade", "Blends the easing range toward the loop pose, slerping quaternion rotations")
+        ],
+        default='DELETE_PASTE'
+    )
+
+    bpy.types.Scene.loopify_auto_easing = bpy.props.BoolProperty(
+        name="Find Best Loop Point",
+        description="Searches every easing up to Frame Easing and uses the one that starts from the pose closest to the loop pose",
+        default=False
+    )
+
     bpy.types.Scene.vrm_spring_bone_physics_enabled = bpy.props.BoolProperty(
         name="VRM Spring Bone Physics",
         description="Toggle VRM Spring Bone Physics ON/OFF",
         default=False
     )
 
+    bpy.types.Scene.physics_bone_source = bpy.props.EnumProperty(
+        name="Physics Bones",
+        description="Choose how the physics bones are found",
+        items=[
+            ('AUTO', "Spring Bones, Then Patterns", "Uses the joints of the VRM spring bones, or the name patterns if the armature has none"),
+            ('PATTERNS', "Name Patterns", "Uses the bones whose names match one of the patterns")
+        ],
+        default='AUTO'
+    )
+    bpy.types.Scene.physics_bone_patterns = bpy.props.StringProperty(
+        name="Physics Bone Patterns",
+        description="Comma separated regular expressions matched against the bone names when there are no spring bone joints. Commas inside (), {} or [] belong to the pattern, like in Hair_\\d{1,3}",
+        default=default_physics_bone_patterns
+    )
+
+    bpy.types.Scene.bake_mode = bpy.props.EnumProperty(
+        name="Bake Mode",
+        description="Choose which bones are baked",
+        items=[
+            ('PHYSICS_ONLY', "Physics Bones Only", "Steps the simulation once and keys only the physics bones, leaving the other curves untouched"),
+            ('SOLVER', "Built-in Spring Solver", "Simulates the VRM 1.0 spring bones with the add-on's own NumPy solver instead of the VRM add-on's physics, and keys only the joints"),
+            ('FULL', "Full Armature", "Bakes every bone of the armature with visual keying")
+        ],
+        default='PHYSICS_ONLY'
+    )
+
+    bpy.types.Scene.spring_solver_workers = bpy.props.IntProperty(
+        name="Solver Processes",
+        description="Number of processes the built-in spring solver splits independent chains over (1 simulates every chain in this process)",
+        default=1,
+        min=1,
+        max=32
+    )
+
+    bpy.types.Scene.modal_chunk_frames = bpy.props.IntProperty(
+        name="Frames per Step",
+        description="Number of frames the modal bake and spacing process before updating the interface",
+        default=50,
+        min=1
+    )
+
+    bpy.types.Scene.scene_armature_scope = bpy.props.EnumProperty(
+        name="Target Armatures",
+        description="Choose which armatures the scene-wide operators work on",
+        items=[
+            ('SELECTED', "Selected Armatures", "Only the selected VRM armatures"),
+            ('ALL', "All Armatures in Scene", "Every VRM armature of the scene")
+        ],
+        default='SELECTED'
+    )
+
+    bpy.types.Scene.use_bake_cache = bpy.props.BoolProperty(
+        name="Use Bake Cache",
+        description="Store physics-only bakes on disk and reuse them when the driving animation, spring bone settings and frame range haven't changed",
+        default=False
+    )
+    bpy.types.Scene.bake_cache_directory = bpy.props.StringProperty(
+        name="Bake Cache Directory",
+        description="Directory of the physics bake cache (the system's temporary directory if empty)",
+        default="",
+        subtype='DIR_PATH'
+    )
+    bpy.types.Scene.bake_cache_size_limit = bpy.props.IntProperty(
+        name="Bake Cache Size",
+        description="Maximum size of the bake cache in MB, the least recently used bakes are removed first",
+        default=512,
+        min=1
+    )
+
+    bpy.types.Scene.reduce_after_bake = bpy.props.BoolProperty(
+        name="Reduce Keys After Bake",
+        description="Remove redundant keys from the baked curves right after baking",
+        default=False
+    )
+    bpy.types.Scene.reduce_location_tolerance = bpy.props.FloatProperty(
+        name="Location Tolerance",
+        description="Maximum location error allowed when removing keys",
+        default=0.0005,
+        min=0.0,
+        precision=4,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.reduce_rotation_tolerance = bpy.props.FloatProperty(
+        name="Rotation Tolerance",
+        description="Maximum rotation error allowed when removing keys, in degrees",
+        default=0.1,
+        min=0.0,
+        precision=3
+    )
+    bpy.types.Scene.reduce_scale_tolerance = bpy.props.FloatProperty(
+        name="Scale Tolerance",
+        description="Maximum scale error allowed when removing keys",
+        default=0.001,
+        min=0.0,
+        precision=4
+    )
+
+    bpy.types.Scene.library_queue = bpy.props.CollectionProperty(type=LibraryQueueEntry)
+    bpy.types.Scene.library_queue_filter = bpy.props.StringProperty(
+        name="Action Filter",
+        description="Comma separated name patterns (* and ? wildcards, case-insensitive) of the actions to process. Empty processes every action of the armature",
+        default=""
+    )
+    bpy.types.Scene.library_queue_spacing = bpy.props.BoolProperty(
+        name="Spacing",
+        description="Apply the batch spacing list to each action",
+        default=True
+    )
+    bpy.types.Scene.library_queue_bake = bpy.props.BoolProperty(
+        name="Bake",
+        description="Bake the physics bones of each action over its frame range (Physics Bones Only or Built-in Spring Solver)",
+        default=True
+    )
+    bpy.types.Scene.library_queue_loopify = bpy.props.BoolProperty(
+        name="Loopify",
+        description="Loopify the physics bones of each action over its frame range",
+        default=True
+    )
+    bpy.types.Scene.library_queue_threads = bpy.props.IntProperty(
+        name="Threads",
+        description="Number of threads the spacing and loopify key arrays are computed on",
+        default=max(1, min(8, os.cpu_count() or 1)),
+        min=1,
+        max=32
+    )
+
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if clear_fcurve_index_cache not in handlers:
+            handlers.append(clear_fcurve_index_cache)
+        if clear_physics_bone_cache not in handlers:
+            handlers.append(clear_physics_bone_cache)
+    if clear_keyframe_snapshots not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(clear_keyframe_snapshots)
+
 
 def unregister():
     bpy.utils.unregister_class(SpacingAdjusterOperator)
+    bpy.utils.unregister_class(ResetSpacingLayerOperator)
+    bpy.utils.unregister_class(FlattenSpacingLayerOperator)
+    bpy.utils.unregister_class(RemoveSpacingLayerOperator)
+    bpy.utils.unregister_class(AddSpacingBatchEditOperator)
+    bpy.utils.unregister_class(RemoveSpacingBatchEditOperator)
+    bpy.utils.unregister_class(BatchSpacingAdjusterOperator)
     bpy.utils.unregister_class(SelectPhysicsBonesOperator)
     bpy.utils.unregister_class(DeleteHighlightedBonesOperator)
     bpy.utils.unregister_class(SpacingPanel)
     bpy.utils.unregister_class(AdjustPlaybackAndBakeOperator)
+    bpy.utils.unregister_class(CompareSpringSolverOperator)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_func_export_vrma)
+    bpy.utils.unregister_class(ExportVRMAnimationOperator)
     bpy.utils.unregister_class(ToggleVRMSpringBonePhysicsOperator)
+    bpy.utils.unregister_class(ReduceBakedKeysOperator)
     bpy.utils.unregister_class(LoopifyPhysicsOperator)
+    bpy.utils.unregister_class(ToggleSceneSpringBonePhysicsOperator)
+    bpy.utils.unregister_class(SelectScenePhysicsBonesOperator)
+    bpy.utils.unregister_class(DeleteSceneHighlightedBonesOperator)
+    bpy.utils.unregister_class(SceneBakeOperator)
+    bpy.utils.unregister_class(LoopifySceneOperator)
+    bpy.utils.unregister_class(ModalBakeOperator)
+    bpy.utils.unregister_class(ModalSpacingOperator)
+    bpy.utils.unregister_class(ProcessActionLibraryOperator)
     
     bpy.utils.unregister_class(StartListeningOperator)
     bpy.utils.unregister_class(CancelTrackingOperator)
     bpy.utils.unregister_class(ApplyTrackedChangesOperator)
 
     del bpy.types.Scene.is_tracking_pose_changes
+    del bpy.types.Scene.tracked_bones_keys_only
 
     del bpy.types.Scene.selected_bone_pair
     del bpy.types.Scene.affect_left_prop
     del bpy.types.Scene.affect_right_prop
     del bpy.types.Scene.space_value_prop
     del bpy.types.Scene.spacing_axis
+    del bpy.types.Scene.spacing_mode
+    del bpy.types.Scene.spacing_use_frame_range
+    del bpy.types.Scene.spacing_frame_start
+    del bpy.types.Scene.spacing_frame_end
+    del bpy.types.Scene.spacing_batch_edits
+    del bpy.types.Scene.spacing_batch_scope
     del bpy.types.Scene.frame_selection
     del bpy.types.Scene.loopify_frame_easing
+    del bpy.types.Scene.loopify_mode
+    del bpy.types.Scene.loopify_auto_easing
     del bpy.types.Scene.vrm_spring_bone_physics_enabled
+    del bpy.types.Scene.physics_bone_source
+    del bpy.types.Scene.physics_bone_patterns
+    del bpy.types.Scene.bake_mode
+    del bpy.types.Scene.spring_solver_workers
+    del bpy.types.Scene.modal_chunk_frames
+    del bpy.types.Scene.scene_armature_scope
+    del bpy.types.Scene.use_bake_cache
+    del bpy.types.Scene.bake_cache_directory
+    del bpy.types.Scene.bake_cache_size_limit
+    del bpy.types.Scene.reduce_after_bake
+    del bpy.types.Scene.reduce_location_tolerance
+    del bpy.types.Scene.reduce_rotation_tolerance
+    del bpy.types.Scene.reduce_scale_tolerance
+    del bpy.types.Scene.library_queue
+    del bpy.types.Scene.library_queue_filter
+    del bpy.types.Scene.library_queue_spacing
+    del bpy.types.Scene.library_queue_bake
+    del bpy.types.Scene.library_queue_loopify
+    del bpy.types.Scene.library_queue_threads
+
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if clear_fcurve_index_cache in handlers:
+            handlers.remove(clear_fcurve_index_cache)
+        if clear_physics_bone_cache in handlers:
+            handlers.remove(clear_physics_bone_cache)
+    if clear_keyframe_snapshots in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_keyframe_snapshots)
+    fcurve_index_cache.clear()
+    physics_bone_cache.clear()
+    keyframe_snapshots.clear()
+
+    bpy.utils.unregister_class(LibraryQueueEntry)
+    bpy.utils.unregister_class(SpacingBatchEdit)
+    bpy.utils.unregister_class(CompareVRMSnapshotOperator)
+    bpy.utils.unregister_class(RevertVRMEditOperator)
+    bpy.utils.unregister_class(ClearProfileResultsOperator)
+    bpy.utils.unregister_class(VRMSpacingPreferences)
+    clear_profile_results()
+
+# ----------------------------- Headless Batch Baking -----------------------------
+# Usage: blender -b -P vrm_spacing_animation_baking.py -- INPUT [INPUT ...] --output-dir DIR [options]
+
+batch_input_extensions = (".blend", ".vrm")
+
+def parse_batch_arguments(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender -b -P vrm_spacing_animation_baking.py --",
+        description="Bakes (and loopifies) the VRM spring bone physics of every action in .blend/.vrm files."
+    )
+    parser.add_argument("inputs", nargs="+", help=".blend/.vrm files, or directories containing them")
+    parser.add_argument("--output-dir", required=True, help="Directory the baked .blend files are saved to")
+    parser.add_argument("--report", help="Path of the JSON report (default: OUTPUT_DIR/bake_report.json)")
+    parser.add_argument("--actions", nargs="*", help="Names of the actions to bake (default: every action of the armature)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of background Blender processes the files are spread over")
+    parser.add_argument("--recursive", action="store_true", help="Also search sub-directories of the input directories")
+    parser.add_argument("--frame-selection", choices=['LAST_FRAME', 'FIRST_FRAME'], default='LAST_FRAME', help="Frame the loop is based on")
+    parser.add_argument("--frame-easing", type=int, default=4, help="Number of frames to ease out physics when looping")
+    parser.add_argument("--loop-mode", choices=['DELETE_PASTE', 'CROSSFADE'], default='DELETE_PASTE', help="How the easing range is bridged")
+    parser.add_argument("--auto-loop-point", action="store_true", help="Search the best easing up to --frame-easing")
+    parser.add_argument("--no-loopify", action="store_true", help="Skip the Loopify Physics step")
+    parser.add_argument("--reduce", action="store_true", help="Remove redundant keys from the baked curves (scene tolerances apply)")
+    parser.add_argument("--worker-report", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def collect_batch_inputs(inputs, recursive):
+    """Expands the input paths into a sorted list of .blend/.vrm files."""
+    files = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            if recursive:
+                for root, _dirs, names in os.walk(path):
+                    files.update(os.path.join(root, name) for name in names if name.lower().endswith(batch_input_extensions))
+            else:
+                files.update(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(batch_input_extensions))
+        elif path.lower().endswith(batch_input_extensions):
+            files.add(path)
+    return sorted(os.path.abspath(path) for path in files)
+
+def find_batch_armature(scene):
+    """Returns the VRM armature of the scene, or the first armature if none has VRM data."""
+    armatures = [obj for obj in scene.objects if obj.type == 'ARMATURE']
+    for armature in armatures:
+        if hasattr(armature.data, "vrm_addon_extension"):
+            return armature
+    return armatures[0] if armatures else None
+
+def set_spring_bone_physics(context, armature, enabled):
+    armature.data.vrm_addon_extension.spring_bone1.enable_animation = enabled
+    context.scene.vrm_spring_bone_physics_enabled = enabled
+
+def bake_batch_action(context, armature, action, args):
+    """Runs the panel's baking steps on one action and returns its report entry with per-stage timings."""
+    entry = {"action": action.name, "status": "ok", "frames": int(action.frame_range[1] - action.frame_range[0]) + 1, "timings": {}}
+
+    def run_stage(name, stage):
+        start = time.perf_counter()
+        result = stage()
+        entry["timings"][name] = time.perf_counter() - start
+        if result is not None and 'FINISHED' not in result:
+            raise RuntimeError(f"{name} returned {sorted(result)}")
+
+    armature.animation_data.action = action
+    set_scene_frame(context.scene, int(action.frame_range[0]))
+
+    try:
+        run_stage("select_physics_bones", bpy.ops.object.select_physics_bones)
+        run_stage("delete_highlighted_bones", bpy.ops.object.delete_highlighted_bones)
+        run_stage("enable_spring_bones", lambda: set_spring_bone_physics(context, armature, True))
+        run_stage("bake", bpy.ops.object.adjust_playback_and_bake)
+        run_stage("disable_spring_bones", lambda: set_spring_bone_physics(context, armature, False))
+        if not args.no_loopify:
+            run_stage("loopify", bpy.ops.object.loopify_physics)
+    except Exception as e:
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    return entry
+
+def bake_batch_file(filepath, args):
+    """Opens one .blend/.vrm file, bakes the requested actions and saves the result into the output directory."""
+    context = bpy.context
+    report = {"file": filepath, "status": "ok", "actions": [], "timings": {}}
+    start = time.perf_counter()
+
+    try:
+        if filepath.lower().endswith(".vrm"):
+            bpy.ops.wm.read_homefile(use_empty=True)
+            bpy.ops.import_scene.vrm(filepath=filepath)
+        else:
+            bpy.ops.wm.open_mainfile(filepath=filepath)
+        report["timings"]["load"] = time.perf_counter() - start
+
+        scene = context.scene
+        armature = find_batch_armature(scene)
+        if armature is None:
+            raise RuntimeError("No Armature object found in the scene.")
+
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        context.view_layer.objects.active = armature
+        armature.select_set(True)
+        if armature.animation_data is None:
+            armature.animation_data_create()
+
+        scene.frame_selection = args.frame_selection
+        scene.loopify_frame_easing = args.frame_easing
+        scene.loopify_mode = args.loop_mode
+        scene.loopify_auto_easing = args.auto_loop_point
+        scene.reduce_after_bake = args.reduce
+
+        if args.actions:
+            actions = [bpy.data.actions[name] for name in args.actions if name in bpy.data.actions]
+        else:
+            actions = get_armature_actions(armature, 'ARMATURE')
+        if not actions:
+            raise RuntimeError("No actions found for the armature.")
+
+        for action in actions:
+            report["actions"].append(bake_batch_action(context, armature, action, args))
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        output_path = os.path.join(args.output_dir, f"{stem}_baked.blend")
+        save_start = time.perf_counter()
+        bpy.ops.wm.save_as_mainfile(filepath=output_path, copy=True)
+        report["timings"]["save"] = time.perf_counter() - save_start
+        report["output"] = output_path
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = str(e)
+
+    if any(entry["status"] != "ok" for entry in report["actions"]):
+        report["status"] = "error"
+    report["timings"]["total"] = time.perf_counter() - start
+    return report
+
+def run_batch_worker(filepath, args, report_path):
+    """Bakes one file in a separate background Blender process and returns its report entry."""
+    command = [
+        bpy.app.binary_path, "-b", "-P", os.path.abspath(__file__), "--", filepath,
+        "--output-dir", args.output_dir,
+        "--worker-report", report_path,
+        "--frame-selection", args.frame_selection,
+        "--frame-easing", str(args.frame_easing),
+        "--loop-mode", args.loop_mode,
+    ]
+    if args.auto_loop_point:
+        command.append("--auto-loop-point")
+    if args.actions:
+        command += ["--actions", *args.actions]
+    if args.no_loopify:
+        command.append("--no-loopify")
+    if args.reduce:
+        command.append("--reduce")
+
+    completed = subprocess.run(command, capture_output=True, text=True)
+    try:
+        with open(report_path, encoding="utf-8") as f:
+            return json.load(f)["files"][0]
+    except (OSError, ValueError, IndexError, KeyError):
+        return {"file": filepath, "status": "error", "actions": [], "timings": {},
+                "error": f"Worker exited with code {completed.returncode}: {completed.stderr[-2000:]}"}
+    finally:
+        if os.path.exists(report_path):
+            os.remove(report_path)
+
+def batch_bake_main(argv):
+    args = parse_batch_arguments(argv)
+    files = collect_batch_inputs(args.inputs, args.recursive)
+    start = time.perf_counter()
+
+    register()
+
+    if args.worker_report or args.workers <= 1 or len(files) <= 1:
+        file_reports = [bake_batch_file(filepath, args) for filepath in files]
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(run_batch_worker, filepath, args, os.path.join(args.output_dir, f".worker_report_{number}.json"))
+                for number, filepath in enumerate(files)
+            ]
+            file_reports = [future.result() for future in futures]
+
+    report = {
+        "blender": bpy.app.version_string,
+        "workers": 1 if args.worker_report else max(1, min(args.workers, len(files))),
+        "total_seconds": time.perf_counter() - start,
+        "files": file_reports,
+    }
+    report_path = args.worker_report or args.report or os.path.join(args.output_dir, "bake_report.json")
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if not args.worker_report:
+        failed = sum(1 for file_report in file_reports if file_report["status"] != "ok")
+        print(f"Baked {len(files) - failed}/{len(files)} files in {report['total_seconds']:.1f}s, report written to {report_path}")
+    return 0 if all(file_report["status"] == "ok" for file_report in file_reports) else 1
 
 
 if __name__ == "__main__":
+    if "--" in sys.argv:
+        sys.exit(batch_bake_main(sys.argv[sys.argv.index("--") + 1:]))
     register()
@@ -0,0 +1,839 @@
+# NumPy-only core of the VRM-Spacing-Animation-Baking add-on.
+#
+# Everything here works on plain arrays, without bpy or mathutils: keyframe arrays are dicts of NumPy arrays, one per
+# keyframe property (as read with foreach_get), and poses are (bones, 3) / (bones, 4) arrays. The add-on's operators
+# read the curves and pose into arrays, call these functions and write the results back, so the algorithms can be
+# tested and profiled outside Blender.
+
+import math
+import re
+import zlib
+import numpy as np
+
+# ----------------------------- Keyframe Arrays -----------------------------
+
+# Keyframe properties copied in bulk with foreach_get/foreach_set: (name, values per key, dtype)
+keyframe_array_props = (
+    ("co", 2, np.float32),
+    ("handle_left", 2, np.float32),
+    ("handle_right", 2, np.float32),
+    ("interpolation", 1, np.int32),
+    ("handle_left_type", 1, np.int32),
+    ("handle_right_type", 1, np.int32),
+    ("easing", 1, np.int32),
+    ("type", 1, np.int32),
+    ("back", 1, np.float32),
+    ("amplitude", 1, np.float32),
+    ("period", 1, np.float32),
+    ("select_control_point", 1, np.bool_),
+)
+
+def build_keyframe_arrays(frames, values, defaults):
+    """Builds the arrays of freshly keyed points, one per (frame, value) pair, with Blender's default key settings."""
+    count = len(frames)
+    co = np.column_stack((frames, values)).astype(np.float32)
+    arrays = {"co": co, "handle_left": co.copy(), "handle_right": co.copy()}
+    arrays["handle_left"][:, 0] -= 1.0
+    arrays["handle_right"][:, 0] += 1.0
+    for prop, size, dtype in keyframe_array_props:
+        if prop not in arrays:
+            arrays[prop] = np.full(count, defaults[prop], dtype=dtype)
+    return arrays
+
+def match_keyframes(key_frames, frames, threshold=0.01):
+    """Returns, for each frame, the index of the key on that frame (within threshold) or -1."""
+    frames = np.asarray(frames, dtype=np.float64)
+    count = len(key_frames)
+    if count == 0:
+        return np.full(len(frames), -1, dtype=np.int64)
+    positions = np.searchsorted(key_frames, frames)
+    candidates = np.stack([np.clip(positions - 1, 0, count - 1), np.clip(positions, 0, count - 1)])
+    distances = np.abs(key_frames[candidates] - frames)
+    nearest = candidates[np.argmin(distances, axis=0), np.arange(len(frames))]
+    return np.where(distances.min(axis=0) < threshold, nearest, -1)
+
+def set_keyframe_values(arrays, frames, values, defaults):
+    """Sets the value of the keys on the given frames, inserting the missing ones, like keyframe_insert on each frame."""
+    frames = np.asarray(frames, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    key_index = match_keyframes(arrays["co"][:, 0], frames)
+    existing = key_index >= 0
+
+    # Existing keys are moved to the new value together with their handles
+    rows = key_index[existing]
+    delta = values[existing] - arrays["co"][rows, 1]
+    for prop in ("co", "handle_left", "handle_right"):
+        arrays[prop][rows, 1] += delta
+
+    if existing.all():
+        return arrays
+    new_keys = build_keyframe_arrays(frames[~existing], values[~existing], defaults)
+    # keyframe_insert gives a key added to a curve of two keys or more the interpolation of the key before it (of the
+    # first key before the curve start); keys added one by one in frame order all end up with the nearest old key's
+    key_frames = arrays["co"][:, 0]
+    if len(key_frames) >= 2:
+        previous = np.searchsorted(key_frames, new_keys["co"][:, 0]) - 1
+        new_keys["interpolation"] = arrays["interpolation"][np.maximum(previous, 0)]
+    elif len(key_frames) == 1 and (new_keys["co"][:, 0] < key_frames[0]).any():
+        # The third key inserted is the first to copy a neighbour: only the keys after the old one follow it
+        new_keys["interpolation"][new_keys["co"][:, 0] > key_frames[0]] = arrays["interpolation"][0]
+    order = np.argsort(np.concatenate([arrays["co"][:, 0], new_keys["co"][:, 0]]), kind='stable')
+    return {prop: np.concatenate([arrays[prop], new_keys[prop]])[order] for prop in arrays}
+
+def offset_keyframe_values(arrays, offset):
+    """Adds offset to the value and handles of every key."""
+    for prop in ("co", "handle_left", "handle_right"):
+        arrays[prop][:, 1] += offset
+    return arrays
+
+def offset_keyframe_range(arrays, offset, frame_start, frame_end):
+    """Adds offset to the value and handles of the keys with frame_start <= frame < frame_end."""
+    frames = arrays["co"][:, 0]
+    rows = (frames >= frame_start) & (frames < frame_end)
+    for prop in ("co", "handle_left", "handle_right"):
+        arrays[prop][rows, 1] += offset
+    return arrays
+
+def merge_keyframe_range(existing, baked):
+    """Returns the baked keys merged with the existing keys outside of the baked frame range."""
+    frames = baked["co"][:, 0]
+    outside = (existing["co"][:, 0] < frames[0]) | (existing["co"][:, 0] > frames[-1])
+    if not outside.any():
+        return baked
+    order = np.argsort(np.concatenate([existing["co"][outside, 0], frames]), kind='stable')
+    return {prop: np.concatenate([existing[prop][outside], baked[prop]])[order] for prop in baked}
+
+def unique_key_frames(frame_arrays):
+    """Returns the sorted integer frames found in any of the given arrays of key frames."""
+    frame_arrays = list(frame_arrays)
+    if not frame_arrays:
+        return []
+    return np.unique(np.concatenate(frame_arrays).astype(np.int64)).tolist()
+
+def selected_keyframe_frames(curve_arrays):
+    """Returns the sorted integer frames that have a selected key on any of the curves' arrays."""
+    return unique_key_frames(arrays["co"][arrays["select_control_point"], 0] for arrays in curve_arrays)
+
+# ----------------------------- Pose Math -----------------------------
+
+# Euler rotation orders as (first axis, second axis, third axis, parity), matching Blender's RotOrderInfo
+euler_order_axes = {
+    'XYZ': (0, 1, 2, False),
+    'XZY': (0, 2, 1, True),
+    'YXZ': (1, 0, 2, True),
+    'YZX': (1, 2, 0, False),
+    'ZXY': (2, 0, 1, False),
+    'ZYX': (2, 1, 0, True),
+}
+
+def blender_matrices_to_numpy(buffer, count):
+    """Reshapes a flat foreach_get buffer of 4x4 matrices (stored column-major by Blender) into (count, 4, 4) row-major matrices."""
+    return np.asarray(buffer, dtype=np.float64).reshape(count, 4, 4).transpose(0, 2, 1)
+
+def matrix_to_quaternion(matrix):
+    """Converts (..., 3, 3) rotation matrices into (..., 4) WXYZ quaternions."""
+    m = matrix
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+
+    # Pick the largest of the four components to divide by, for numerical stability
+    squares = np.stack([1.0 + m00 + m11 + m22, 1.0 + m00 - m11 - m22, 1.0 - m00 + m11 - m22, 1.0 - m00 - m11 + m22], axis=-1)
+    largest = np.argmax(squares, axis=-1)
+    s = 2.0 * np.sqrt(np.maximum(np.take_along_axis(squares, largest[..., None], axis=-1)[..., 0], 1e-12))
+
+    candidates = np.stack([
+        np.stack([0.25 * s, (m21 - m12) / s, (m02 - m20) / s, (m10 - m01) / s], axis=-1),
+        np.stack([(m21 - m12) / s, 0.25 * s, (m01 + m10) / s, (m02 + m20) / s], axis=-1),
+        np.stack([(m02 - m20) / s, (m01 + m10) / s, 0.25 * s, (m12 + m21) / s], axis=-1),
+        np.stack([(m10 - m01) / s, (m02 + m20) / s, (m12 + m21) / s, 0.25 * s], axis=-1),
+    ], axis=-2)
+    quaternion = np.take_along_axis(candidates, largest[..., None, None], axis=-2)[..., 0, :]
+    return quaternion / np.linalg.norm(quaternion, axis=-1, keepdims=True)
+
+def make_quaternions_compatible(quaternions):
+    """Flips the sign of (frames, ..., 4) quaternions so consecutive frames never take the long way round."""
+    dots = np.sum(quaternions[1:] * quaternions[:-1], axis=-1)
+    flips = np.concatenate([np.ones((1,) + dots.shape[1:]), np.where(dots < 0.0, -1.0, 1.0)], axis=0)
+    return quaternions * np.cumprod(flips, axis=0)[..., None]
+
+def matrix_to_euler(matrix, order='XYZ'):
+    """Converts (..., 3, 3) rotation matrices into (..., 3) Euler angles, picking the same solution as Blender."""
+    i, j, k, parity = euler_order_axes[order]
+    m = matrix
+    cy = np.hypot(m[..., i, i], m[..., j, i])
+    regular = cy > 16.0 * np.finfo(np.float32).eps
+
+    euler1 = np.empty(m.shape[:-2] + (3,))
+    euler2 = np.empty(m.shape[:-2] + (3,))
+    euler1[..., i] = np.where(regular, np.arctan2(m[..., k, j], m[..., k, k]), np.arctan2(-m[..., j, k], m[..., j, j]))
+    euler1[..., j] = np.arctan2(-m[..., k, i], cy)
+    euler1[..., k] = np.where(regular, np.arctan2(m[..., j, i], m[..., i, i]), 0.0)
+    euler2[..., i] = np.where(regular, np.arctan2(-m[..., k, j], -m[..., k, k]), euler1[..., i])
+    euler2[..., j] = np.where(regular, np.arctan2(-m[..., k, i], -cy), euler1[..., j])
+    euler2[..., k] = np.where(regular, np.arctan2(-m[..., j, i], -m[..., i, i]), euler1[..., k])
+
+    if parity:
+        euler1 = -euler1
+        euler2 = -euler2
+    use_second = np.sum(np.abs(euler1), axis=-1) > np.sum(np.abs(euler2), axis=-1)
+    return np.where(use_second[..., None], euler2, euler1)
+
+def quaternion_to_matrix(quaternions):
+    """Converts (..., 4) unit WXYZ quaternions into (..., 3, 3) rotation matrices."""
+    w, x, y, z = quaternions[..., 0], quaternions[..., 1], quaternions[..., 2], quaternions[..., 3]
+    return np.stack([
+        np.stack([1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)], axis=-1),
+        np.stack([2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)], axis=-1),
+        np.stack([2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+def quaternion_to_axis_angle(quaternions):
+    """Converts (..., 4) WXYZ quaternions into (..., 4) (angle, x, y, z) axis-angle values."""
+    w = np.clip(quaternions[..., 0], -1.0, 1.0)
+    angle = 2.0 * np.arccos(w)
+    sin_half = np.sqrt(np.maximum(1.0 - w * w, 0.0))
+    axis = np.where(sin_half[..., None] > 1e-8, quaternions[..., 1:] / np.maximum(sin_half, 1e-8)[..., None], [0.0, 1.0, 0.0])
+    return np.concatenate([angle[..., None], axis], axis=-1)
+
+def euler_to_quaternion(euler, order='XYZ'):
+    """Converts (..., 3) Euler angles into (..., 4) WXYZ quaternions, like mathutils.Euler.to_quaternion()."""
+    i, j, k, parity = euler_order_axes[order]
+    half_i = euler[..., i] * 0.5
+    half_j = euler[..., j] * (-0.5 if parity else 0.5)
+    half_k = euler[..., k] * 0.5
+    ci, cj, ck = np.cos(half_i), np.cos(half_j), np.cos(half_k)
+    si, sj, sk = np.sin(half_i), np.sin(half_j), np.sin(half_k)
+    cc, cs, sc, ss = ci * ck, ci * sk, si * ck, si * sk
+
+    quaternion = np.empty(euler.shape[:-1] + (4,))
+    quaternion[..., 0] = cj * cc + sj * ss
+    quaternion[..., 1 + i] = cj * sc - sj * cs
+    quaternion[..., 1 + j] = cj * ss + sj * cc
+    quaternion[..., 1 + k] = cj * cs - sj * sc
+    if parity:
+        quaternion[..., 1 + j] = -quaternion[..., 1 + j]
+    return quaternion
+
+def quaternion_multiply(a, b):
+    """Multiplies (..., 4) WXYZ quaternions, the same as a @ b in mathutils."""
+    aw, ax, ay, az = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bw, bx, by, bz = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by + ay * bw + az * bx - ax * bz,
+        aw * bz + az * bw + ax * by - ay * bx,
+    ], axis=-1)
+
+def quaternion_rotation_difference(a, b):
+    """Returns the quaternions d with a @ d == b, like mathutils' a.rotation_difference(b)."""
+    inverse = a * np.array([1.0, -1.0, -1.0, -1.0])
+    inverse /= np.sum(a * a, axis=-1, keepdims=True)
+    return quaternion_multiply(inverse, b)
+
+def quaternion_angle(quaternions):
+    """Returns the rotation angle of (..., 4) quaternions wrapped to [-pi, pi], like mathutils.Quaternion.angle."""
+    w = quaternions[..., 0] / np.linalg.norm(quaternions, axis=-1)
+    angle = 2.0 * np.arccos(np.clip(w, -1.0, 1.0))
+    return np.where(angle > math.pi, angle - 2.0 * math.pi, angle)
+
+def quaternion_slerp(a, b, t):
+    """Spherically interpolates (..., 4) WXYZ quaternions from a to b by t, along the shortest path."""
+    a = a / np.linalg.norm(a, axis=-1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=-1, keepdims=True)
+    dot = np.sum(a * b, axis=-1)
+    b = np.where(dot[..., None] < 0.0, -b, b)
+    angle = np.arccos(np.clip(np.abs(dot), 0.0, 1.0))
+    sin_angle = np.sin(angle)
+
+    # Nearly identical rotations fall back to a linear blend
+    small = sin_angle < 1e-6
+    safe = np.where(small, 1.0, sin_angle)
+    t = np.asarray(t, dtype=np.float64)
+    weight_a = np.where(small, 1.0 - t, np.sin((1.0 - t) * angle) / safe)
+    weight_b = np.where(small, t, np.sin(t * angle) / safe)
+    return weight_a[..., None] * a + weight_b[..., None] * b
+
+def decompose_matrices(matrices, rotation_mode):
+    """Splits (..., 4, 4) transforms into location, rotation (in the bone's rotation mode) and scale arrays."""
+    location = matrices[..., :3, 3]
+    basis = matrices[..., :3, :3]
+    scale = np.linalg.norm(basis, axis=-2)
+    rotation_matrix = basis / np.maximum(scale, 1e-12)[..., None, :]
+    if rotation_mode in euler_order_axes:
+        rotation = np.unwrap(matrix_to_euler(rotation_matrix, rotation_mode), axis=0)
+    else:
+        rotation = make_quaternions_compatible(matrix_to_quaternion(rotation_matrix))
+        if rotation_mode == 'AXIS_ANGLE':
+            rotation = quaternion_to_axis_angle(rotation)
+    return location, rotation, scale
+
+def axis_angle_to_quaternion(axis_angle):
+    """Converts (..., 4) (angle, x, y, z) axis-angle values into (..., 4) WXYZ quaternions."""
+    angle = axis_angle[..., 0]
+    axis = axis_angle[..., 1:]
+    length = np.linalg.norm(axis, axis=-1, keepdims=True)
+    axis = np.where(length > 1e-8, axis / np.maximum(length, 1e-8), [0.0, 1.0, 0.0])
+    return np.concatenate([np.cos(angle * 0.5)[..., None], axis * np.sin(angle * 0.5)[..., None]], axis=-1)
+
+def compatible_euler(euler, reference):
+    """Shifts each Euler angle by whole turns to the value closest to the reference angle."""
+    return reference + np.mod(euler - reference + math.pi, 2.0 * math.pi) - math.pi
+
+def quaternion_to_euler(quaternions, order='XYZ'):
+    """Converts (..., 4) WXYZ quaternions into (..., 3) Euler angles, like mathutils.Quaternion.to_euler() (normalizing first)."""
+    quaternions = quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return matrix_to_euler(quaternion_to_matrix(quaternions), order)
+
+# ----------------------------- Spacing -----------------------------
+
+# Index of the rotation_euler component affected by each spacing axis
+spacing_axis_indices = {
+    'SIDEWAYS': 2,  # Z-axis
+    'FORWARD_BACKWARD': 1,  # Y-axis
+    'DEPTH': 0,  # X-axis
+}
+
+def add_spacing_offset(offsets, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis, bone_names=None):
+    """Accumulates one spacing edit into offsets, a dict of radians keyed by (bone name, axis index).
+
+    Bones missing from bone_names (when given) are skipped."""
+    space_rad = math.radians(space_value)
+    axis_index = spacing_axis_indices.get(axis, 0)
+
+    # Left bones are offset positively and right bones negatively, mirroring the spacing
+    if affect_left and bone_l_name and (bone_names is None or bone_l_name in bone_names):
+        key = (bone_l_name, axis_index)
+        offsets[key] = offsets.get(key, 0.0) + space_rad
+    if affect_right and bone_r_name and (bone_names is None or bone_r_name in bone_names):
+        key = (bone_r_name, axis_index)
+        offsets[key] = offsets.get(key, 0.0) - space_rad
+    return offsets
+
+def axis_rotation_quaternion(axis_index, angle):
+    """Returns the WXYZ quaternion of a rotation by angle radians about the X, Y or Z axis."""
+    quaternion = np.zeros(4)
+    quaternion[0] = math.cos(angle * 0.5)
+    quaternion[1 + axis_index] = math.sin(angle * 0.5)
+    return quaternion
+
+def spacing_offsets_to_rotations(offsets):
+    """Turns offsets (radians keyed by (bone name, axis index)) into one rotation quaternion per bone.
+
+    The rotations of a bone's axes are composed in X, Y, Z order."""
+    rotations = {}
+    for (bone_name, axis_index), offset in sorted(offsets.items(), key=lambda item: (item[0][0], item[0][1])):
+        rotation = rotations.get(bone_name, np.array([1.0, 0.0, 0.0, 0.0]))
+        rotations[bone_name] = quaternion_multiply(axis_rotation_quaternion(axis_index, offset), rotation)
+    return rotations
+
+def rotate_rotation_keys(rotation, rotation_mode, quaternion):
+    """Composes a rotation about the bone's local (rest) axes onto (keys, 3) Euler or (keys, 4) quaternion or
+    axis-angle values, returning them in the same rotation mode.
+
+    For XYZ Euler bones rotated about Z this is the same as adding the angle to the Z value. Euler results are
+    kept within half a turn of the original values so the curves don't jump."""
+    if rotation_mode == 'QUATERNION':
+        return quaternion_multiply(quaternion, rotation)
+    if rotation_mode == 'AXIS_ANGLE':
+        return quaternion_to_axis_angle(quaternion_multiply(quaternion, axis_angle_to_quaternion(rotation)))
+    return compatible_euler(apply_rotation_delta(quaternion, rotation, rotation_mode), rotation)
+
+def spacing_rotation_offset(quaternion, rotation_mode, threshold=1e-9):
+    """Returns (component index, angle) when composing the rotation onto rotation_mode keys only adds angle to one
+    Euler component, which is the case for rotations about the last axis of the order (Z on XYZ bones).
+
+    Returns None for any other rotation, and for quaternion and axis-angle bones."""
+    if rotation_mode not in euler_order_axes:
+        return None
+    component = "XYZ".index(rotation_mode[-1])
+    others = [1 + axis for axis in range(3) if axis != component]
+    if np.abs(quaternion[others]).max() > threshold:
+        return None
+    return component, 2.0 * math.atan2(quaternion[1 + component], quaternion[0])
+
+def rotate_spacing_keys(values, rotation_mode, quaternion):
+    """Like rotate_rotation_keys, for the values read for a spacing edit: a single column holds the one Euler
+    component spacing_rotation_offset says the rotation adds to."""
+    if values.shape[1] == 1:
+        return values + spacing_rotation_offset(quaternion, rotation_mode)[1]
+    return rotate_rotation_keys(values, rotation_mode, quaternion)
+
+# The spacing layer is a list of the rotations applied to the action's keys, oldest first. Each entry is a dict of
+# the bone name, the frame range ([first frame, last frame], empty for edits over the whole action) and the WXYZ
+# quaternion composed onto the keys. Rotations about different axes don't commute, so summing the angles per axis
+# can't undo mixed edits: the layer keeps the net rotation of each edit and is undone last edit first.
+# Plain lists and dicts, so it can be stored as an ID property.
+
+def accumulate_spacing_layer(layer, rotations, frame_range=None, threshold=1e-9):
+    """Adds rotations (WXYZ quaternions keyed by bone name) applied over frame_range to the layer.
+
+    A rotation is composed into the bone's latest entry when that one has the same frame range, and entries that
+    cancel out are dropped, so undoing every edit leaves an empty layer."""
+    frames = [int(frame) for frame in frame_range] if frame_range is not None else []
+    for bone_name, quaternion in rotations.items():
+        latest = next((row for row in reversed(range(len(layer))) if layer[row]["bone"] == bone_name), None)
+        if latest is None or list(layer[latest]["frames"]) != frames:
+            layer.append({"bone": bone_name, "frames": list(frames), "rotation": [1.0, 0.0, 0.0, 0.0]})
+            latest = len(layer) - 1
+        quaternion = quaternion_multiply(quaternion, np.asarray(layer[latest]["rotation"], dtype=np.float64))
+        quaternion = quaternion / np.linalg.norm(quaternion)
+        # The sign is kept: -q is the same rotation as q, but a whole turn further for the Euler keys offset by it
+        if quaternion[0] > 0.0 and np.linalg.norm(quaternion[1:]) < threshold:
+            del layer[latest]
+        else:
+            layer[latest]["rotation"] = [float(value) for value in quaternion]
+    return layer
+
+def spacing_layer_undo_rotations(layer):
+    """Returns the (bone name, frame range or None, inverse quaternion) rotations that undo the layer, last edit first."""
+    undo = []
+    for entry in reversed(layer):
+        quaternion = np.asarray(entry["rotation"], dtype=np.float64)
+        frame_range = tuple(int(frame) for frame in entry["frames"]) or None
+        undo.append((entry["bone"], frame_range, np.array([1.0, -1.0, -1.0, -1.0]) * quaternion / np.linalg.norm(quaternion)))
+    return undo
+
+# ----------------------------- Loopify -----------------------------
+
+def loopify_frame_range(start_frame, end_frame, frame_selection, frame_easing):
+    """Returns (copy frame, first deleted frame, last deleted frame, paste frame) of a loop based on the first or last frame."""
+    if frame_selection == 'LAST_FRAME':
+        return end_frame, start_frame, start_frame + frame_easing - 1, 0
+    return start_frame, end_frame - frame_easing + 1, end_frame, end_frame + 1
+
+def loopify_keyframe_arrays(arrays, copy_frame, delete_range_start, delete_range_end, paste_frame, new_key_defaults):
+    """Deletes the keys of the easing range and pastes the copy frame's value on the paste frame.
+
+    Returns the new arrays, or None if the curve has neither a key to copy nor keys to delete."""
+    frames = arrays["co"][:, 0]
+
+    copy_keys = np.flatnonzero(frames == copy_frame)
+    delete_mask = np.isin(frames, np.arange(delete_range_start, delete_range_end + 1, dtype=np.float32))
+    if not copy_keys.size and not delete_mask.any():
+        return None
+
+    copy_value = arrays["co"][copy_keys[-1], 1] if copy_keys.size else None
+    keep = ~delete_mask
+    arrays = {prop: values[keep] for prop, values in arrays.items()}
+
+    # A pasted key that falls inside the easing range would be deleted again, so it is skipped
+    if copy_value is not None and not delete_range_start <= paste_frame <= delete_range_end:
+        arrays = set_keyframe_values(arrays, [paste_frame], [copy_value], new_key_defaults)
+    return arrays
+
+def loop_blend_weights(frames, delete_range_start, delete_range_end, frame_selection):
+    """Returns the crossfade weight of each frame of the easing range, easing (smoothstep) from 0 away from the loop
+    seam to 1 on the paste frame next to it."""
+    frames = np.asarray(frames, dtype=np.float64)
+    easing = delete_range_end - delete_range_start + 1
+    if frame_selection == 'LAST_FRAME':
+        distance = frames - delete_range_start + 1
+    else:
+        distance = delete_range_end - frames + 1
+    t = np.clip(1.0 - distance / (easing + 1), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+def crossfade_loop_values(values, weights, target):
+    """Blends (channels, frames) values toward each channel's target value with (frames,) weights."""
+    return values + weights * (target[:, None] - values)
+
+def crossfade_loop_quaternions(quaternions, weights, target, frame_selection):
+    """Slerps (bones, frames, 4) quaternions toward each bone's (bones, 4) target with (frames,) weights.
+
+    Returns the blended quaternions and the targets flipped onto the same hemisphere as the frame next to the seam,
+    so the pasted key doesn't spin the long way round."""
+    blended = quaternion_slerp(quaternions, target[:, None, :], weights)
+    seam = blended[:, 0] if frame_selection == 'LAST_FRAME' else blended[:, -1]
+    flip = np.sum(seam * target, axis=-1) < 0.0
+    return blended, np.where(flip[:, None], -target, target)
+
+def find_best_loop_easing(values, target, frame_selection, max_easing):
+    """Returns the easing length (1..max_easing) whose crossfade starts from the pose closest to the loop pose.
+
+    values are the (channels, frames) values of every looped channel on consecutive frames, target their loop pose.
+    The crossfade starts on the first frame after the easing range (or the last one before it) and every candidate
+    is scored at once with one distance computation."""
+    frame_count = values.shape[1]
+    easings = np.arange(1, min(max_easing, frame_count - 1) + 1)
+    if not easings.size:
+        return max(1, max_easing)
+    columns = easings if frame_selection == 'LAST_FRAME' else frame_count - 1 - easings
+    errors = np.linalg.norm(values[:, columns] - target[:, None], axis=0)
+    return int(easings[np.argmin(errors)])
+
+# ----------------------------- Pose Tracking -----------------------------
+
+# Minimum location/rotation/scale change for a bone to count as changed
+pose_change_threshold = 0.0001
+
+
+def pose_deltas(location, rotation, scale, original_location, original_rotation, original_scale, threshold=pose_change_threshold):
+    """Returns the location, rotation and scale deltas of (bones, ...) poses against their original pose,
+    and a mask of the bones that changed by more than the threshold."""
+    delta_location = location - original_location
+    delta_rotation = quaternion_rotation_difference(rotation, original_rotation)
+    delta_scale = scale - original_scale
+    changed = ((np.linalg.norm(delta_location, axis=-1) > threshold)
+               | (quaternion_angle(delta_rotation) > threshold)
+               | (np.linalg.norm(delta_scale, axis=-1) > threshold))
+    return delta_location, delta_rotation, delta_scale, changed
+
+def apply_rotation_delta(delta_rotation, rotation, rotation_mode):
+    """Multiplies a delta quaternion onto (..., 4) quaternion or (..., 3) Euler rotations, returning them in the same mode."""
+    if rotation_mode == 'QUATERNION':
+        return quaternion_multiply(delta_rotation, rotation)
+    return quaternion_to_euler(quaternion_multiply(delta_rotation, euler_to_quaternion(rotation, rotation_mode)), rotation_mode)
+
+# ----------------------------- Keyframe Reduction -----------------------------
+
+def fit_reduced_keys(times, values, curve_starts, tolerances):
+    """Chooses which keys to keep so that Bezier segments through them stay within tolerance of every original key.
+
+    All curves are processed at once: times/values hold the concatenated keys of every curve, curve_starts the
+    index of each curve's first key and tolerances the allowed error of each key. Each pass adds the worst key of
+    every segment that is still out of tolerance. Returns the kept mask, the tangent slope of every key (used for
+    the handles) and the remaining error of every key.
+    """
+    count = len(times)
+    positions = np.arange(count)
+    is_start = np.zeros(count, dtype=bool)
+    is_start[curve_starts] = True
+    is_end = np.zeros(count, dtype=bool)
+    is_end[np.append(curve_starts[1:], count) - 1] = True
+
+    # Tangents from the neighbouring keys of the same curve
+    previous = np.where(is_start, positions, positions - 1)
+    following = np.where(is_end, positions, positions + 1)
+    span = times[following] - times[previous]
+    slopes = np.where(span > 0.0, (values[following] - values[previous]) / np.where(span > 0.0, span, 1.0), 0.0)
+
+    tolerances = np.maximum(tolerances, 1e-9)
+    kept = is_start | is_end
+    while True:
+        kept_positions = np.flatnonzero(kept)
+        segment = np.searchsorted(kept_positions, positions, side='right') - 1
+        start = kept_positions[segment]
+        end = kept_positions[np.minimum(segment + 1, len(kept_positions) - 1)]
+
+        # Bezier segments with handles at a third of the segment length are cubic Hermite splines
+        length = times[end] - times[start]
+        u = (times - times[start]) / np.where(length > 0.0, length, 1.0)
+        u2 = u * u
+        u3 = u2 * u
+        predicted = ((2.0 * u3 - 3.0 * u2 + 1.0) * values[start] + (u3 - 2.0 * u2 + u) * length * slopes[start]
+                     + (-2.0 * u3 + 3.0 * u2) * values[end] + (u3 - u2) * length * slopes[end])
+        error = np.where(kept, 0.0, np.abs(predicted - values))
+
+        ratio = error / tolerances
+        violating = np.flatnonzero(ratio > 1.0)
+        if not violating.size:
+            return kept, slopes, error
+
+        # Keep the worst key of every segment that is out of tolerance
+        violating = violating[np.lexsort((-ratio[violating], segment[violating]))]
+        first_per_segment = np.unique(segment[violating], return_index=True)[1]
+        kept[violating[first_per_segment]] = True
+
+def reduced_keyframe_arrays(arrays, kept, slopes, bezier, aligned):
+    """Returns the arrays of the kept keys with Bezier handles pointing along the fitted tangents.
+
+    bezier and aligned are the integer values of the BEZIER interpolation and ALIGNED handle type."""
+    times = arrays["co"][:, 0].astype(np.float64)
+    reduced = {prop: values[kept] for prop, values in arrays.items()}
+    kept_times = times[kept]
+    kept_values = arrays["co"][kept, 1].astype(np.float64)
+    kept_slopes = slopes[kept]
+
+    gaps = np.diff(kept_times)
+    left_length = np.concatenate([gaps[:1], gaps]) / 3.0 if gaps.size else np.ones(1)
+    right_length = np.concatenate([gaps, gaps[-1:]]) / 3.0 if gaps.size else np.ones(1)
+    reduced["handle_left"] = np.column_stack((kept_times - left_length, kept_values - kept_slopes * left_length))
+    reduced["handle_right"] = np.column_stack((kept_times + right_length, kept_values + kept_slopes * right_length))
+    reduced["interpolation"] = np.full(len(kept_times), bezier, dtype=np.int32)
+    reduced["handle_left_type"] = np.full(len(kept_times), aligned, dtype=np.int32)
+    reduced["handle_right_type"] = np.full(len(kept_times), aligned, dtype=np.int32)
+    return reduced
+
+# ----------------------------- Physics Bones -----------------------------
+
+def split_physics_bone_patterns(patterns):
+    """Splits comma separated regular expressions on the commas outside of groups, repetition braces and character
+    classes, so patterns like Hair_\\d{1,3} stay whole. Returns the stripped, non-empty patterns."""
+    parts, current = [], []
+    depth, in_class, escaped = 0, False, False
+    for char in patterns:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char in "({":
+            depth += 1
+        elif char in ")}":
+            depth = max(depth - 1, 0)
+        elif char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+def physics_bone_regex(patterns):
+    """Compiles the comma separated patterns into one regular expression, or None if there are none. Raises re.error
+    on invalid patterns."""
+    parts = split_physics_bone_patterns(patterns)
+    return re.compile("|".join(f"(?:{part})" for part in parts)) if parts else None
+
+def classify_physics_bones(names, joint_names, regex):
+    """Returns the source ('SPRING_BONES' or 'PATTERNS') and the mask over names of the physics bones: the spring
+    bone joints when there are any, else the bones the regex (None matches nothing) finds in their names."""
+    if joint_names:
+        return 'SPRING_BONES', np.array([name in joint_names for name in names], dtype=bool)
+    return 'PATTERNS', np.array([regex is not None and regex.search(name) is not None for name in names], dtype=bool)
+
+# ----------------------------- Spring Bone Solver -----------------------------
+
+def spring_joint_levels(parents):
+    """Groups the joints by depth in their chain, so that every joint comes after its parent joint.
+
+    parents holds the index of each joint's parent joint, or -1 for joints driven by a non-physics bone.
+    Returns one index array per depth."""
+    parents = np.asarray(parents, dtype=np.int64)
+    depth = np.zeros(len(parents), dtype=np.int64)
+    for joint in range(len(parents)):
+        parent = parents[joint]
+        # Bounded walk, so a malformed (cyclic) parent list can't hang the solver
+        while parent >= 0 and depth[joint] < len(parents):
+            depth[joint] += 1
+            parent = parents[parent]
+    return [np.flatnonzero(depth == level) for level in range(int(depth.max()) + 1)] if len(parents) else []
+
+def split_spring_joints(parents, parts):
+    """Splits the joints into at most `parts` groups of whole chains (a joint is always in its parent's group),
+    balanced by joint count. Returns one sorted index array per non-empty group."""
+    parents = np.asarray(parents, dtype=np.int64)
+    roots = np.arange(len(parents))
+    for _ in range(len(parents)):
+        has_parent = parents[roots] >= 0
+        if not has_parent.any():
+            break
+        roots[has_parent] = parents[roots[has_parent]]
+    chain_roots, chain_sizes = np.unique(roots, return_counts=True)
+
+    groups = [[] for _ in range(max(min(parts, len(chain_roots)), 1))]
+    sizes = np.zeros(len(groups), dtype=np.int64)
+    for root, size in sorted(zip(chain_roots, chain_sizes), key=lambda item: -item[1]):
+        smallest = int(np.argmin(sizes))
+        groups[smallest].append(root)
+        sizes[smallest] += size
+    return [np.flatnonzero(np.isin(roots, group)) for group in groups if group]
+
+def subset_spring_parents(parents, indices):
+    """Returns the parent array of a subset of joints (closed under the parent relation), indexed within the subset."""
+    parents = np.asarray(parents, dtype=np.int64)
+    lookup = np.full(len(parents), -1, dtype=np.int64)
+    lookup[indices] = np.arange(len(indices))
+    subset = parents[indices]
+    return np.where(subset >= 0, lookup[np.maximum(subset, 0)], -1)
+
+def constrain_length(heads, tails, lengths):
+    """Moves each tail along its direction from the head so that it is exactly its length away."""
+    direction = tails - heads
+    distance = np.linalg.norm(direction, axis=-1, keepdims=True)
+    return heads + direction / np.maximum(distance, 1e-12) * lengths[..., None]
+
+def closest_points_on_segments(points, starts, ends):
+    """Returns the point of each segment [start, end] closest to the matching point."""
+    segment = ends - starts
+    length_squared = np.einsum('...i,...i->...', segment, segment)
+    t = np.einsum('...i,...i->...', points - starts, segment) / np.maximum(length_squared, 1e-12)
+    return starts + segment * np.clip(t, 0.0, 1.0)[..., None]
+
+def rotation_between(directions_from, directions_to):
+    """Returns the (n, 3, 3) shortest-arc rotation matrices turning each unit vector onto the matching one."""
+    axis = np.cross(directions_from, directions_to)
+    cos = np.einsum('ij,ij->i', directions_from, directions_to)
+    opposite = cos < -1.0 + 1e-9
+
+    # Rodrigues' formula: I + K + K^2 / (1 + cos), with K the cross product matrix of the (unnormalized) axis
+    skew = np.zeros((len(axis), 3, 3))
+    skew[:, 0, 1], skew[:, 0, 2] = -axis[:, 2], axis[:, 1]
+    skew[:, 1, 0], skew[:, 1, 2] = axis[:, 2], -axis[:, 0]
+    skew[:, 2, 0], skew[:, 2, 1] = -axis[:, 1], axis[:, 0]
+    rotation = np.eye(3) + skew + skew @ skew / np.where(opposite, 1.0, 1.0 + cos)[:, None, None]
+
+    if opposite.any():
+        # Opposite vectors have no shortest arc: turn half a circle about any perpendicular axis instead
+        flipped = directions_from[opposite]
+        helper = np.where(np.abs(flipped[:, :1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+        perpendicular = np.cross(flipped, helper)
+        perpendicular /= np.linalg.norm(perpendicular, axis=-1, keepdims=True)
+        rotation[opposite] = 2.0 * perpendicular[:, :, None] * perpendicular[:, None, :] - np.eye(3)
+    return rotation
+
+def simulate_spring_joints(driver_matrices, driver_index, parents, rest_local, tail_offsets, stiffness, drag, gravity,
+                           hit_radius, collider_matrices, collider_offsets, collider_tails, collider_radius, collider_capsule,
+                           collider_mask, delta_time):
+    """Simulates VRM 1.0 spring bone joints over every frame and returns their (frames, joints, 4, 4) world matrices.
+
+    Follows the VRM 1.0 spring bone update: the tail keeps its inertia (reduced by drag), is pulled back toward the
+    joint's rest direction by stiffness and pushed by gravity, is kept at the bone's length from the head, and is
+    pushed out of the sphere and capsule colliders. All joints of the same depth are integrated together, so every
+    chain advances in one vectorized step per depth and frame.
+
+    driver_matrices: (frames, drivers, 4, 4) world matrices of the bones driving the chains.
+    driver_index: (joints,) driver of each joint whose parent isn't a joint.
+    parents: (joints,) parent joint of each joint, -1 when driven.
+    rest_local: (joints, 4, 4) rest matrix of each joint relative to its parent.
+    tail_offsets: (joints, 3) tail of each joint (the next joint's head) in the joint's rest space.
+    stiffness, drag, hit_radius: (joints,) joint settings; gravity: (joints, 3) gravity direction times power.
+    collider_matrices: (frames, colliders, 4, 4) world matrices of the collider bones.
+    collider_offsets, collider_tails: (colliders, 3) sphere center / capsule ends in the collider bone's space.
+    collider_radius, collider_capsule: (colliders,) radius and whether the collider is a capsule.
+    collider_mask: (joints, colliders) which colliders each joint collides with.
+    """
+    frame_count = len(driver_matrices)
+    joint_count = len(parents)
+    world = np.empty((frame_count, joint_count, 4, 4))
+    if not joint_count:
+        return world
+
+    levels = spring_joint_levels(parents)
+    current_tails = np.zeros((joint_count, 3))
+    previous_tails = np.zeros((joint_count, 3))
+    collider_count = len(collider_radius)
+    offsets = np.column_stack([collider_offsets, np.ones(collider_count)]) if collider_count else np.zeros((0, 4))
+    tails = np.column_stack([collider_tails, np.ones(collider_count)]) if collider_count else np.zeros((0, 4))
+
+    for frame in range(frame_count):
+        starts = np.einsum('cij,cj->ci', collider_matrices[frame], offsets)[:, :3] if collider_count else offsets
+        ends = np.einsum('cij,cj->ci', collider_matrices[frame], tails)[:, :3] if collider_count else tails
+
+        for level in levels:
+            parent = parents[level]
+            driven = parent < 0
+            parent_world = np.empty((len(level), 4, 4))
+            parent_world[driven] = driver_matrices[frame, driver_index[level[driven]]]
+            parent_world[~driven] = world[frame, parent[~driven]]
+
+            # The joint's matrix with its rest rotation relative to the (already simulated) parent
+            initial = parent_world @ rest_local[level]
+            heads = initial[:, :3, 3]
+            tail_vectors = np.einsum('nij,nj->ni', initial[:, :3, :3], tail_offsets[level])
+            lengths = np.linalg.norm(tail_vectors, axis=-1)
+            rest_directions = tail_vectors / np.maximum(lengths, 1e-12)[:, None]
+
+            if frame == 0:
+                # The simulation starts at rest
+                current_tails[level] = previous_tails[level] = heads + tail_vectors
+                world[frame, level] = initial
+                continue
+
+            current = current_tails[level]
+            inertia = (current - previous_tails[level]) * (1.0 - drag[level])[:, None]
+            next_tails = (current + inertia + delta_time * stiffness[level][:, None] * rest_directions
+                          + delta_time * gravity[level])
+            next_tails = constrain_length(heads, next_tails, lengths)
+
+            for collider in range(collider_count):
+                rows = np.flatnonzero(collider_mask[level, collider])
+                if not rows.size:
+                    continue
+                points = next_tails[rows]
+                if collider_capsule[collider]:
+                    centers = closest_points_on_segments(points, starts[collider], ends[collider])
+                else:
+                    centers = np.broadcast_to(starts[collider], points.shape)
+                away = points - centers
+                distance = np.linalg.norm(away, axis=-1)
+                radius = collider_radius[collider] + hit_radius[level[rows]]
+                hit = distance < radius
+                if hit.any():
+                    pushed = centers[hit] + away[hit] / np.maximum(distance[hit], 1e-12)[:, None] * radius[hit][:, None]
+                    next_tails[rows[hit]] = constrain_length(heads[rows[hit]], pushed, lengths[rows[hit]])
+
+            previous_tails[level] = current
+            current_tails[level] = next_tails
+
+            # Turn the joint from its rest direction toward the simulated tail
+            turn = rotation_between(rest_directions, (next_tails - heads) / np.maximum(lengths, 1e-12)[:, None])
+            matrices = initial.copy()
+            matrices[:, :3, :3] = turn @ initial[:, :3, :3]
+            world[frame, level] = matrices
+    return world
+
+# ----------------------------- VRM Animation -----------------------------
+
+def rotation_keys_to_quaternions(rotation, rotation_mode):
+    """Converts (..., 3) Euler or (..., 4) quaternion / axis-angle rotation values into unit (..., 4) WXYZ quaternions."""
+    if rotation_mode == 'QUATERNION':
+        quaternions = rotation
+    elif rotation_mode == 'AXIS_ANGLE':
+        quaternions = axis_angle_to_quaternion(rotation)
+    else:
+        quaternions = euler_to_quaternion(rotation, rotation_mode)
+    return quaternions / np.maximum(np.linalg.norm(quaternions, axis=-1, keepdims=True), 1e-12)
+
+def conjugate_rotations(rest, rotations):
+    """Returns rest @ rotations @ rest^-1 for a unit rest quaternion: bone-space rotations expressed in armature axes."""
+    return quaternion_multiply(quaternion_multiply(rest, rotations), rest * np.array([1.0, -1.0, -1.0, -1.0]))
+
+def linear_sample_frames(curves, linear):
+    """Returns the frames to sample a channel on so that linear playback follows its curves: every key frame of the
+    (key frames, interpolations) curves, plus each whole frame between two of them where a curve isn't linear.
+
+    linear is the integer value of the LINEAR interpolation."""
+    key_frames = np.unique(np.concatenate([np.asarray(frames, dtype=np.float64) for frames, _interpolation in curves]))
+    starts, ends = key_frames[:-1], key_frames[1:]
+    curved = np.zeros(len(starts), dtype=bool)
+    for frames, interpolation in curves:
+        # A key's interpolation runs up to the curve's next key; outside its keys the curve is extrapolated
+        key = np.searchsorted(frames, starts, side='right') - 1
+        inside = (key >= 0) & (key < len(frames) - 1)
+        curved[inside] |= np.asarray(interpolation)[key[inside]] != linear
+    resampled = [np.arange(math.floor(start) + 1.0, math.ceil(end)) for start, end in zip(starts[curved], ends[curved])]
+    return np.unique(np.concatenate([key_frames] + resampled))
+
+def blender_to_gltf_vectors(vectors):
+    """Converts (..., 3) vectors from Blender's Z-up axes to glTF's Y-up axes."""
+    return np.stack([vectors[..., 0], vectors[..., 2], -vectors[..., 1]], axis=-1)
+
+def blender_to_gltf_quaternions(quaternions):
+    """Converts (..., 4) WXYZ quaternions from Blender's axes to glTF's Y-up axes and XYZW component order."""
+    return np.stack([quaternions[..., 1], quaternions[..., 3], -quaternions[..., 2], quaternions[..., 0]], axis=-1)
+
+# ----------------------------- Keyframe Snapshots -----------------------------
+
+def pack_keyframe_arrays(arrays, level=1):
+    """Compresses every keyframe array of a curve into one zlib buffer (the key count is needed to unpack it)."""
+    return zlib.compress(b"".join(np.ascontiguousarray(arrays[prop], dtype=dtype).tobytes() for prop, _size, dtype in keyframe_array_props), level)
+
+def unpack_keyframe_arrays(payload, count):
+    """Returns the keyframe arrays packed by pack_keyframe_arrays, as writable arrays."""
+    data = zlib.decompress(payload)
+    arrays = {}
+    offset = 0
+    for prop, size, dtype in keyframe_array_props:
+        buffer = np.frombuffer(data, dtype=dtype, count=count * size, offset=offset).copy()
+        offset += buffer.nbytes
+        arrays[prop] = buffer.reshape(count, size) if size > 1 else buffer
+    return arrays
+
+def diff_keyframe_arrays(before, after):
+    """Compares two versions of a curve's keys.
+
+    Returns the largest value change of the keys found on the same frame in both, and the number of keys only in
+    before (removed) and only in after (added)."""
+    before_frames = before["co"][:, 0]
+    key_index = match_keyframes(after["co"][:, 0], before_frames)
+    matched = key_index >= 0
+    delta = np.abs(after["co"][key_index[matched], 1].astype(np.float64) - before["co"][matched, 1])
+    removed = int((~matched).sum())
+    added = len(after["co"]) - len(np.unique(key_index[matched]))
+    return (float(delta.max()) if delta.size else 0.0), removed, added